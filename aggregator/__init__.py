@@ -1,10 +1,21 @@
-from .aggregator import Aggregator
-from .reportdataclasses import (
-    Income,
-    CurrencyOperation,
-    CacheWithdraw,
-    FinOp,
-    Top5Payment,
-    Report,
-    Expenses,
-)
+from importlib import import_module
+from typing import Any, Dict
+
+# Names are imported from their modules on first use (PEP 562),
+# so importing the package doesn't load pandas
+exports: Dict[str, str] = {
+    "Aggregator": ".aggregator",
+    "Income": ".reportdataclasses",
+    "CurrencyOperation": ".reportdataclasses",
+    "CacheWithdraw": ".reportdataclasses",
+    "FinOp": ".reportdataclasses",
+    "Top5Payment": ".reportdataclasses",
+    "Report": ".reportdataclasses",
+    "Expenses": ".reportdataclasses",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in exports:
+        return getattr(import_module(exports[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,3 +1,7 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
 from pandas import DataFrame, Series
 from aggregator.reportdataclasses import (
     Income,
@@ -7,14 +11,40 @@ from aggregator.reportdataclasses import (
     Report,
     Expenses,
 )
+from aggregator.partial import PartialAggregate, Place, top_k
+from cli import Settings
 from util import Currency
 from datetime import datetime
-from typing import List, Tuple
+from typing import List, Tuple, Dict, TYPE_CHECKING
 from reader import Table
 import tqdm
 
+if TYPE_CHECKING:
+    from aggregator.partialcache import PartialCache
+
+
+@dataclass
+class Classification:
+    # Row flags computed once per table, description checks only run
+    # on the distinct descriptions and are spread back over the rows
+    codes: np.ndarray
+    descriptions: Series
+    is_atm: np.ndarray
+    is_currency_operation: np.ndarray
+    is_salary: np.ndarray
+    is_meal_allowance: np.ndarray
+
 
 class Aggregator:
+    def __init__(self, settings: Settings | None = None):
+        self.cache: "PartialCache | None" = None
+        if settings is not None and settings.use_cache:
+            from aggregator.partialcache import PartialCache
+
+            self.cache = PartialCache(settings.cache_dir, settings.cache_size)
+            if settings.clear_cache:
+                self.cache.clear()
+
     def generate_reports(self, tables: List[Table]) -> List[Report]:
         progress = tqdm.tqdm(
             total=len(tables), colour="green", desc="Gathering statistics: "
@@ -23,112 +53,130 @@ class Aggregator:
 
         for table in tables:
             progress.update(1)
-            income: Income = self.get_income(table)
-            outcome: Expenses = self.get_outcome(table)
-            from_date, to_date = self.get_period(table)
-            reports.append(
-                Report(table, income, outcome, table.currency, from_date, to_date)
-            )
+            reports.append(self.generate_report(table))
 
         progress.set_description("Gathering statistics complete!")
         progress.close()
         return reports
 
-    def get_outcome(self, table: Table) -> Expenses:
-        df: DataFrame = table.dataframe
-        total_outcome = df["Expense"].sum()
-
-        top_5_expenses: List[Top5Payment] = self.get_top5_item_stat(df)
-
-        top_5_biggest_purchases: List[FinOp] = [
-            FinOp(
-                expense["Transaction description"],
-                expense["Transaction date"],
-                expense["Expense"],
-            )
-            for index, expense in df.drop(
-                df[df["Transaction description"].str.contains(" ATM ", na=False)].index
+    def generate_report(self, table: Table) -> Report:
+        # Merged tables are reported from the partials of their statements
+        if table.parts:
+            partial: PartialAggregate = PartialAggregate.merge(
+                [self.get_partial(part) for part in table.parts]
             )
-            .drop(
-                df[df["Transaction description"].str.startswith("EB ", na=False)].index
-            )
-            .nlargest(5, ["Expense"])
-            .iterrows()
-        ]
-
-        cash_withdraws: List[FinOp] = [
-            FinOp("Cash withdraw", withdraw["Transaction date"], withdraw["Expense"])
-            for index, withdraw in df[
-                df["Transaction description"].str.contains(" ATM ")
-            ].iterrows()
-        ]
-
-        currency_operations: List[CurrencyOperation] = self.get_currency_operations(df)
+        else:
+            partial: PartialAggregate = self.get_partial(table)
+        return self.get_report(table, partial)
 
+    def get_report(self, table: Table, partial: PartialAggregate) -> Report:
+        income: Income = Income(
+            partial.total_income,
+            partial.salaries,
+            partial.meal_allowances,
+            partial.other_incomes,
+        )
         outcome: Expenses = Expenses(
-            total_outcome,
-            top_5_expenses,
-            top_5_biggest_purchases,
-            cash_withdraws,
-            currency_operations,
+            partial.total_expense,
+            self.get_top5_item_stat(partial.places),
+            partial.top_purchases,
+            partial.cash_withdraws,
+            partial.currency_operations,
+        )
+        return Report(
+            table, income, outcome, table.currency, partial.from_date, partial.to_date
         )
 
-        return outcome
+    def get_partial(self, table: Table) -> PartialAggregate:
+        if self.cache and table.key:
+            cached: PartialAggregate | None = self.cache.load(table.key)
+            if cached:
+                return cached
 
-    def get_income(self, table: Table) -> Income:
         df: DataFrame = table.dataframe
-        income_rows: DataFrame = df.loc[df["Income"] > 0.0]
-        salary_rows: DataFrame = income_rows[
-            income_rows["Transaction description"].str.match("ZARADA", na=False)
-        ]
-        meal_allowance_rows: DataFrame = income_rows[
-            income_rows["Transaction description"].str.match("Prevoz", na=False)
-        ]
+        classification: Classification = self.classify(df)
+        is_income: np.ndarray = (df["Income"] > 0.0).to_numpy()
+        is_salary: np.ndarray = is_income & classification.is_salary
+        is_meal_allowance: np.ndarray = is_income & classification.is_meal_allowance
 
-        salaries: List[FinOp] = [
-            FinOp("Salary", salary["Transaction date"], salary["Income"])
-            for idx, salary in salary_rows.iterrows()
-        ]
+        purchases: Series = df["Expense"][
+            ~(classification.is_atm | classification.is_currency_operation)
+        ].nlargest(top_k)
+        withdraws: pd.Index = df.index[classification.is_atm]
+        from_date, to_date = self.get_period(table)
 
-        meal_allowances: List[FinOp] = [
-            FinOp("Meal allowance", allowance["Transaction date"], allowance["Income"])
-            for idx, allowance in meal_allowance_rows.iterrows()
-        ]
+        partial: PartialAggregate = PartialAggregate(
+            df["Expense"].sum(),
+            df["Income"].sum(),
+            df["Income"][is_income & ~is_salary & ~is_meal_allowance].sum(),
+            self.get_places(df, classification),
+            self.fin_ops(
+                df.loc[purchases.index, "Transaction description"],
+                df,
+                purchases.index,
+            ),
+            self.fin_ops(Series("Cash withdraw", index=withdraws), df, withdraws),
+            self.fin_ops(
+                Series("Salary", index=df.index[is_salary]),
+                df,
+                df.index[is_salary],
+                "Income",
+            ),
+            self.fin_ops(
+                Series("Meal allowance", index=df.index[is_meal_allowance]),
+                df,
+                df.index[is_meal_allowance],
+                "Income",
+            ),
+            self.get_currency_operations(df, classification),
+            from_date,
+            to_date,
+        )
 
-        other_incomes: float = income_rows.drop(
-            salary_rows.index.append(meal_allowance_rows.index)
-        )["Income"].sum()
-        total_income: float = df["Income"].sum()
+        if self.cache and table.key:
+            self.cache.store(table.key, partial)
+        return partial
 
-        income: Income = Income(total_income, salaries, meal_allowances, other_incomes)
+    def classify(self, df: DataFrame) -> Classification:
+        codes, uniques = pd.factorize(df["Transaction description"])
+        descriptions: Series = Series(uniques, dtype="string")
 
-        return income
+        def spread(flags: Series) -> np.ndarray:
+            # Code -1 (no description) picks the trailing False
+            return np.append(flags.to_numpy(dtype=bool, na_value=False), False)[codes]
 
-    def get_currency_operations(self, df: DataFrame) -> List[CurrencyOperation]:
-        currency_operations: List[CurrencyOperation] = []
+        return Classification(
+            codes,
+            descriptions,
+            spread(descriptions.str.contains(" ATM ", na=False, regex=False)),
+            spread(descriptions.str.startswith("EB ", na=False)),
+            spread(descriptions.str.match("ZARADA", na=False)),
+            spread(descriptions.str.match("Prevoz", na=False)),
+        )
 
-        for index, operation in df[
-            df["Transaction description"].str.startswith("EB ", na=False)
-        ].iterrows():
-            currency: Currency = Currency(
-                operation["Amount in original currency"][-3::]
-            )
-            currency_amount: float = float(
-                operation["Amount in original currency"][0:-4]
+    def get_currency_operations(
+        self, df: DataFrame, classification: Classification
+    ) -> List[CurrencyOperation]:
+        operations: DataFrame = df[classification.is_currency_operation]
+        original_amounts: Series = operations["Amount in original currency"]
+        currencies: List[str] = original_amounts.str[-3:].tolist()
+        currency_amounts: List[float] = original_amounts.str[:-4].astype(float).tolist()
+        title: str = "Currency operation"
+
+        return [
+            CurrencyOperation(
+                (currency_amount, Currency(currency)),
+                FinOp(title, date, amount),
+                exchange_rate,
             )
-            date: datetime = operation["Transaction date"]
-            amount: float = operation["Expense"]
-            exchange_rate: float = float(operation["Exchange rate"])
-            title: str = "Currency operation"
-            currency_operations.append(
-                CurrencyOperation(
-                    (currency_amount, currency),
-                    FinOp(title, date, amount),
-                    exchange_rate,
-                )
+            for currency_amount, currency, date, amount, exchange_rate in zip(
+                currency_amounts,
+                currencies,
+                self.dates(operations["Transaction date"]),
+                operations["Expense"].tolist(),
+                operations["Exchange rate"].astype(float).tolist(),
             )
-
-        return currency_operations
+        ]
 
     def get_period(self, table: Table) -> Tuple[datetime, datetime]:
         df = table.dataframe
@@ -137,18 +185,78 @@ class Aggregator:
 
         return from_date, to_date
 
-    def get_top5_item_stat(self, df: DataFrame) -> List[Top5Payment]:
+    def get_places(
+        self, df: DataFrame, classification: Classification
+    ) -> Dict[str, Place]:
+        codes: np.ndarray = classification.codes
+        has_description: np.ndarray = codes >= 0
+        num_of_descriptions: int = len(classification.descriptions)
+
+        # One grouped reduction over all descriptions
+        expenses: np.ndarray = df["Expense"].to_numpy(dtype=float)[has_description]
+        described_codes: np.ndarray = codes[has_description]
+        counts: np.ndarray = np.bincount(described_codes, minlength=num_of_descriptions)
+        sums: np.ndarray = np.bincount(
+            described_codes,
+            weights=np.nan_to_num(expenses),
+            minlength=num_of_descriptions,
+        )
+        num_of_bills: np.ndarray = np.bincount(
+            described_codes,
+            weights=~np.isnan(expenses),
+            minlength=num_of_descriptions,
+        )
+
+        return {
+            title: Place(int(count), float(total), int(bills))
+            for title, count, total, bills in zip(
+                classification.descriptions.tolist(),
+                counts.tolist(),
+                sums.tolist(),
+                num_of_bills.tolist(),
+            )
+        }
+
+    def get_top5_item_stat(self, places: Dict[str, Place]) -> List[Top5Payment]:
+        # Ties are broken the same way value_counts().nlargest(5) does
+        top_5_rows: Series = (
+            Series(
+                [place.num_of_payments for place in places.values()],
+                index=list(places),
+                dtype="int64",
+            )
+            .sort_values(ascending=False)
+            .nlargest(top_k)
+        )
+
         top_5_payments: List[Top5Payment] = []
-        top_5_rows: Series = df["Transaction description"].value_counts().nlargest(5)
-
-        for expense in top_5_rows.index:
-            title: str = expense
-            num_of_payments: int = top_5_rows[expense]
-            payments: Series = df.loc[df["Transaction description"] == expense][
-                "Expense"
-            ]
-            sum: float = payments.sum()
-            avg: float = payments.mean()
-            top_5_payments.append(Top5Payment(title, None, sum, num_of_payments, avg))
+        for title, num_of_payments in top_5_rows.items():
+            place: Place = places[title]
+            avg: float = (
+                place.sum / place.num_of_bills if place.num_of_bills else np.nan
+            )
+            top_5_payments.append(
+                Top5Payment(title, None, place.sum, num_of_payments, avg)
+            )
 
         return top_5_payments
+
+    def fin_ops(
+        self,
+        titles: Series,
+        df: DataFrame,
+        index: pd.Index,
+        amount_column: str = "Expense",
+    ) -> List[FinOp]:
+        return [
+            FinOp(title, date, amount)
+            for title, date, amount in zip(
+                titles.tolist(),
+                self.dates(df.loc[index, "Transaction date"]),
+                df.loc[index, amount_column].tolist(),
+            )
+        ]
+
+    def dates(self, dates: Series) -> List[datetime]:
+        # Plain datetimes, cached partials unpickle Timestamps a lot slower
+        return list(dates.dt.to_pydatetime())
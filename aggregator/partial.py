@@ -0,0 +1,121 @@
+import heapq
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from typing import List, Dict, Any
+
+import pandas as pd
+
+from aggregator.reportdataclasses import FinOp, CurrencyOperation
+
+top_k: int = 5
+fin_op_lists: List[str] = [
+    "top_purchases",
+    "cash_withdraws",
+    "salaries",
+    "meal_allowances",
+]
+
+
+@dataclass
+class Place:
+    num_of_payments: int
+    sum: float
+    num_of_bills: int
+
+
+@dataclass
+class PartialAggregate:
+    # Statistics of one or more statements that can be combined without
+    # going back to the rows. Places keep every description because a
+    # place can make the top 5 only when statements are put together,
+    # top purchases only need the biggest top_k of every statement.
+    total_expense: float
+    total_income: float
+    other_incomes: float
+    places: Dict[str, Place]
+    top_purchases: List[FinOp]
+    cash_withdraws: List[FinOp]
+    salaries: List[FinOp]
+    meal_allowances: List[FinOp]
+    currency_operations: List[CurrencyOperation]
+    from_date: datetime
+    to_date: datetime
+
+    # Pickled as plain tuples, unpickling thousands of dataclass
+    # instances is several times slower than building them again
+    def __getstate__(self) -> Dict[str, Any]:
+        state: Dict[str, Any] = dict(self.__dict__)
+        state["places"] = {
+            title: (place.num_of_payments, place.sum, place.num_of_bills)
+            for title, place in self.places.items()
+        }
+        for name in fin_op_lists:
+            state[name] = [(op.title, op.date, op.amount) for op in state[name]]
+        state["currency_operations"] = [
+            (
+                op.bought,
+                (op.spent.title, op.spent.date, op.spent.amount),
+                op.exchange_rate,
+            )
+            for op in self.currency_operations
+        ]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        state["places"] = {
+            title: Place(*place) for title, place in state["places"].items()
+        }
+        for name in fin_op_lists:
+            state[name] = [FinOp(*op) for op in state[name]]
+        state["currency_operations"] = [
+            CurrencyOperation(bought, FinOp(*spent), exchange_rate)
+            for bought, spent, exchange_rate in state["currency_operations"]
+        ]
+        self.__dict__.update(state)
+
+    @staticmethod
+    def merge(partials: List["PartialAggregate"]) -> "PartialAggregate":
+        places: Dict[str, Place] = {}
+        for partial in partials:
+            for title, place in partial.places.items():
+                merged: Place | None = places.get(title)
+                if merged is None:
+                    places[title] = Place(
+                        place.num_of_payments, place.sum, place.num_of_bills
+                    )
+                else:
+                    merged.num_of_payments += place.num_of_payments
+                    merged.sum += place.sum
+                    merged.num_of_bills += place.num_of_bills
+
+        # heapq.merge is stable, so equal amounts keep statement order
+        top_purchases: List[FinOp] = list(
+            islice(
+                heapq.merge(
+                    *(partial.top_purchases for partial in partials),
+                    key=lambda purchase: -purchase.amount,
+                ),
+                top_k,
+            )
+        )
+        from_dates: List[datetime] = [
+            p.from_date for p in partials if not pd.isna(p.from_date)
+        ]
+        to_dates: List[datetime] = [
+            p.to_date for p in partials if not pd.isna(p.to_date)
+        ]
+
+        return PartialAggregate(
+            sum(partial.total_expense for partial in partials),
+            sum(partial.total_income for partial in partials),
+            sum(partial.other_incomes for partial in partials),
+            places,
+            top_purchases,
+            [op for partial in partials for op in partial.cash_withdraws],
+            [op for partial in partials for op in partial.salaries],
+            [op for partial in partials for op in partial.meal_allowances],
+            [op for partial in partials for op in partial.currency_operations],
+            min(from_dates, default=pd.NaT),
+            max(to_dates, default=pd.NaT),
+        )
@@ -0,0 +1,46 @@
+import os
+import pickle
+import threading
+
+from reader.cache import entries, evict, remove, touch
+from .partial import PartialAggregate
+
+# Bump whenever aggregation changes what ends up in a PartialAggregate
+AGGREGATOR_VERSION: str = "1"
+
+
+class PartialCache:
+    # Partial aggregates of single statements, kept next to the table
+    # entries and keyed by the same table key. Tables and partials are
+    # evicted together, so the directory stays within one max_size.
+    suffix: str = ".partial"
+
+    def __init__(self, directory: str, max_size: int):
+        self.directory = directory
+        self.max_size = max_size
+        os.makedirs(self.directory, exist_ok=True)
+
+    def load(self, key: str) -> PartialAggregate | None:
+        entry_path: str = self.entry_path(key)
+        try:
+            with open(entry_path, "rb") as file:
+                partial: PartialAggregate = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+            return None
+        touch(entry_path)
+        return partial
+
+    def store(self, key: str, partial: PartialAggregate) -> None:
+        entry_path: str = self.entry_path(key)
+        tmp_path: str = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as file:
+            pickle.dump(partial, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry_path)
+        evict(self.directory, self.max_size)
+
+    def clear(self) -> None:
+        for entry in entries(self.directory, [self.suffix]):
+            remove(entry.path)
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}-{AGGREGATOR_VERSION}{self.suffix}")
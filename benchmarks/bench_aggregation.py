@@ -0,0 +1,300 @@
+# Times report aggregation on synthetic typed tables and checks it
+# against the row-by-row implementation it replaced.
+# With --months the rows are split into monthly statements that are
+# reported merged, once from scratch and once with one new month on top
+# of cached partial aggregates.
+# Usage: python -m benchmarks.bench_aggregation --rows 10000 100000 1000000
+#        python -m benchmarks.bench_aggregation --rows 1000000 --months 60
+
+import math
+import tempfile
+import time
+from argparse import ArgumentParser
+from dataclasses import fields, is_dataclass
+from datetime import datetime
+from typing import List, Tuple, Any
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+
+from aggregator import Aggregator
+from cli import Settings
+from aggregator.reportdataclasses import (
+    Income,
+    FinOp,
+    CurrencyOperation,
+    Top5Payment,
+    Report,
+    Expenses,
+)
+from reader import Table
+from reader.schema import apply_schema, concat_tables, table_schema, foreign_text_column
+from util import Currency, print_colored
+
+
+def transactions(rows: int, merchants: int = 2000, seed: int = 0) -> DataFrame:
+    # Typed statement table with ATM withdrawals, currency operations,
+    # salaries, meal allowances and a long tail of merchants
+    rng = np.random.default_rng(seed)
+    kind = rng.random(rows)
+    names = np.array([f"MERCHANT {i} BEOGRAD" for i in range(merchants)], dtype=object)
+    description = names[rng.zipf(1.5, rows) % merchants]
+    description = np.where(kind < 0.05, "RAIF ATM 0042 BEOGRAD", description)
+    description = np.where(kind > 0.9, "EB KUPOVINA DEVIZA", description)
+    description = np.where(kind > 0.99, "ZARADA ZA MESEC", description)
+    description = np.where(kind > 0.995, "Prevoz i topli obrok", description)
+    expense = np.round(rng.uniform(10, 50000, rows), 2)
+    income = np.where(kind > 0.99, expense * 10, 0.0)
+    dates = pd.Timestamp(2015, 1, 1) + pd.to_timedelta(
+        rng.integers(0, 3650, rows), unit="D"
+    )
+    currency_operation = (kind > 0.9) & (kind <= 0.99)
+
+    return apply_schema(
+        pd.DataFrame(
+            {
+                "Transaction date": dates,
+                "Completion date": dates,
+                "Card number": np.where(kind < 0.5, "4242****1234", None),
+                "Transaction description": description,
+                "Amount in foreign currency": None,
+                foreign_text_column: None,
+                "Amount in original currency": np.where(
+                    currency_operation, "100.00 EUR", None
+                ),
+                "Exchange rate": np.where(currency_operation, 117.2, np.nan),
+                "Expense": np.where(kind > 0.99, 0.0, expense),
+                "Income": income,
+                "Balance": expense,
+            },
+            columns=list(table_schema),
+        )
+    )
+
+
+class LegacyAggregator:
+    def generate_reports(self, tables: List[Table]) -> List[Report]:
+        reports: List[Report] = []
+        for table in tables:
+            income: Income = self.get_income(table)
+            outcome: Expenses = self.get_outcome(table)
+            from_date, to_date = self.get_period(table)
+            reports.append(
+                Report(table, income, outcome, table.currency, from_date, to_date)
+            )
+        return reports
+
+    def get_outcome(self, table: Table) -> Expenses:
+        df: DataFrame = table.dataframe
+        total_outcome = df["Expense"].sum()
+
+        top_5_expenses: List[Top5Payment] = self.get_top5_item_stat(df)
+
+        top_5_biggest_purchases: List[FinOp] = [
+            FinOp(
+                expense["Transaction description"],
+                expense["Transaction date"],
+                expense["Expense"],
+            )
+            for index, expense in df.drop(
+                df[df["Transaction description"].str.contains(" ATM ", na=False)].index
+            )
+            .drop(
+                df[df["Transaction description"].str.startswith("EB ", na=False)].index
+            )
+            .nlargest(5, ["Expense"])
+            .iterrows()
+        ]
+
+        cash_withdraws: List[FinOp] = [
+            FinOp("Cash withdraw", withdraw["Transaction date"], withdraw["Expense"])
+            for index, withdraw in df[
+                df["Transaction description"].str.contains(" ATM ", na=False)
+            ].iterrows()
+        ]
+
+        currency_operations: List[CurrencyOperation] = self.get_currency_operations(df)
+
+        return Expenses(
+            total_outcome,
+            top_5_expenses,
+            top_5_biggest_purchases,
+            cash_withdraws,
+            currency_operations,
+        )
+
+    def get_income(self, table: Table) -> Income:
+        df: DataFrame = table.dataframe
+        income_rows: DataFrame = df.loc[df["Income"] > 0.0]
+        salary_rows: DataFrame = income_rows[
+            income_rows["Transaction description"].str.match("ZARADA", na=False)
+        ]
+        meal_allowance_rows: DataFrame = income_rows[
+            income_rows["Transaction description"].str.match("Prevoz", na=False)
+        ]
+
+        salaries: List[FinOp] = [
+            FinOp("Salary", salary["Transaction date"], salary["Income"])
+            for idx, salary in salary_rows.iterrows()
+        ]
+
+        meal_allowances: List[FinOp] = [
+            FinOp("Meal allowance", allowance["Transaction date"], allowance["Income"])
+            for idx, allowance in meal_allowance_rows.iterrows()
+        ]
+
+        other_incomes: float = income_rows.drop(
+            salary_rows.index.append(meal_allowance_rows.index)
+        )["Income"].sum()
+        total_income: float = df["Income"].sum()
+
+        return Income(total_income, salaries, meal_allowances, other_incomes)
+
+    def get_currency_operations(self, df: DataFrame) -> List[CurrencyOperation]:
+        currency_operations: List[CurrencyOperation] = []
+
+        for index, operation in df[
+            df["Transaction description"].str.startswith("EB ", na=False)
+        ].iterrows():
+            currency: Currency = Currency(
+                operation["Amount in original currency"][-3::]
+            )
+            currency_amount: float = float(
+                operation["Amount in original currency"][0:-4]
+            )
+            date: datetime = operation["Transaction date"]
+            amount: float = operation["Expense"]
+            exchange_rate: float = float(operation["Exchange rate"])
+            title: str = "Currency operation"
+            currency_operations.append(
+                CurrencyOperation(
+                    (currency_amount, currency),
+                    FinOp(title, date, amount),
+                    exchange_rate,
+                )
+            )
+
+        return currency_operations
+
+    def get_top5_item_stat(self, df: DataFrame) -> List[Top5Payment]:
+        top_5_payments: List[Top5Payment] = []
+        top_5_rows: Series = df["Transaction description"].value_counts().nlargest(5)
+
+        for expense in top_5_rows.index:
+            title: str = expense
+            num_of_payments: int = top_5_rows[expense]
+            payments: Series = df.loc[df["Transaction description"] == expense][
+                "Expense"
+            ]
+            sum: float = payments.sum()
+            avg: float = payments.mean()
+            top_5_payments.append(Top5Payment(title, None, sum, num_of_payments, avg))
+
+        return top_5_payments
+
+    def get_period(self, table: Table) -> Tuple[datetime, datetime]:
+        df = table.dataframe
+        return df["Transaction date"].min(), df["Transaction date"].max()
+
+
+def same(expected: Any, actual: Any) -> bool:
+    # Sums are accumulated in a different order, so floats only match closely
+    if isinstance(expected, Table):
+        return expected is actual
+    if is_dataclass(expected):
+        return all(
+            same(getattr(expected, f.name), getattr(actual, f.name))
+            for f in fields(expected)
+        )
+    if isinstance(expected, (list, tuple)):
+        return len(expected) == len(actual) and all(
+            same(e, a) for e, a in zip(expected, actual)
+        )
+    if isinstance(expected, float):
+        return (math.isnan(expected) and math.isnan(actual)) or math.isclose(
+            expected, actual, rel_tol=1e-9
+        )
+    return expected == actual
+
+
+def timed(
+    aggregator: Aggregator | LegacyAggregator, tables: List[Table]
+) -> Tuple[float, List[Report]]:
+    start: float = time.perf_counter()
+    reports: List[Report] = aggregator.generate_reports(tables)
+    return time.perf_counter() - start, reports
+
+
+def merged(months: List[Table]) -> Table:
+    return Table(
+        concat_tables([month.dataframe for month in months]),
+        Currency.RSD,
+        parts=months,
+    )
+
+
+def bench_merge(rows: int, num_of_months: int, legacy: bool) -> None:
+    months: List[Table] = [
+        Table(transactions(rows // num_of_months, seed=seed), Currency.RSD, f"{seed}")
+        for seed in range(num_of_months)
+    ]
+    history: Table = merged(months[:-1])
+    everything: Table = merged(months)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        aggregator: Aggregator = Aggregator(
+            Settings(True, [], "", False, cache_dir=cache_dir)
+        )
+        elapsed, reports = timed(aggregator, [everything])
+        message: str = f"{rows:>9} rows in {num_of_months} months: {elapsed:.3f}s"
+
+        # Start over with every month but the last one already aggregated
+        aggregator.cache.clear()
+        timed(aggregator, [history])
+        new_month_elapsed, _ = timed(aggregator, [everything])
+        message += f", adding a month {new_month_elapsed:.3f}s"
+
+    if legacy:
+        legacy_elapsed, legacy_reports = timed(LegacyAggregator(), [everything])
+        if not same(legacy_reports, reports):
+            print_colored(f"{rows:>9} rows: merged reports differ!", "light_red")
+            return
+        message += f", legacy {legacy_elapsed:.3f}s"
+
+    print_colored(message, "green")
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("--rows", nargs="+", type=int, default=[10_000, 100_000])
+    arg_parser.add_argument(
+        "--no-legacy",
+        action="store_true",
+        help="Skip the old implementation, it takes minutes on big tables",
+    )
+    arg_parser.add_argument("--months", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    for rows in args.rows:
+        if args.months:
+            bench_merge(rows, args.months, not args.no_legacy)
+            continue
+
+        tables: List[Table] = [Table(transactions(rows), Currency.RSD)]
+        elapsed, reports = timed(Aggregator(), tables)
+        message: str = f"{rows:>9} rows: {elapsed:.3f}s"
+
+        if not args.no_legacy:
+            legacy_elapsed, legacy_reports = timed(LegacyAggregator(), tables)
+            if not same(legacy_reports, reports):
+                print_colored(f"{rows:>9} rows: reports differ!", "light_red")
+                continue
+            message += f", legacy {legacy_elapsed:.3f}s, "
+            message += f"speedup {legacy_elapsed / elapsed:.1f}x"
+
+        print_colored(message, "green")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# Times dropping the duplicates of overlapping statements at millions of rows.
+# A "quarter" of --years copies of a generated statement is merged with the
+# "months" that hold the same copies again, so every row of the months is a
+# duplicate and none of the quarter is.
+# Usage: python -m benchmarks.bench_dedup --years 2000 --pages 40
+
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from typing import List
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from reader import Table
+from reader.fingerprint import duplicate_rows
+from util import print_colored
+from .bench_ledger import read_statement, shifted
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("--years", type=int, default=2000, help="copies")
+    arg_parser.add_argument("--pages", type=int, default=40, help="of a statement")
+    arg_parser.add_argument("--months", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        table: Table = read_statement(directory, args.pages)
+    copies: List[DataFrame] = [
+        shifted(table, year).dataframe for year in range(args.years)
+    ]
+    quarter: DataFrame = pd.concat(copies, ignore_index=True)
+    months: List[DataFrame] = [
+        pd.concat(copies[idx :: args.months], ignore_index=True)
+        for idx in range(args.months)
+    ]
+
+    start: float = time.perf_counter()
+    masks: List[np.ndarray] = duplicate_rows([quarter] + months)
+    elapsed: float = time.perf_counter() - start
+
+    rows: int = len(quarter) + sum(len(month) for month in months)
+    dropped: List[int] = [int(mask.sum()) for mask in masks]
+    print_colored(
+        f"{rows} rows deduplicated in {elapsed:.2f}s, "
+        f"{rows / elapsed / 1e6:.2f}M rows/s, dropped {dropped}",
+        "light_grey",
+    )
+    if dropped != [0] + [len(month) for month in months]:
+        print_colored("Wrong number of duplicates dropped", "light_red")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
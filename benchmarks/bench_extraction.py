@@ -0,0 +1,45 @@
+# Compares tabula extraction throughput of the per-page and batched modes.
+# Usage: python -m benchmarks.bench_extraction -f ./statements/*.pdf
+
+import time
+from argparse import ArgumentParser
+from typing import List
+
+from cli import Settings, ExtractionMode
+from reader import PDFReader
+from reader.probe import probe_pdf
+from util import print_colored
+
+
+def count_pages(paths: List[str]) -> int:
+    return sum(probe_pdf(path).num_of_pages for path in paths)
+
+
+def bench_mode(paths: List[str], mode: ExtractionMode, repeat: int) -> float:
+    settings: Settings = Settings(False, paths, "./", False, mode)
+    best: float = float("inf")
+    for _ in range(repeat):
+        start: float = time.perf_counter()
+        PDFReader(settings).get_tables_from_pdfs(paths)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("-f", "--files", nargs="+", required=True)
+    arg_parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    pages: int = count_pages(args.files)
+    for mode in ExtractionMode:
+        elapsed: float = bench_mode(args.files, mode, args.repeat)
+        print_colored(
+            f"{mode.value:>10}: {pages} pages in {elapsed:.2f}s "
+            f"({pages / elapsed:.2f} pages/s)",
+            "green",
+        )
+
+
+if __name__ == "__main__":
+    main()
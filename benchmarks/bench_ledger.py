@@ -0,0 +1,88 @@
+# Times appending statements to the SQLite ledger, appending them again
+# (every row is already there), and reading a month, a year and the whole
+# ledger back, for a small and a large ledger. Reading a range should take
+# about as long in both ledgers, reading everything should not.
+# Usage: python -m benchmarks.bench_ledger --years 20 --pages 40
+
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+from datetime import datetime
+from typing import List, Dict
+
+import pandas as pd
+
+from cli import Settings, Engine
+from ledger import Ledger
+from reader import PDFReader, Table
+from util import Currency, print_colored
+from .statements import statement
+
+
+def read_statement(directory: str, pages: int) -> Table:
+    path: str = os.path.join(directory, "statement.pdf")
+    statement(path, Currency.RSD, pages, 58)
+    settings: Settings = Settings(
+        False, [path], directory, False, engine=Engine.PYTHON, use_cache=False
+    )
+    return PDFReader(settings, verbose=False).read_tables([path])[path]
+
+
+def shifted(table: Table, years: int) -> Table:
+    # The same statement some years later
+    dataframe = table.dataframe.copy()
+    for column in ["Transaction date", "Completion date"]:
+        dataframe[column] = dataframe[column] + pd.DateOffset(years=years)
+    return Table(dataframe, table.currency)
+
+
+def measure(path: str, statements: List[Table]) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+    with Ledger(path) as ledger:
+        start: float = time.perf_counter()
+        for table in statements:
+            ledger.append(table)
+        results["append"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        added: int = sum(ledger.append(table) for table in statements)
+        results["append again"] = time.perf_counter() - start
+        assert added == 0, f"{added} duplicate rows were added"
+
+        for name, first, last in [
+            ("read month", datetime(2023, 3, 1), datetime(2023, 3, 31)),
+            ("read year", datetime(2023, 1, 1), datetime(2023, 12, 31)),
+            ("read all", None, None),
+        ]:
+            start = time.perf_counter()
+            rows: int = len(ledger.table(Currency.RSD, first, last).dataframe)
+            results[name] = time.perf_counter() - start
+            results[f"{name} rows"] = rows
+    return results
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("--years", type=int, default=20, help="large ledger")
+    arg_parser.add_argument("--pages", type=int, default=40, help="of a statement")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        table: Table = read_statement(directory, args.pages)
+        for years in [1, args.years]:
+            statements: List[Table] = [shifted(table, year) for year in range(years)]
+            rows: int = sum(len(t.dataframe) for t in statements)
+            results = measure(os.path.join(directory, f"{years}.db"), statements)
+            print_colored(f"Ledger of {rows} transactions:", "light_grey")
+            for name in ["append", "append again", "read month", "read year"]:
+                print_colored(f"  {name:<13} {results[name]:8.3f}s", "light_grey")
+            print_colored(
+                f"  {'read all':<13} {results['read all']:8.3f}s "
+                f"({results['read all rows']} rows)",
+                "light_grey",
+            )
+
+
+if __name__ == "__main__":
+    main()
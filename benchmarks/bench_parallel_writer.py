@@ -0,0 +1,71 @@
+# Writes monthly reports one file per report, serially and with --jobs
+# processes, and checks that both runs produce byte-identical files.
+# Usage: python -m benchmarks.bench_parallel_writer --rows 200000 --jobs 4
+
+import filecmp
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+from multiprocessing import cpu_count
+from typing import List
+
+from pandas import DataFrame, Series
+
+from aggregator import Aggregator, Report
+from cli import Settings
+from reader import Table
+from reader.schema import apply_schema
+from util import Currency, print_colored
+from writer import XslxWriter
+from .bench_aggregation import transactions
+
+
+def monthly_reports(rows: int, months: int) -> List[Report]:
+    df: DataFrame = transactions(rows)
+    month: Series = df["Transaction date"].dt.to_period("M")
+    tables: List[Table] = [
+        Table(apply_schema(statement.reset_index(drop=True)), Currency.RSD)
+        for period, statement in df.groupby(month)
+    ][:months]
+    return Aggregator().generate_reports(tables)
+
+
+def write(reports: List[Report], output: str, jobs: int) -> float:
+    start: float = time.perf_counter()
+    XslxWriter(Settings(False, [], output, False, jobs=jobs)).generate_xlsx(reports)
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("--rows", type=int, default=200_000)
+    arg_parser.add_argument("--months", type=int, default=24)
+    arg_parser.add_argument("--jobs", type=int, default=cpu_count())
+    args = arg_parser.parse_args()
+
+    reports: List[Report] = monthly_reports(args.rows, args.months)
+    with tempfile.TemporaryDirectory() as serial, tempfile.TemporaryDirectory() as (
+        parallel
+    ):
+        serial_elapsed: float = write(reports, serial, 1)
+        parallel_elapsed: float = write(reports, parallel, args.jobs)
+
+        files: List[str] = sorted(os.listdir(serial))
+        matches, mismatches, errors = filecmp.cmpfiles(
+            serial, parallel, files, shallow=False
+        )
+
+    print_colored(
+        f"{len(reports)} reports: serial {serial_elapsed:.2f}s, "
+        f"{args.jobs} jobs {parallel_elapsed:.2f}s",
+        "green",
+    )
+    if mismatches or errors or len(files) != len(reports):
+        print_colored(f"Files differ: {mismatches + errors}", "light_red")
+        exit(1)
+    print_colored(f"All {len(files)} files are byte-identical", "green")
+
+
+if __name__ == "__main__":
+    main()
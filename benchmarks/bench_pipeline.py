@@ -0,0 +1,87 @@
+# Compares time to the first written report, total time and peak RSS of
+# reading, aggregating and writing separate statements in strict phases
+# and through the streaming pipeline, every run in a fresh process.
+# Usage: python -m benchmarks.bench_pipeline --files 50 --pages 20
+
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+from multiprocessing import get_context
+from typing import List, Dict, Any
+
+from aggregator import Aggregator, Report
+from cli import Settings, Engine
+from pipeline import Pipeline
+from reader import PDFReader, Table
+from util import Currency, Metrics, peak_rss_mb, print_colored
+from writer import XslxWriter
+from .statements import statement
+
+
+def run(paths: List[str], streaming: bool, queue) -> None:
+    with tempfile.TemporaryDirectory() as output:
+        settings: Settings = Settings(
+            False, paths, output, False, engine=Engine.PYTHON, use_cache=False
+        )
+        metrics: Metrics = Metrics()
+        pdf_reader: PDFReader = PDFReader(settings, metrics)
+        writer: XslxWriter = XslxWriter(settings)
+        start: float = time.perf_counter()
+        if streaming:
+            Pipeline(settings, metrics, pdf_reader, [writer]).run()
+        else:
+            tables: List[Table] = pdf_reader.extract_data_from_pdfs()
+            reports: List[Report] = Aggregator(settings).generate_reports(tables)
+            for report in reports:
+                writer.write_file(report)
+                if metrics.first_output is None:
+                    metrics.first_output = time.perf_counter() - start
+        queue.put(
+            {
+                "first_output": metrics.first_output,
+                "wall": time.perf_counter() - start,
+                "peak_rss_mb": peak_rss_mb(),
+            }
+        )
+
+
+def measure(paths: List[str], streaming: bool) -> Dict[str, Any]:
+    context = get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=run, args=(paths, streaming, queue))
+    process.start()
+    result: Dict[str, Any] = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("--files", type=int, default=30)
+    arg_parser.add_argument("--pages", type=int, default=20)
+    arg_parser.add_argument("--rows", type=int, default=50, help="rows per page")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths: List[str] = []
+        for idx in range(args.files):
+            path: str = os.path.join(directory, f"statement-{idx + 1}.pdf")
+            statement(path, list(Currency)[idx % 3], args.pages, args.rows, idx)
+            paths.append(path)
+
+        results: Dict[str, Dict[str, Any]] = {
+            "phases": measure(paths, False),
+            "pipeline": measure(paths, True),
+        }
+
+    for mode, result in results.items():
+        print_colored(
+            f"{mode:>8}: first report after {result['first_output']:.2f}s, "
+            f"total {result['wall']:.2f}s, peak RSS {result['peak_rss_mb']:.0f}MB",
+            "light_grey",
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# Times the preprocessing stage on synthetic raw page tables and checks it
+# against the row-by-row implementation it replaced
+# (with its placeholder strings converted to the typed table schema).
+# Usage: python -m benchmarks.bench_preprocessing --rows 10000 100000 1000000
+
+import time
+from argparse import ArgumentParser
+from datetime import date, timedelta
+from typing import List, Callable
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+
+from reader.pdfreader import column_names_list
+from reader.preprocessing import preprocess
+from reader.schema import apply_schema, foreign_text_column
+from util import print_colored, to_datetime
+
+
+def raw_pages(rows: int, rows_per_page: int = 40, seed: int = 0) -> List[DataFrame]:
+    # Looks like tabula output: strings with thousands separators,
+    # "Kurs:" rows below currency operations and some empty dates
+    rng = np.random.default_rng(seed)
+    nan = np.array([np.nan], dtype=object)
+    days = rng.integers(0, 3650, rows)
+    dates = np.array(
+        [
+            (date(2015, 1, 1) + timedelta(days=int(d))).strftime("%d.%m.%Y")
+            for d in days
+        ],
+        dtype=object,
+    )
+    kind = rng.random(rows)
+    amounts = np.char.mod("%.2f", rng.uniform(10, 50000, rows))
+    amounts = np.array([f"{float(a):,.2f}" for a in amounts], dtype=object)
+
+    raw = pd.DataFrame(
+        {
+            "Transaction date": np.where(kind < 0.02, nan, dates),
+            "Completion date": dates,
+            "Card number": np.where(kind < 0.5, "4242****1234", nan),
+            "Transaction description": np.where(
+                kind < 0.1, "EB KUPOVINA DEVIZA", "MAXI 123 BEOGRAD"
+            ),
+            "Amount in foreign currency": np.where(
+                kind > 0.95, "12.50", np.where(kind > 0.9, "12.50 EUR", nan)
+            ),
+            "Amount in original currency": np.where(kind < 0.1, "100.00 EUR", nan),
+            "Expense": amounts,
+            "Income": "0.00",
+            "Balance": amounts,
+        },
+        columns=column_names_list,
+    )
+    rates = pd.DataFrame(
+        {"Amount in original currency": "Kurs: 117.2000"},
+        index=raw.index[kind < 0.1] + 0.5,
+        columns=column_names_list,
+    )
+    table = pd.concat([raw, rates]).sort_index().reset_index(drop=True)
+    return [
+        table.iloc[start : start + rows_per_page].reset_index(drop=True)
+        for start in range(0, len(table), rows_per_page)
+    ]
+
+
+def legacy_preprocess(dataframes: List[DataFrame]) -> DataFrame:
+    table = pd.concat(dataframes, axis=0, ignore_index=True)
+
+    table.insert(6, "Exchange rate", "")
+    for idx, row in table.loc[
+        table["Amount in original currency"].str.contains("(?<=Kurs: ).*", na=False)
+    ].iterrows():
+        table.loc[idx - 1, "Exchange rate"] = row["Amount in original currency"].split(
+            " "
+        )[1]
+
+    table.dropna(subset=["Balance"], inplace=True)
+    table.reset_index(drop=True, inplace=True)
+
+    for idx, row in table.iterrows():
+        if pd.isna(row["Transaction date"]):
+            table.at[idx, "Transaction date"] = row["Completion date"]
+        try:
+            table.at[idx, "Amount in foreign currency"] = float(
+                row["Amount in foreign currency"]
+            )
+        except ValueError:
+            pass
+
+    for column in ["Expense", "Income", "Balance"]:
+        table[column] = table[column].replace(",", "", regex=True).astype(float)
+    table["Amount in original currency"] = table["Amount in original currency"].replace(
+        ",", "", regex=True
+    )
+    table["Completion date"] = table["Completion date"].apply(to_datetime)
+    table["Transaction date"] = table["Transaction date"].apply(to_datetime)
+
+    table.fillna("No information", inplace=True)
+    return table
+
+
+def legacy_to_schema(table: DataFrame) -> DataFrame:
+    table = table.replace({"No information": np.nan, "": np.nan})
+    # The legacy column mixes floats and the texts that aren't numbers
+    foreign: Series = table["Amount in foreign currency"]
+    is_text: Series = foreign.map(lambda value: isinstance(value, str))
+    table["Amount in foreign currency"] = foreign.where(~is_text).astype(float)
+    table.insert(
+        table.columns.get_loc("Amount in foreign currency") + 1,
+        foreign_text_column,
+        foreign.where(is_text),
+    )
+    return apply_schema(table)
+
+
+def timed(function: Callable[[List[DataFrame]], DataFrame], pages: List[DataFrame]):
+    copies: List[DataFrame] = [page.copy() for page in pages]
+    start: float = time.perf_counter()
+    result: DataFrame = function(copies)
+    return result, time.perf_counter() - start
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument(
+        "--rows", nargs="+", type=int, default=[10_000, 100_000, 1_000_000]
+    )
+    arg_parser.add_argument(
+        "--legacy-max-rows",
+        type=int,
+        default=100_000,
+        help="Skip the row-by-row implementation above this size",
+    )
+    args = arg_parser.parse_args()
+
+    for rows in args.rows:
+        pages: List[DataFrame] = raw_pages(rows)
+        result, elapsed = timed(preprocess, pages)
+        message: str = f"{rows:>9} rows: {elapsed:.3f}s"
+        color: str = "green"
+        if rows <= args.legacy_max_rows:
+            legacy_result, legacy_elapsed = timed(legacy_preprocess, pages)
+            identical: bool = result.equals(legacy_to_schema(legacy_result))
+            message += (
+                f", row-by-row {legacy_elapsed:.3f}s "
+                f"({legacy_elapsed / elapsed:.1f}x), "
+                f"{'identical' if identical else 'DIFFERENT'} output"
+            )
+            color = "green" if identical else "light_red"
+        print_colored(message, color)
+
+
+if __name__ == "__main__":
+    main()
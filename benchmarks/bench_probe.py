@@ -0,0 +1,88 @@
+# Measures probe latency and open file descriptors over growing batches,
+# for the probe and for the full PyPDF2 load it replaced (which left every
+# file open). Fails when the probe leaves descriptors open.
+# Usage: python -m benchmarks.bench_probe --files 100 1000 --pages 50
+
+import gc
+import os
+import re
+import tempfile
+import time
+from argparse import ArgumentParser
+from typing import List, Tuple, Callable, Any
+
+import PyPDF2
+
+from reader.probe import probe_pdf
+from util import Currency, print_colored
+from .statements import statement
+
+
+def open_descriptors() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def legacy_probe(path: str) -> Tuple[int, Currency]:
+    pdf = PyPDF2.PdfReader(open(path, "rb"))
+    text: str = pdf.pages[0].extract_text()
+    currency: str = re.findall("Strana:.*$", text, re.MULTILINE)[0].split(" ")[1]
+    return len(pdf.pages), Currency(currency)
+
+
+def bench(probe: Callable[[str], Any], paths: List[str]) -> Tuple[float, int]:
+    # Files left open are only closed once the garbage collector gets to them
+    gc.collect()
+    descriptors: int = open_descriptors()
+    results: List[Any] = []
+    start: float = time.perf_counter()
+    for path in paths:
+        results.append(probe(path))
+    elapsed: float = time.perf_counter() - start
+    leaked: int = open_descriptors() - descriptors
+    del results
+    return elapsed / len(paths), leaked
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("--files", nargs="+", type=int, default=[100, 500])
+    arg_parser.add_argument("--pages", type=int, default=50)
+    arg_parser.add_argument("--legacy", action="store_true")
+    args = arg_parser.parse_args()
+
+    failed: bool = False
+    with tempfile.TemporaryDirectory() as directory:
+        # Every statement is a copy of the same generated file
+        source: str = os.path.join(directory, "statement.pdf")
+        statement(source, Currency.EUR, args.pages, 50)
+        with open(source, "rb") as file:
+            data: bytes = file.read()
+
+        for files in args.files:
+            paths: List[str] = []
+            for idx in range(files):
+                paths.append(os.path.join(directory, f"{idx}.pdf"))
+                if not os.path.exists(paths[-1]):
+                    with open(paths[-1], "wb") as file:
+                        file.write(data)
+
+            probes: List[Tuple[str, Callable[[str], Any]]] = [("probe", probe_pdf)]
+            if args.legacy:
+                probes.append(("legacy", legacy_probe))
+            for name, probe in probes:
+                latency, leaked = bench(probe, paths)
+                print_colored(
+                    f"{files:>6} files {name:>6}: {latency * 1000:.2f}ms per file, "
+                    f"{leaked} descriptors left open",
+                    "light_grey",
+                )
+                if name == "probe" and leaked > 0:
+                    failed = True
+
+    if failed:
+        print_colored("The probe left file descriptors open", "light_red")
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
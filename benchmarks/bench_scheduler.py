@@ -0,0 +1,61 @@
+# Measures how page extraction scales with the number of workers.
+# Files are repeated until the batch has --batch-size entries.
+# Usage: python -m benchmarks.bench_scheduler -f ./statements/*.pdf --engine python
+
+import time
+from argparse import ArgumentParser
+from itertools import cycle, islice
+from multiprocessing import cpu_count
+from typing import List
+
+from cli import Settings, ExtractionMode, Engine
+from reader import PDFReader
+from util import print_colored
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("-f", "--files", nargs="+", required=True)
+    arg_parser.add_argument("-b", "--batch-size", type=int, default=100)
+    arg_parser.add_argument(
+        "--engine", choices=[engine.value for engine in Engine], default="tabula"
+    )
+    arg_parser.add_argument(
+        "-e",
+        "--extraction-mode",
+        choices=[mode.value for mode in ExtractionMode],
+        default=ExtractionMode.PER_PAGE.value,
+    )
+    args = arg_parser.parse_args()
+    paths: List[str] = list(islice(cycle(args.files), args.batch_size))
+
+    baseline: float | None = None
+    workers: int = 1
+    while True:
+        settings: Settings = Settings(
+            False,
+            paths,
+            "./",
+            False,
+            ExtractionMode(args.extraction_mode),
+            Engine(args.engine),
+        )
+        reader: PDFReader = PDFReader(settings)
+        reader.scheduler.max_workers = workers
+        start: float = time.perf_counter()
+        reader.get_tables_from_pdfs(paths)
+        elapsed: float = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print_colored(
+            f"{workers:>3} workers: {elapsed:.2f}s, "
+            f"speedup {baseline / elapsed:.2f}x "
+            f"(efficiency {baseline / elapsed / workers:.0%})",
+            "green",
+        )
+        if workers >= cpu_count():
+            break
+        workers = min(workers * 2, cpu_count())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# Compares memory use and aggregation time of the untyped (object columns
+# with placeholder strings) and the typed table schema on merged tables.
+# Usage: python -m benchmarks.bench_schema --rows 100000 1000000
+
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from typing import List, Tuple
+
+from pandas import DataFrame
+
+from aggregator import Aggregator
+from reader import Table
+from reader.preprocessing import preprocess
+from util import Currency, print_colored
+from .bench_preprocessing import raw_pages, legacy_preprocess
+
+
+def aggregate(dataframe: DataFrame) -> Tuple[float, int]:
+    tracemalloc.start()
+    start: float = time.perf_counter()
+    Aggregator().generate_reports([Table(dataframe, Currency.RSD)])
+    elapsed: float = time.perf_counter() - start
+    peak: int = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("--rows", nargs="+", type=int, default=[100_000])
+    args = arg_parser.parse_args()
+
+    for rows in args.rows:
+        pages: List[DataFrame] = raw_pages(rows)
+        for name, function in [("untyped", legacy_preprocess), ("typed", preprocess)]:
+            dataframe: DataFrame = function([page.copy() for page in pages])
+            size: int = dataframe.memory_usage(deep=True).sum()
+            elapsed, peak = aggregate(dataframe)
+            print_colored(
+                f"{rows:>9} rows {name:>7}: table {size / 2**20:.1f}MB, "
+                f"aggregation {elapsed:.3f}s, "
+                f"aggregation peak {peak / 2**20:.1f}MB",
+                "green",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Times writing one large report with every output format.
+# Usage: python -m benchmarks.bench_sinks --rows 100000
+
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+from typing import List
+
+from aggregator import Aggregator, Report
+from cli import Settings, OutputFormat
+from reader import Table
+from util import Currency, print_colored
+from writer import XslxWriter, ColumnarWriter, ReportWriter
+from .bench_aggregation import transactions
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("--rows", nargs="+", type=int, default=[100_000])
+    args = arg_parser.parse_args()
+
+    for rows in args.rows:
+        reports: List[Report] = Aggregator().generate_reports(
+            [Table(transactions(rows), Currency.RSD)]
+        )
+        for output_format in OutputFormat:
+            with tempfile.TemporaryDirectory() as output:
+                settings: Settings = Settings(
+                    False, [], output, False, formats=[output_format]
+                )
+                writer: ReportWriter = (
+                    XslxWriter(settings)
+                    if output_format is OutputFormat.XLSX
+                    else ColumnarWriter(settings)
+                )
+                start: float = time.perf_counter()
+                writer.generate(reports)
+                elapsed: float = time.perf_counter() - start
+                size: int = sum(
+                    entry.stat().st_size
+                    for entry in os.scandir(output)
+                    if entry.name.endswith(output_format.value)
+                )
+            print_colored(
+                f"{rows:>9} rows {output_format.value:>7}: {elapsed:.3f}s, "
+                f"{size / 2**20:.1f}MB",
+                "green",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# Compares the memory the writer needs on top of the report data in the
+# default and the --streaming mode, every run in a fresh process.
+# Usage: python -m benchmarks.bench_streaming --rows 10000 100000 1000000
+
+import gc
+import resource
+import tempfile
+import time
+from argparse import ArgumentParser
+from multiprocessing import get_context
+from typing import List, Dict, Any
+
+from aggregator import Aggregator, Report
+from cli import Settings
+from reader import Table
+from util import Currency, print_colored
+from writer import XslxWriter
+from .bench_aggregation import transactions
+
+
+def rss_kb(field: str) -> int:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith(field):
+                return int(line.split()[1])
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def write(rows: int, streaming: bool, queue) -> None:
+    reports: List[Report] = Aggregator().generate_reports(
+        [Table(transactions(rows), Currency.RSD)]
+    )
+    gc.collect()
+    # Resets the peak RSS of this process (Linux only)
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+    before: int = rss_kb("VmRSS")
+
+    with tempfile.TemporaryDirectory() as output:
+        settings: Settings = Settings(False, [], output, False, streaming=streaming)
+        start: float = time.perf_counter()
+        XslxWriter(settings).generate_xlsx(reports)
+        elapsed: float = time.perf_counter() - start
+
+    queue.put({"wall": elapsed, "writer_kb": rss_kb("VmHWM") - before})
+
+
+def measure(rows: int, streaming: bool) -> Dict[str, Any]:
+    context = get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=write, args=(rows, streaming, queue))
+    process.start()
+    result: Dict[str, Any] = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument(
+        "--rows", nargs="+", type=int, default=[10_000, 100_000, 300_000]
+    )
+    args = arg_parser.parse_args()
+
+    for rows in args.rows:
+        for streaming in [False, True]:
+            result: Dict[str, Any] = measure(rows, streaming)
+            print_colored(
+                f"{rows:>9} rows {'streaming' if streaming else 'default':>9}: "
+                f"{result['wall']:.2f}s, "
+                f"writer peak RSS +{result['writer_kb'] / 1024:.0f}MB",
+                "green",
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# Times writing the transaction table of a report to a workbook,
+# column by column against the to_excel path it replaced, and the
+# column width estimate against xlsxwriter's autofit.
+# Usage: python -m benchmarks.bench_table_write --rows 100000 1000000 --no-legacy
+
+import os
+import tempfile
+import time
+from argparse import ArgumentParser
+from datetime import datetime
+from typing import Tuple, Callable
+
+import pandas as pd
+from pandas import DataFrame
+
+from cli import Settings
+from util import print_colored
+from writer import XslxWriter
+from writer.columnwidths import ColumnWidths
+from .bench_aggregation import transactions
+
+
+def legacy_write(xslx_writer: XslxWriter, df: DataFrame) -> None:
+    df.to_excel(
+        xslx_writer.writer,
+        sheet_name="Transactions",
+        startrow=1,
+        startcol=0,
+        na_rep=xslx_writer.na_rep,
+    )
+    for col_num, value in enumerate(df.columns.values):
+        xslx_writer.sheet.write(
+            1, col_num + 1, value, xslx_writer.workbook.add_format({"font_size": 12})
+        )
+    for row_num, row in df.iterrows():
+        if not pd.isna(row["Card number"]):
+            xslx_writer.sheet.write(
+                row_num + 2,
+                3,
+                row["Card number"],
+                xslx_writer.workbook.add_format({"align": "right"}),
+            )
+    xslx_writer.sheet.write(1, 0, "№")
+
+
+def columnar_write(xslx_writer: XslxWriter, df: DataFrame) -> None:
+    xslx_writer.write_columns(df, 1)
+
+
+def timed(
+    df: DataFrame, write: Callable[[XslxWriter, DataFrame], None]
+) -> Tuple[float, float]:
+    with tempfile.TemporaryDirectory() as output:
+        xslx_writer: XslxWriter = XslxWriter(Settings(False, [], output, False))
+        xslx_writer.open_workbook(os.path.join(output, "table.xlsx"), datetime.now())
+        xslx_writer.sheet = xslx_writer.workbook.add_worksheet("Transactions")
+        start: float = time.perf_counter()
+        write(xslx_writer, df)
+        written: float = time.perf_counter()
+        xslx_writer.close_workbook()
+        return written - start, time.perf_counter() - written
+
+
+def widths(df: DataFrame, sample: int) -> Tuple[float, float]:
+    with tempfile.TemporaryDirectory() as output:
+        xslx_writer: XslxWriter = XslxWriter(Settings(False, [], output, False))
+        xslx_writer.open_workbook(os.path.join(output, "table.xlsx"), datetime.now())
+        xslx_writer.sheet = xslx_writer.workbook.add_worksheet("Transactions")
+        xslx_writer.write_columns(df, 1)
+
+        start: float = time.perf_counter()
+        ColumnWidths().add_dataframe(df, 0, xslx_writer.na_rep, sample)
+        estimated: float = time.perf_counter()
+        xslx_writer.sheet.autofit()
+        autofit: float = time.perf_counter()
+        xslx_writer.close_workbook()
+        return estimated - start, autofit - estimated
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("--rows", nargs="+", type=int, default=[10_000, 100_000])
+    arg_parser.add_argument(
+        "--no-legacy",
+        action="store_true",
+        help="Skip the to_excel path, it takes minutes on big tables",
+    )
+    arg_parser.add_argument("--width-sample", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    for rows in args.rows:
+        df: DataFrame = transactions(rows)
+        write, close = timed(df, columnar_write)
+        message: str = f"{rows:>9} rows: write {write:.2f}s, save {close:.2f}s"
+
+        if not args.no_legacy:
+            legacy_write_time, legacy_close = timed(df, legacy_write)
+            message += (
+                f", to_excel write {legacy_write_time:.2f}s, "
+                f"save {legacy_close:.2f}s, "
+                f"speedup {(legacy_write_time + legacy_close) / (write + close):.1f}x"
+            )
+
+        print_colored(message, "green")
+
+        estimate, autofit = widths(df, args.width_sample)
+        print_colored(
+            f"{rows:>9} rows: column widths {estimate:.3f}s, autofit {autofit:.3f}s",
+            "green",
+        )
+
+
+if __name__ == "__main__":
+    main()
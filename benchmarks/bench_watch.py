@@ -0,0 +1,120 @@
+# Compares the latency from a statement showing up to its report being written
+# for a cold start of main.py per statement (like a cron job) and for the
+# --watch mode, which keeps the engine and the tables of the statements it has
+# already read in memory. Statements are moved into the watched folder one by
+# one, the way a finished download shows up.
+# Usage: python -m benchmarks.bench_watch --files 5 --pages 20 --engine tabula
+
+import glob
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from threading import Thread
+from typing import List
+
+from cli import Settings, Engine
+from pipeline import Watcher
+from reader import PDFReader
+from util import Currency, Metrics, print_colored
+from writer import XslxWriter
+from .statements import statement
+
+main_script: str = os.path.join(os.path.dirname(os.path.dirname(__file__)), "main.py")
+
+
+def generate(directory: str, files: int, pages: int, rows: int) -> List[str]:
+    paths: List[str] = []
+    for idx in range(files):
+        path: str = os.path.join(directory, f"statement-{idx + 1}.pdf")
+        statement(path, list(Currency)[idx % 3], pages, rows, idx)
+        paths.append(path)
+    return paths
+
+
+def wait_for_reports(output: str, count: int, timeout: float = 120) -> None:
+    deadline: float = time.perf_counter() + timeout
+    while len(glob.glob(os.path.join(output, "*.xlsx"))) < count:
+        if time.perf_counter() > deadline:
+            raise TimeoutError(f"No report in {output} after {timeout}s")
+        time.sleep(0.01)
+
+
+def cold_latencies(paths: List[str], engine: Engine) -> List[float]:
+    latencies: List[float] = []
+    for path in paths:
+        with tempfile.TemporaryDirectory() as output:
+            start: float = time.perf_counter()
+            subprocess.run(
+                [sys.executable, main_script, "-f", path, "-o", output]
+                + ["--engine", engine.value, "--no-cache"],
+                check=True,
+                capture_output=True,
+            )
+            latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def watch_latencies(
+    paths: List[str], engine: Engine, poll_interval: float
+) -> List[float]:
+    latencies: List[float] = []
+    with tempfile.TemporaryDirectory() as folder:
+        with tempfile.TemporaryDirectory() as output:
+            settings: Settings = Settings(
+                False,
+                [],
+                output,
+                False,
+                engine=engine,
+                use_cache=False,
+                watch=folder,
+                poll_interval=poll_interval,
+            )
+            metrics: Metrics = Metrics()
+            watcher: Watcher = Watcher(
+                settings, metrics, PDFReader(settings, metrics), [XslxWriter(settings)]
+            )
+            thread: Thread = Thread(target=watcher.run, daemon=True)
+            thread.start()
+            for count, path in enumerate(paths, 1):
+                start: float = time.perf_counter()
+                os.link(path, os.path.join(folder, os.path.basename(path)))
+                wait_for_reports(output, count)
+                latencies.append(time.perf_counter() - start)
+            watcher.stop()
+            thread.join()
+    return latencies
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("--files", type=int, default=5)
+    arg_parser.add_argument("--pages", type=int, default=10)
+    arg_parser.add_argument("--rows", type=int, default=50, help="rows per page")
+    arg_parser.add_argument(
+        "--engine", type=Engine, choices=list(Engine), default=Engine.PYTHON
+    )
+    arg_parser.add_argument("--poll-interval", type=float, default=0.2)
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths: List[str] = generate(directory, args.files, args.pages, args.rows)
+        results = {
+            "cold": cold_latencies(paths, args.engine),
+            "watch": watch_latencies(paths, args.engine, args.poll_interval),
+        }
+
+    for mode, latencies in results.items():
+        print_colored(
+            f"{mode:>5}: median {statistics.median(latencies):.2f}s, "
+            f"first {latencies[0]:.2f}s, max {max(latencies):.2f}s",
+            "light_grey",
+        )
+
+
+if __name__ == "__main__":
+    main()
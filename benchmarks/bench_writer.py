@@ -0,0 +1,74 @@
+# Counts the cell formats of one large report and the memory the writer
+# takes, against the same writer creating a format for every cell.
+# XlsxWriter merges equal formats of the file itself and writing takes
+# about as long either way, the registry saves the Format objects.
+# Exits with an error when the workbook has more than --max-formats formats.
+# Usage: python -m benchmarks.bench_writer --rows 20000 100000
+
+import sys
+import tempfile
+import tracemalloc
+from argparse import ArgumentParser
+from typing import List, Dict, Any, Tuple
+from unittest import mock
+
+from xlsxwriter.format import Format
+
+from aggregator import Aggregator, Report
+from cli import Settings
+from reader import Table
+from util import Currency, print_colored
+from writer import XslxWriter
+from writer.formatregistry import FormatRegistry
+from .bench_aggregation import transactions
+
+
+class UninternedRegistry(FormatRegistry):
+    def get(self, properties: Dict[str, Any]) -> Format:
+        return self.workbook.add_format(properties)
+
+
+def write(reports: List[Report], registry: type) -> Tuple[int, float]:
+    # Formats of the workbook and peak traced memory of the writer in MB
+    with tempfile.TemporaryDirectory() as output, mock.patch(
+        "writer.xslxwriter.FormatRegistry", registry
+    ):
+        xslx_writer: XslxWriter = XslxWriter(Settings(False, [], output, False))
+        tracemalloc.start()
+        try:
+            xslx_writer.generate_xlsx(reports)
+            peak: int = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return len(xslx_writer.workbook.formats), peak / 2**20
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("--rows", nargs="+", type=int, default=[20_000])
+    arg_parser.add_argument("--max-formats", type=int, default=32)
+    args = arg_parser.parse_args()
+
+    failed: bool = False
+    for rows in args.rows:
+        reports: List[Report] = Aggregator().generate_reports(
+            [Table(transactions(rows), Currency.RSD)]
+        )
+        formats, peak = write(reports, FormatRegistry)
+        uninterned_formats, uninterned_peak = write(reports, UninternedRegistry)
+
+        failed = failed or formats > args.max_formats
+        print_colored(
+            f"{rows:>9} rows: {formats} formats, {peak:.0f}MB peak, "
+            f"without the registry {uninterned_formats} formats, "
+            f"{uninterned_peak:.0f}MB peak",
+            "light_red" if formats > args.max_formats else "green",
+        )
+
+    if failed:
+        print_colored(f"More than {args.max_formats} formats in a workbook", "red")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# Checks startup cost with python -X importtime: `main.py -h`, importing the
+# packages and a run served from the cache must not load the heavy libraries
+# they don't need, and -h has to stay within a time budget.
+# Usage: python -m benchmarks.check_import_time --budget-ms 150
+
+import os
+import subprocess
+import sys
+import tempfile
+from argparse import ArgumentParser
+from typing import List, Dict, Tuple
+
+from util import Currency, print_colored
+from .statements import statement
+
+root: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+heavy: List[str] = [
+    "pandas",
+    "numpy",
+    "pyarrow",
+    "PyPDF2",
+    "tabula",
+    "jpype",
+    "xlsxwriter",
+    "tqdm",
+]
+
+
+def import_times(args: List[str], env: Dict[str, str] | None = None) -> Dict[str, int]:
+    # Cumulative microseconds of every imported module
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args,
+        cwd=root,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    times: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Top level imports are the ones without indentation
+        if name.startswith("  "):
+            times.setdefault(name.strip(), int(cumulative))
+        else:
+            times[name.strip()] = times.get(name.strip(), 0) + int(cumulative)
+            times.setdefault("__total__", 0)
+            times["__total__"] += int(cumulative)
+    return times
+
+
+def loaded(times: Dict[str, int], modules: List[str]) -> List[str]:
+    return [module for module in modules if module in times]
+
+
+def check(
+    name: str, times: Dict[str, int], forbidden: List[str], budget_ms: float | None
+) -> bool:
+    total_ms: float = times.get("__total__", 0) / 1000
+    unexpected: List[str] = loaded(times, forbidden)
+    over_budget: bool = budget_ms is not None and total_ms > budget_ms
+    print_colored(
+        f"{name}: imports took {total_ms:.0f}ms"
+        + (f" (budget {budget_ms:.0f}ms)" if budget_ms is not None else "")
+        + (f", loaded {', '.join(unexpected)}" if unexpected else ""),
+        "light_red" if unexpected or over_budget else "light_grey",
+    )
+    return not unexpected and not over_budget
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("--budget-ms", type=float, default=150)
+    args = arg_parser.parse_args()
+
+    checks: List[Tuple[str, Dict[str, int], List[str], float | None]] = [
+        ("main.py -h", import_times(["main.py", "-h"]), heavy, args.budget_ms),
+        (
+            "import packages",
+            import_times(
+                [
+                    "-c",
+                    "import cli, reader, aggregator, writer, pipeline, server, "
+                    "ledger, util",
+                ]
+            ),
+            heavy,
+            None,
+        ),
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path: str = os.path.join(directory, "statement.pdf")
+        statement(path, Currency.RSD, 3, 40)
+        run: List[str] = ["main.py", "-f", path, "--engine", "python", "-o", directory]
+        env: Dict[str, str] = {"XDG_CACHE_HOME": os.path.join(directory, "cache")}
+        import_times(run, env)
+        checks.append(
+            (
+                "run from the cache",
+                import_times(run, env),
+                ["PyPDF2", "tabula", "jpype", "pyarrow.parquet", "pyarrow.csv"],
+                None,
+            )
+        )
+
+    if not all([check(*arguments) for arguments in checks]):
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
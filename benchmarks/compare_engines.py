@@ -0,0 +1,98 @@
+# Checks that the python engine produces the same tables as tabula and
+# compares speed and memory of both engines on the same statements.
+# Usage: python -m benchmarks.compare_engines -f ./statements/*.pdf
+
+import resource
+import time
+from argparse import ArgumentParser
+from multiprocessing import get_context
+from typing import List, Dict, Any
+
+from cli import Settings, ExtractionMode, Engine
+from reader import PDFReader, Table
+from util import print_colored
+
+
+def run_engine(paths: List[str], engine: Engine, mode: ExtractionMode, queue) -> None:
+    settings: Settings = Settings(
+        False, paths, "./", False, mode, engine, use_cache=False
+    )
+    start: float = time.perf_counter()
+    cpu_start: float = time.process_time()
+    tables: List[Table] = PDFReader(settings).extract_data_from_pdfs()
+    queue.put(
+        {
+            "tables": tables,
+            "wall": time.perf_counter() - start,
+            "cpu": time.process_time() - cpu_start,
+            # Subprocess mode runs tabula-java in child processes
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            + resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        }
+    )
+
+
+def measure(paths: List[str], engine: Engine, mode: ExtractionMode) -> Dict[str, Any]:
+    # Every engine runs in a fresh process so peak RSS is not shared
+    context = get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=run_engine, args=(paths, engine, mode, queue))
+    process.start()
+    result: Dict[str, Any] = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("-f", "--files", nargs="+", required=True)
+    arg_parser.add_argument(
+        "-e",
+        "--extraction-mode",
+        choices=[mode.value for mode in ExtractionMode],
+        default=ExtractionMode.BATCHED.value,
+        help="Tabula mode to compare with, batched uses the same page areas",
+    )
+    args = arg_parser.parse_args()
+    mode: ExtractionMode = ExtractionMode(args.extraction_mode)
+
+    results: Dict[Engine, Dict[str, Any]] = {
+        engine: measure(args.files, engine, mode) for engine in Engine
+    }
+
+    for engine, result in results.items():
+        print_colored(
+            f"{engine.value:>7}: wall {result['wall']:.2f}s, "
+            f"cpu {result['cpu']:.2f}s, "
+            f"peak RSS {result['max_rss_kb'] / 1024:.0f}MB",
+            "green",
+        )
+
+    tabula_tables: List[Table] = results[Engine.TABULA]["tables"]
+    python_tables: List[Table] = results[Engine.PYTHON]["tables"]
+    mismatches: int = 0
+    if len(tabula_tables) != len(python_tables):
+        # e.g. tabula without a Java runtime reads nothing
+        mismatches += 1
+        print_colored(
+            f"tabula read {len(tabula_tables)} and python "
+            f"{len(python_tables)} of {len(args.files)} statements",
+            "light_red",
+        )
+    for path, tabula_table, python_table in zip(
+        args.files, tabula_tables, python_tables
+    ):
+        if tabula_table.currency != python_table.currency or not (
+            tabula_table.dataframe.equals(python_table.dataframe)
+        ):
+            mismatches += 1
+            print_colored(f"Tables differ for {path}", "light_red")
+
+    if mismatches:
+        print_colored(f"{mismatches} mismatching tables", "light_red")
+        exit(1)
+    print_colored("Both engines produced identical tables", "green")
+
+
+if __name__ == "__main__":
+    main()
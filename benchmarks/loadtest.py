@@ -0,0 +1,147 @@
+# Load test of the HTTP conversion service (main.py --serve). Uploads generated
+# statements from --concurrency clients at once and reports p50 and p99
+# latency of the accepted uploads, throughput and how many uploads the
+# service turned away with 503. Without --url a service is started for the
+# test and stopped after it.
+# Usage: python -m benchmarks.loadtest --requests 200 --concurrency 16
+#        python -m benchmarks.loadtest --url http://127.0.0.1:8000 --format json
+
+import http.client
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+from urllib.parse import urlsplit
+
+from cli import Engine
+from util import Currency, print_colored
+from .statements import statement
+
+main_script: str = os.path.join(os.path.dirname(os.path.dirname(__file__)), "main.py")
+
+
+def upload(url: str, pdf: bytes, output_format: str) -> Tuple[int, float]:
+    # Status and seconds until the whole answer was received
+    address = urlsplit(url)
+    start: float = time.perf_counter()
+    connection = http.client.HTTPConnection(address.hostname, address.port, timeout=300)
+    try:
+        connection.request(
+            "POST",
+            f"/convert?format={output_format}",
+            pdf,
+            {"Content-Type": "application/pdf"},
+        )
+        response = connection.getresponse()
+        response.read()
+        return response.status, time.perf_counter() - start
+    finally:
+        connection.close()
+
+
+def wait_until_up(url: str, timeout: float = 60) -> None:
+    address = urlsplit(url)
+    deadline: float = time.perf_counter() + timeout
+    while True:
+        try:
+            connection = http.client.HTTPConnection(address.hostname, address.port)
+            connection.request("GET", "/health")
+            connection.getresponse().read()
+            connection.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def start_service(
+    port: int, engine: Engine, workers: int, max_pending: int
+) -> subprocess.Popen:
+    # Without the cache every upload is really read
+    return subprocess.Popen(
+        [sys.executable, main_script, "--serve", str(port), "--no-cache"]
+        + ["--engine", engine.value, "--workers", str(workers)]
+        + ["--max-pending", str(max_pending)],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def percentile(values: List[float], percent: int) -> float:
+    if len(values) < 2:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[percent - 1]
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("--url", help="Service to test, started if omitted")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument("--requests", type=int, default=100)
+    arg_parser.add_argument("-c", "--concurrency", type=int, default=8)
+    arg_parser.add_argument("--format", choices=["xlsx", "json"], default="xlsx")
+    arg_parser.add_argument("--pages", type=int, default=4)
+    arg_parser.add_argument("--rows", type=int, default=50, help="rows per page")
+    arg_parser.add_argument(
+        "--engine", type=Engine, choices=list(Engine), default=Engine.PYTHON
+    )
+    arg_parser.add_argument("--workers", type=int, default=2)
+    arg_parser.add_argument("--max-pending", type=int, default=8)
+    args = arg_parser.parse_args()
+
+    pdfs: List[bytes] = []
+    with tempfile.TemporaryDirectory() as directory:
+        for idx, currency in enumerate(Currency):
+            path: str = os.path.join(directory, f"statement-{currency.value}.pdf")
+            statement(path, currency, args.pages, args.rows, idx)
+            with open(path, "rb") as file:
+                pdfs.append(file.read())
+
+    url: str = args.url or f"http://127.0.0.1:{args.port}"
+    service: subprocess.Popen | None = None
+    if not args.url:
+        service = start_service(args.port, args.engine, args.workers, args.max_pending)
+    try:
+        wait_until_up(url)
+        with ThreadPoolExecutor(max_workers=args.concurrency) as clients:
+            start: float = time.perf_counter()
+            results: List[Tuple[int, float]] = list(
+                clients.map(
+                    lambda idx: upload(url, pdfs[idx % len(pdfs)], args.format),
+                    range(args.requests),
+                )
+            )
+            elapsed: float = time.perf_counter() - start
+    finally:
+        if service is not None:
+            service.send_signal(signal.SIGTERM)
+            service.wait()
+
+    latencies: List[float] = [latency for status, latency in results if status == 200]
+    rejected: int = sum(status == 503 for status, _ in results)
+    failed: int = len(results) - len(latencies) - rejected
+    if latencies:
+        print_colored(
+            f"{len(latencies)} uploads converted in {elapsed:.2f}s, "
+            f"{len(latencies) / elapsed:.1f} uploads/s, "
+            f"p50 {percentile(latencies, 50) * 1000:.0f}ms, "
+            f"p99 {percentile(latencies, 99) * 1000:.0f}ms",
+            "light_grey",
+        )
+    print_colored(
+        f"{rejected} turned away with 503, {failed} failed",
+        "light_red" if failed else "light_grey",
+    )
+    if failed or not latencies:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
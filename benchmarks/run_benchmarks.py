@@ -0,0 +1,201 @@
+# Runs the whole pipeline on generated statements and times every stage.
+# Wall and CPU time are the best of --repeat runs, peak memory of a stage
+# is traced with tracemalloc in one extra run so it doesn't skew the timings.
+# Both CPU time and memory only cover this process, not the engine's workers.
+# Results are compared against the baseline committed in
+# benchmarks/baseline.json and the run fails when a stage got slower or needs
+# more memory than the baseline allows, or when there's no baseline to
+# compare with. --update-baseline stores a new one.
+# Usage: python -m benchmarks.run_benchmarks
+#        python -m benchmarks.run_benchmarks --files 4 --pages 20 --update-baseline
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from typing import List, Dict, Any, Callable
+
+from aggregator import Aggregator, Report
+from cli import Settings, Engine
+from reader import PDFReader, Table
+from util import Currency, print_colored
+from writer import XslxWriter
+from .statements import statement
+
+default_baseline: str = os.path.join(os.path.dirname(__file__), "baseline.json")
+stages: List[str] = ["read", "aggregate", "write"]
+
+
+def generate(
+    directory: str, currencies: List[Currency], files: int, pages: int, rows: int
+) -> List[str]:
+    paths: List[str] = []
+    for currency in currencies:
+        for idx in range(files):
+            path: str = os.path.join(directory, f"{currency.value}-{idx + 1}.pdf")
+            statement(path, currency, pages, rows, seed=idx)
+            paths.append(path)
+    return paths
+
+
+def run_stage(function: Callable[[], Any], trace: bool) -> Dict[str, Any]:
+    if trace:
+        tracemalloc.start()
+    start: float = time.perf_counter()
+    start_cpu: float = time.process_time()
+    result: Any = function()
+    metrics: Dict[str, Any] = {
+        "wall": time.perf_counter() - start,
+        "cpu": time.process_time() - start_cpu,
+        "result": result,
+    }
+    if trace:
+        metrics["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return metrics
+
+
+def run_pipeline(settings: Settings, trace: bool) -> Dict[str, Dict[str, Any]]:
+    read = run_stage(lambda: PDFReader(settings).extract_data_from_pdfs(), trace)
+    tables: List[Table] = read["result"]
+    aggregate = run_stage(lambda: Aggregator(settings).generate_reports(tables), trace)
+    reports: List[Report] = aggregate["result"]
+    write = run_stage(lambda: XslxWriter(settings).generate(reports), trace)
+    return {"read": read, "aggregate": aggregate, "write": write}
+
+
+def measure(settings: Settings, repeat: int) -> Dict[str, Dict[str, float]]:
+    results: Dict[str, Dict[str, float]] = {
+        stage: {"wall": float("inf"), "cpu": float("inf")} for stage in stages
+    }
+    for _ in range(repeat):
+        for stage, metrics in run_pipeline(settings, False).items():
+            results[stage]["wall"] = min(results[stage]["wall"], metrics["wall"])
+            results[stage]["cpu"] = min(results[stage]["cpu"], metrics["cpu"])
+    for stage, metrics in run_pipeline(settings, True).items():
+        results[stage]["peak_mb"] = metrics["peak_mb"]
+    return results
+
+
+def regressions(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    time_tolerance: float,
+    memory_tolerance: float,
+    time_slack: float,
+) -> List[str]:
+    failures: List[str] = []
+    for stage in stages:
+        if stage not in baseline:
+            continue
+        # Short stages get time_slack seconds on top, their noise is bigger
+        # than the tolerance
+        for metric, tolerance, slack in [
+            ("wall", time_tolerance, time_slack),
+            ("peak_mb", memory_tolerance, 0),
+        ]:
+            limit: float = baseline[stage][metric] * (1 + tolerance) + slack
+            if results[stage][metric] > limit:
+                failures.append(
+                    f"{stage} {metric}: {results[stage][metric]:.3f} "
+                    f"> {limit:.3f} (baseline {baseline[stage][metric]:.3f})"
+                )
+    return failures
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument(
+        "--currency",
+        nargs="+",
+        type=Currency,
+        choices=list(Currency),
+        default=list(Currency),
+    )
+    arg_parser.add_argument("--files", type=int, default=2, help="files per currency")
+    arg_parser.add_argument("--pages", type=int, default=10)
+    arg_parser.add_argument("--rows", type=int, default=50, help="rows per page")
+    arg_parser.add_argument("-m", "--merge", action="store_true")
+    arg_parser.add_argument(
+        "--engine", type=Engine, choices=list(Engine), default=Engine.PYTHON
+    )
+    arg_parser.add_argument("-r", "--repeat", type=int, default=3)
+    arg_parser.add_argument("--baseline", default=default_baseline)
+    arg_parser.add_argument("--update-baseline", action="store_true")
+    arg_parser.add_argument("--time-tolerance", type=float, default=0.25)
+    arg_parser.add_argument("--memory-tolerance", type=float, default=0.1)
+    arg_parser.add_argument("--time-slack", type=float, default=0.05, help="seconds")
+    args = arg_parser.parse_args()
+
+    workload: Dict[str, Any] = {
+        "currency": [currency.value for currency in args.currency],
+        "files": args.files,
+        "pages": args.pages,
+        "rows": args.rows,
+        "merge": args.merge,
+        "engine": args.engine.value,
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths: List[str] = generate(
+            directory, args.currency, args.files, args.pages, args.rows
+        )
+        output: str = os.path.join(directory, "output")
+        os.makedirs(output)
+        settings: Settings = Settings(
+            args.merge, paths, output, False, engine=args.engine, use_cache=False
+        )
+        results: Dict[str, Dict[str, float]] = measure(settings, args.repeat)
+
+    for stage in stages:
+        print_colored(
+            f"{stage:<10} wall {results[stage]['wall']:8.3f}s  "
+            f"cpu {results[stage]['cpu']:8.3f}s  "
+            f"peak {results[stage]['peak_mb']:8.1f}MB",
+            "light_grey",
+        )
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump({"workload": workload, "stages": results}, file, indent=2)
+            file.write("\n")
+        print_colored(f"Baseline stored in {args.baseline}", "light_green")
+        return
+
+    if not os.path.exists(args.baseline):
+        print_colored(
+            f"No baseline in {args.baseline}, run with --update-baseline "
+            f"to store one",
+            "light_red",
+        )
+        sys.exit(1)
+    with open(args.baseline) as file:
+        stored: Dict[str, Any] = json.load(file)
+
+    if stored["workload"] != workload:
+        print_colored(
+            f"Baseline was measured on a different workload {stored['workload']}, "
+            f"run with --update-baseline to replace it",
+            "light_red",
+        )
+        sys.exit(1)
+
+    failures: List[str] = regressions(
+        results,
+        stored["stages"],
+        args.time_tolerance,
+        args.memory_tolerance,
+        args.time_slack,
+    )
+    for failure in failures:
+        print_colored(f"Regression in {failure}", "light_red")
+    if failures:
+        sys.exit(1)
+    print_colored("No regressions against the baseline", "light_green")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+# Generates synthetic Raiffeisen statements in the layout the reader expects,
+# so the whole pipeline can be measured without real statements.
+# Usage: python -m benchmarks.statements -o ./synthetic --currency RSD EUR USD
+#        python -m benchmarks.statements -o ./synthetic --pages 20 --rows 50
+
+import os
+import random
+from argparse import ArgumentParser
+from datetime import date, timedelta
+from typing import List, Tuple
+
+from util import Currency, print_colored
+
+page_height: float = 842
+font_size: float = 7
+# Average Helvetica glyph width, used to right align the amount columns
+char_width: float = 0.556 * font_size
+row_height: float = 10
+
+# Alignment and anchor x of every column of the transaction table
+columns: List[Tuple[str, float]] = [
+    ("l", 20),
+    ("l", 62),
+    ("l", 104),
+    ("l", 152),
+    ("r", 300),
+    ("l", 310),
+    ("r", 420),
+    ("r", 480),
+    ("r", 560),
+]
+header_rows: List[List[str]] = [
+    [
+        "Datum",
+        "Datum",
+        "Broj",
+        "Opis",
+        "Iznos",
+        "Iznos",
+        "Isplata",
+        "Uplata",
+        "Stanje",
+    ],
+    [
+        "trans.",
+        "knjiz.",
+        "kartice",
+        "transakcije",
+        "strani",
+        "originalni",
+        "din",
+        "din",
+        "din",
+    ],
+]
+
+# Table tops that fall inside the reader's areas of each page
+first_page_top: float = 380
+other_page_top: float = 65
+last_page_top_eur_usd: float = 25
+first_page_rows: int = 28
+max_rows_per_page: int = 58
+
+exchange_rates = {Currency.RSD: 1.0, Currency.EUR: 117.2, Currency.USD: 108.5}
+merchants: List[str] = [
+    "MAXI 123 BEOGRAD",
+    "LIDL 77 NOVI SAD",
+    "WOLT DOO BEOGRAD",
+    "APOTEKA BENU",
+    "GLOVO APP",
+    "NIS PETROL 45",
+    "DM DROGERIE",
+    "YETTEL POSTPAID",
+]
+
+
+def pdf_text(x: float, top: float, text: str) -> str:
+    text = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return (
+        f"BT /F1 {font_size} Tf 1 0 0 1 {x:.2f} {page_height - top:.2f} Tm "
+        f"({text}) Tj ET\n"
+    )
+
+
+def write_pdf(pages: List[str], path: str) -> None:
+    # Minimal PDF with one content stream per page and a Helvetica font
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+        b"/Encoding /WinAnsiEncoding >>",
+    ]
+    kids: List[int] = []
+    for content in pages:
+        data: bytes = content.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(data), data))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 %d] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % (page_height, len(objects))
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids),
+        len(kids),
+    )
+
+    output: bytes = b"%PDF-1.4\n"
+    offsets: List[int] = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref: int = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    with open(path, "wb") as file:
+        file.write(output)
+
+
+def table_row(cells: List[str], top: float) -> str:
+    content: str = ""
+    for (alignment, x), cell in zip(columns, cells):
+        if not cell:
+            continue
+        if alignment == "r":
+            x -= len(cell) * char_width
+        content += pdf_text(x, top, cell)
+    return content
+
+
+def amount(value: float) -> str:
+    return f"{value:,.2f}"
+
+
+def transactions(rows: int, currency: Currency, seed: int = 0) -> List[List[str]]:
+    # Card purchases, ATM withdrawals, salaries, meal allowances and
+    # EB currency operations, each of them followed by its "Kurs:" line
+    rng: random.Random = random.Random(seed)
+    rate: float = exchange_rates[currency]
+    balance: float = 1_000_000 / rate
+    day: date = date(2023, 1, 1)
+    result: List[List[str]] = []
+    while len(result) < rows:
+        day += timedelta(days=rng.random() < 0.3)
+        transaction_date: str = day.strftime("%d.%m.%Y")
+        kind: float = rng.random()
+        if kind < 0.08:
+            value: float = round(rng.uniform(1000, 20000) / rate, 2)
+            balance += value
+            description: str = rng.choice(["ZARADA FIRMA DOO", "Prevoz i topli obrok"])
+            result.append(
+                [transaction_date, transaction_date, "", description, "", ""]
+                + ["0.00", amount(value), amount(balance)]
+            )
+        elif kind < 0.16 and len(result) < rows - 1:
+            other: Currency = rng.choice([c for c in Currency if c is not currency])
+            bought: float = rng.choice([50.0, 100.0, 200.0])
+            value: float = round(bought * exchange_rates[other] / rate, 2)
+            balance -= value
+            result.append(
+                [transaction_date, transaction_date, "", "EB KUPOVINA DEVIZA", ""]
+                + [f"{bought:.2f} {other.value}", amount(value), "0.00"]
+                + [amount(balance)]
+            )
+            kurs: float = exchange_rates[other] / rate
+            result.append(["", "", "", "", "", f"Kurs: {kurs:.4f}", "", "", ""])
+        elif kind < 0.24:
+            value: float = round(rng.choice([2000.0, 5000.0, 10000.0]) / rate, 2)
+            balance -= value
+            result.append(
+                [transaction_date, transaction_date, "4242****1234"]
+                + ["RAIF ATM 0042 BEOGRAD", "", "", amount(value), "0.00"]
+                + [amount(balance)]
+            )
+        else:
+            value: float = round(rng.uniform(100, 5000) / rate, 2)
+            balance -= value
+            # Pending card transactions have no completion date yet
+            completion_date: str = "" if rng.random() < 0.05 else transaction_date
+            foreign: str = f"{value / 10:.2f}" if rng.random() < 0.05 else ""
+            result.append(
+                [transaction_date, completion_date, "4242****1234"]
+                + [rng.choice(merchants), foreign, "", amount(value), "0.00"]
+                + [amount(balance)]
+            )
+    return result
+
+
+def statement(
+    path: str,
+    currency: Currency = Currency.RSD,
+    pages: int = 3,
+    rows_per_page: int = 40,
+    seed: int = 0,
+) -> int:
+    # Writes a statement and returns the number of table rows in it
+    if not 1 <= rows_per_page <= max_rows_per_page:
+        raise ValueError(f"rows_per_page must be between 1 and {max_rows_per_page}")
+
+    rows_on_page: List[int] = [min(rows_per_page, first_page_rows)] + [
+        rows_per_page
+    ] * (pages - 1)
+    rows: List[List[str]] = transactions(sum(rows_on_page), currency, seed)
+
+    contents: List[str] = []
+    start: int = 0
+    for page, count in enumerate(rows_on_page, 1):
+        content: str = ""
+        if page == 1:
+            content += pdf_text(20, 40, "Raiffeisen banka a.d. Beograd")
+            content += pdf_text(20, 60, f"Strana: {currency.value} izvod")
+            content += pdf_text(20, 80, "Tekuci racun 265-0000000000000-00")
+            top: float = first_page_top
+        elif page == pages and currency is not Currency.RSD:
+            top: float = last_page_top_eur_usd
+        else:
+            top: float = other_page_top
+
+        for header_row in header_rows:
+            content += table_row(header_row, top)
+            top += row_height - 1
+        top += 2
+        # A currency operation keeps its "Kurs:" line on the same page
+        end: int = start + count
+        if end < len(rows) and rows[end][5].startswith("Kurs:"):
+            end += 1
+        for row in rows[start:end]:
+            content += table_row(row, top)
+            top += row_height
+        start = end
+        contents.append(content)
+
+    write_pdf(contents, path)
+    return start
+
+
+def main():
+    arg_parser: ArgumentParser = ArgumentParser()
+    arg_parser.add_argument("-o", "--output", required=True)
+    arg_parser.add_argument(
+        "--currency",
+        nargs="+",
+        type=Currency,
+        choices=list(Currency),
+        default=list(Currency),
+    )
+    arg_parser.add_argument("--files", type=int, default=1, help="files per currency")
+    arg_parser.add_argument("--pages", type=int, default=3)
+    arg_parser.add_argument("--rows", type=int, default=40, help="rows per page")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    args = arg_parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    for currency in args.currency:
+        for idx in range(args.files):
+            path: str = os.path.join(
+                args.output, f"statement-{currency.value}-{idx + 1}.pdf"
+            )
+            rows: int = statement(
+                path, currency, args.pages, args.rows, args.seed + idx
+            )
+            print_colored(f"{path}: {args.pages} pages, {rows} rows", "light_grey")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,10 @@
 from .cli import CLI
-from .settings import Settings
+from .settings import (
+    Settings,
+    ExtractionMode,
+    Engine,
+    ShardPeriod,
+    OutputFormat,
+    Stage,
+    Profiler,
+)
@@ -1,20 +1,77 @@
 import os
-from argparse import ArgumentParser, Namespace
+from argparse import ArgumentParser, ArgumentTypeError, Namespace
+from datetime import datetime
 from typing import List
-from termcolor import colored
-from .settings import Settings
+from .settings import (
+    Settings,
+    ExtractionMode,
+    Engine,
+    ShardPeriod,
+    OutputFormat,
+    Stage,
+    Profiler,
+    default_cache_dir,
+    default_memory_budget,
+)
+
+
+def to_date(value: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%d.%m.%Y")
+    except ValueError:
+        raise ArgumentTypeError(f"{value} is not a date like 31.01.2023")
 
 
 class CLI:
     def __init__(self):
         arg_parser: ArgumentParser = ArgumentParser()
-        arg_parser.add_argument(
+        inputs = arg_parser.add_mutually_exclusive_group()
+        inputs.add_argument(
             "-f",
             "--files",
             nargs="+",
-            required=True,
+            default=[],
             help="Path to your Raiffeisen bank payslip PDF file",
         )
+        inputs.add_argument(
+            "--watch",
+            metavar="DIR",
+            help="Keep running and write the reports of every PDF that is added "
+            "to or changed in this folder",
+            default=None,
+        )
+        inputs.add_argument(
+            "--serve",
+            metavar="PORT",
+            help="Run an HTTP service on this port that converts uploaded PDFs "
+            "into .xlsx reports or JSON statistics",
+            type=int,
+            default=None,
+        )
+        arg_parser.add_argument(
+            "--ledger",
+            metavar="DB",
+            help="Add the transactions of the statements to this SQLite ledger, "
+            "leaving out those it already holds, and write the reports "
+            "from the ledger",
+            default=None,
+        )
+        arg_parser.add_argument(
+            "--from",
+            dest="date_from",
+            metavar="DD.MM.YYYY",
+            help="First day of the reports made from the --ledger",
+            type=to_date,
+            default=None,
+        )
+        arg_parser.add_argument(
+            "--to",
+            dest="date_to",
+            metavar="DD.MM.YYYY",
+            help="Last day of the reports made from the --ledger",
+            type=to_date,
+            default=None,
+        )
         arg_parser.add_argument(
             "-m",
             "--merge",
@@ -22,6 +79,13 @@ class CLI:
             default=False,
             action="store_true",
         )
+        arg_parser.add_argument(
+            "--dedup",
+            help="With -m, leave out the transactions that an earlier statement "
+            "of the merge already holds, for overlapping statements",
+            default=False,
+            action="store_true",
+        )
         arg_parser.add_argument(
             "-o", "--output-dir", help="Output directory", default="./"
         )
@@ -32,6 +96,134 @@ class CLI:
             default=False,
             action="store_true",
         )
+        arg_parser.add_argument(
+            "-e",
+            "--extraction-mode",
+            help="per-page: one tabula call per page, "
+            "batched: all pages of a file in one tabula call",
+            choices=[mode.value for mode in ExtractionMode],
+            default=ExtractionMode.PER_PAGE.value,
+        )
+        arg_parser.add_argument(
+            "--engine",
+            help="tabula: extract tables with tabula-java, "
+            "python: rebuild tables from PDF text without Java",
+            choices=[engine.value for engine in Engine],
+            default=Engine.TABULA.value,
+        )
+        arg_parser.add_argument(
+            "--no-cache",
+            help="Parse every PDF again instead of using the cache of parsed tables",
+            default=False,
+            action="store_true",
+        )
+        arg_parser.add_argument(
+            "--clear-cache",
+            help="Remove all cached tables before reading the PDFs",
+            default=False,
+            action="store_true",
+        )
+        arg_parser.add_argument(
+            "--cache-dir", help="Cache directory", default=default_cache_dir()
+        )
+        arg_parser.add_argument(
+            "--cache-size",
+            help="Maximum cache size in megabytes",
+            type=int,
+            default=512,
+        )
+        arg_parser.add_argument(
+            "--memory-budget",
+            help="Memory in megabytes that concurrent PDF extraction may use, "
+            "half of the physical memory by default",
+            type=int,
+            default=default_memory_budget() // (1024 * 1024),
+        )
+        arg_parser.add_argument(
+            "--streaming",
+            help="Write workbooks row by row with constant memory use",
+            default=False,
+            action="store_true",
+        )
+        arg_parser.add_argument(
+            "--width-sample",
+            help="Estimate column widths of tables longer than this many rows "
+            "from a random sample of that many rows, 0 measures every row",
+            type=int,
+            default=0,
+        )
+        arg_parser.add_argument(
+            "-j",
+            "--jobs",
+            help="Number of processes writing the .xlsx files of separate reports",
+            type=int,
+            default=1,
+        )
+        arg_parser.add_argument(
+            "--shard-rows",
+            help="Put the transactions of reports longer than this many rows "
+            "on several sheets, linked from a summary sheet",
+            type=int,
+            default=0,
+        )
+        arg_parser.add_argument(
+            "--shard-by",
+            help="Put the transactions of every month, quarter or year "
+            "on a sheet of its own, linked from a summary sheet",
+            choices=[period.value for period in ShardPeriod],
+            default=None,
+        )
+        arg_parser.add_argument(
+            "--format",
+            help="Output formats, parquet, feather and csv hold the transactions "
+            "and come with a .json file of the report statistics",
+            nargs="+",
+            choices=[output_format.value for output_format in OutputFormat],
+            default=[OutputFormat.XLSX.value],
+        )
+        arg_parser.add_argument(
+            "--metrics",
+            help="Write wall time, CPU time and peak memory of every stage, "
+            "file and page to this JSON file",
+            default=None,
+        )
+        arg_parser.add_argument(
+            "--profile",
+            help="Profile one stage of the main process, the profile goes into "
+            "the --metrics file or to the console",
+            choices=[stage.value for stage in Stage],
+            default=None,
+        )
+        arg_parser.add_argument(
+            "--profiler",
+            help="cprofile: where the time goes, tracemalloc: where memory goes",
+            choices=[profiler.value for profiler in Profiler],
+            default=Profiler.CPROFILE.value,
+        )
+        arg_parser.add_argument(
+            "--poll-interval",
+            help="Seconds between two looks into the --watch folder",
+            type=float,
+            default=1.0,
+        )
+        arg_parser.add_argument(
+            "--host",
+            help="Address the --serve service listens on",
+            default="127.0.0.1",
+        )
+        arg_parser.add_argument(
+            "--workers",
+            help="Number of uploads the --serve service converts at the same time",
+            type=int,
+            default=2,
+        )
+        arg_parser.add_argument(
+            "--max-pending",
+            help="Number of uploads the --serve service lets wait for a worker, "
+            "more are turned away with 503",
+            type=int,
+            default=8,
+        )
         self.args_parser = arg_parser
 
     def get_settings(self) -> Settings:
@@ -42,8 +234,23 @@ class CLI:
             args.output_dir if args.output_dir[-1] != "/" else args.output_dir[:-1]
         )
 
+        if not (args.files or args.watch or args.serve is not None or args.ledger):
+            self.args_parser.error(
+                "one of the arguments -f/--files --watch --serve --ledger is required"
+            )
+        if args.ledger and (args.watch or args.serve is not None):
+            self.args_parser.error("--ledger can't be used with --watch or --serve")
+        if (args.date_from or args.date_to) and not args.ledger:
+            self.args_parser.error("--from and --to need a --ledger")
+        if args.dedup and not args.merge:
+            self.args_parser.error("--dedup needs -m")
+        if args.watch and not os.path.isdir(args.watch):
+            self.args_parser.error(f"folder {args.watch} does not exist")
+
         for file in files:
             if not (os.path.exists(file) and os.path.isfile(file)):
+                from termcolor import colored
+
                 print(
                     colored(f"It seems like file {file} does not exist!", "light_red")
                 )
@@ -55,4 +262,35 @@ class CLI:
             else:
                 files_to_process.append(file)
 
-        return Settings(args.merge, files_to_process, out_dir, args.single_file)
+        return Settings(
+            args.merge,
+            files_to_process,
+            out_dir,
+            args.single_file,
+            ExtractionMode(args.extraction_mode),
+            Engine(args.engine),
+            not args.no_cache,
+            args.clear_cache,
+            args.cache_dir,
+            args.cache_size * 1024 * 1024,
+            args.memory_budget * 1024 * 1024,
+            args.streaming,
+            args.width_sample,
+            args.jobs,
+            args.shard_rows,
+            ShardPeriod(args.shard_by) if args.shard_by else None,
+            [OutputFormat(output_format) for output_format in args.format],
+            args.metrics,
+            Stage(args.profile) if args.profile else None,
+            Profiler(args.profiler),
+            args.watch,
+            args.poll_interval,
+            args.serve,
+            args.host,
+            args.workers,
+            args.max_pending,
+            args.ledger,
+            args.date_from,
+            args.date_to,
+            args.dedup,
+        )
@@ -1,10 +1,93 @@
-from dataclasses import dataclass
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
 from typing import List
 
 
+def default_cache_dir() -> str:
+    cache_home: str = os.environ.get(
+        "XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")
+    )
+    return os.path.join(cache_home, "raif-to-xls")
+
+
+def default_memory_budget() -> int:
+    # Half of the physical memory
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2
+    except (ValueError, OSError, AttributeError):
+        return 2048 * 1024 * 1024
+
+
+class ExtractionMode(Enum):
+    PER_PAGE = "per-page"
+    BATCHED = "batched"
+
+
+class Engine(Enum):
+    TABULA = "tabula"
+    PYTHON = "python"
+
+
+class ShardPeriod(Enum):
+    MONTH = "month"
+    QUARTER = "quarter"
+    YEAR = "year"
+
+
+class OutputFormat(Enum):
+    XLSX = "xlsx"
+    PARQUET = "parquet"
+    FEATHER = "feather"
+    CSV = "csv"
+
+
+class Stage(Enum):
+    EXTRACT = "extract"
+    PREPROCESS = "preprocess"
+    AGGREGATE = "aggregate"
+    WRITE = "write"
+
+
+class Profiler(Enum):
+    CPROFILE = "cprofile"
+    TRACEMALLOC = "tracemalloc"
+
+
 @dataclass
 class Settings:
     merge: bool
     files: List[str]
     output: str
     single_file: bool
+    extraction_mode: ExtractionMode = ExtractionMode.PER_PAGE
+    engine: Engine = Engine.TABULA
+    use_cache: bool = True
+    clear_cache: bool = False
+    cache_dir: str = field(default_factory=default_cache_dir)
+    cache_size: int = 512 * 1024 * 1024
+    memory_budget: int = field(default_factory=default_memory_budget)
+    streaming: bool = False
+    width_sample: int = 0
+    jobs: int = 1
+    shard_rows: int = 0
+    shard_period: ShardPeriod | None = None
+    formats: List[OutputFormat] = field(default_factory=lambda: [OutputFormat.XLSX])
+    metrics: str | None = None
+    profile_stage: Stage | None = None
+    profiler: Profiler = Profiler.CPROFILE
+    # Folder to keep watching for new or changed statements
+    watch: str | None = None
+    poll_interval: float = 1.0
+    # Port of the HTTP conversion service
+    serve: int | None = None
+    host: str = "127.0.0.1"
+    workers: int = 2
+    max_pending: int = 8
+    # SQLite ledger the statements are added to and reports are made from
+    ledger: str | None = None
+    date_from: datetime | None = None
+    date_to: datetime | None = None
+    # Merge without the transactions an earlier statement already holds
+    dedup: bool = False
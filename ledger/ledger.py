@@ -0,0 +1,166 @@
+import sqlite3
+from datetime import datetime
+from typing import List, Any
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from reader import Table
+from reader.fingerprint import row_fingerprints
+from reader.schema import apply_schema, table_schema, foreign_text_column
+from util import Currency
+
+# Ledger columns of the Table columns, in the order of table_schema
+ledger_columns: List[str] = [
+    "transaction_date",
+    "completion_date",
+    "card_number",
+    "description",
+    "amount_foreign",
+    "amount_foreign_text",
+    "amount_original",
+    "exchange_rate",
+    "expense",
+    "income",
+    "balance",
+]
+
+schema: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS transactions (
+        id INTEGER PRIMARY KEY,
+        currency TEXT NOT NULL,
+        fingerprint INTEGER NOT NULL,
+        transaction_date TEXT,
+        completion_date TEXT,
+        card_number TEXT,
+        description TEXT,
+        amount_foreign REAL,
+        amount_foreign_text TEXT,
+        amount_original TEXT,
+        exchange_rate REAL,
+        expense REAL,
+        income REAL,
+        balance REAL
+    )
+    """,
+    # Overlapping statements hold the same rows, they are stored once
+    "CREATE UNIQUE INDEX IF NOT EXISTS transactions_fingerprint "
+    "ON transactions (currency, fingerprint)",
+    # Reports of a date range only read the rows of that range
+    "CREATE INDEX IF NOT EXISTS transactions_date "
+    "ON transactions (currency, transaction_date)",
+    "CREATE INDEX IF NOT EXISTS transactions_description "
+    "ON transactions (description)",
+]
+
+
+class Ledger:
+    # SQLite store of every transaction read so far. Statements only add
+    # the rows that aren't in it yet, and the Table of a currency and date
+    # range is read through the (currency, transaction_date) index, so it
+    # takes time in proportion to the rows in the range, not to the ledger.
+    def __init__(self, path: str):
+        self.path = path
+        self.connection: sqlite3.Connection = sqlite3.connect(path)
+        with self.connection:
+            for statement in schema:
+                self.connection.execute(statement)
+
+    def __enter__(self) -> "Ledger":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def append(self, table: Table) -> int:
+        # Returns the number of rows that weren't in the ledger yet
+        df: DataFrame = table.dataframe
+        fingerprints: np.ndarray = row_fingerprints(df).view(np.int64)
+        columns: List[List[Any]] = [
+            dates(df["Transaction date"]),
+            dates(df["Completion date"]),
+            texts(df["Card number"]),
+            texts(df["Transaction description"]),
+            numbers(df["Amount in foreign currency"]),
+            texts(df[foreign_text_column]),
+            texts(df["Amount in original currency"]),
+        ] + [
+            numbers(df[column])
+            for column in ["Exchange rate", "Expense", "Income", "Balance"]
+        ]
+        rows = zip([table.currency.value] * len(df), fingerprints.tolist(), *columns)
+
+        changes: int = self.connection.total_changes
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR IGNORE INTO transactions "
+                f"(currency, fingerprint, {', '.join(ledger_columns)}) "
+                f"VALUES ({', '.join(['?'] * (len(ledger_columns) + 2))})",
+                rows,
+            )
+        return self.connection.total_changes - changes
+
+    def table(
+        self,
+        currency: Currency,
+        date_from: datetime | None = None,
+        date_to: datetime | None = None,
+    ) -> Table:
+        # Transactions of the currency from date_from to date_to, both included.
+        # Without a range, transactions without a date are read as well.
+        conditions: List[str] = ["currency = ?"]
+        params: List[str] = [currency.value]
+        if date_from:
+            conditions.append("transaction_date >= ?")
+            params.append(date_from.strftime("%Y-%m-%d"))
+        if date_to:
+            conditions.append("transaction_date <= ?")
+            params.append(date_to.strftime("%Y-%m-%d"))
+        dataframe: DataFrame = pd.read_sql_query(
+            f"SELECT {', '.join(ledger_columns)} FROM transactions "
+            f"WHERE {' AND '.join(conditions)} "
+            f"ORDER BY transaction_date, id",
+            self.connection,
+            params=params,
+        )
+        dataframe.columns = list(table_schema)
+        for column in ["Transaction date", "Completion date"]:
+            dataframe[column] = pd.to_datetime(dataframe[column], format="%Y-%m-%d")
+        for column in [
+            "Amount in foreign currency",
+            "Exchange rate",
+            "Expense",
+            "Income",
+            "Balance",
+        ]:
+            dataframe[column] = dataframe[column].astype("float64")
+        return Table(apply_schema(dataframe), currency)
+
+    def tables(
+        self, date_from: datetime | None = None, date_to: datetime | None = None
+    ) -> List[Table]:
+        # One table for every currency with transactions in the range
+        tables: List[Table] = [
+            self.table(currency, date_from, date_to) for currency in Currency
+        ]
+        return [table for table in tables if not table.dataframe.empty]
+
+
+def dates(column: pd.Series) -> List[str | None]:
+    return [
+        None if pd.isna(date) else date
+        for date in column.dt.strftime("%Y-%m-%d").tolist()
+    ]
+
+
+def texts(column: pd.Series) -> List[str | None]:
+    return [None if pd.isna(text) else str(text) for text in column.tolist()]
+
+
+def numbers(column: pd.Series) -> List[float | None]:
+    return [None if np.isnan(number) else number for number in column.tolist()]
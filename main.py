@@ -1,22 +1,97 @@
 # Developed with pleasure in PyCharm IDE
 
-from typing import List
-from util import print_colored
-from cli import CLI, Settings
-from aggregator import Aggregator, Report
-from reader import Table, PDFReader
-from writer import XslxWriter
+from typing import List, Dict
+from cli import CLI, Settings, OutputFormat, Stage
 
 
 def main():
     settings: Settings = CLI().get_settings()
-    pdf_reader: PDFReader = PDFReader(settings)
 
-    tables: List[Table] = pdf_reader.extract_data_from_pdfs()
-    reports: List[Report] = Aggregator().generate_reports(tables)
+    # The stages are only imported once the arguments are fine,
+    # -h and typos don't have to wait for pandas
+    from util import print_colored, Metrics
+    from reader import PDFReader
+    from writer import ReportWriter
 
-    writer: XslxWriter = XslxWriter(settings)
-    writer.generate_xlsx(reports)
+    metrics: Metrics = Metrics(
+        settings.metrics,
+        settings.profile_stage.value if settings.profile_stage else None,
+        settings.profiler.value,
+    )
+    # The service reads all uploads with one reader of its own
+    if settings.serve is not None:
+        from server import ConversionService
+
+        ConversionService(settings, metrics).run()
+        metrics.write()
+        return
+
+    pdf_reader: PDFReader = PDFReader(settings, metrics)
+
+    # All writers share the same in-memory reports
+    writers: List[ReportWriter] = []
+    if OutputFormat.XLSX in settings.formats:
+        from writer import XslxWriter
+
+        writers.append(XslxWriter(settings))
+    if any(format is not OutputFormat.XLSX for format in settings.formats):
+        from writer import ColumnarWriter
+
+        writers.append(ColumnarWriter(settings))
+
+    # Separate reports are written as soon as their statements are read,
+    # unless they go into one workbook, are written on several processes
+    # or a stage is profiled
+    if settings.watch:
+        from pipeline import Watcher
+
+        Watcher(settings, metrics, pdf_reader, writers).run()
+    elif settings.ledger:
+        from aggregator import Aggregator, Report
+        from ledger import Ledger
+        from reader import Table
+
+        with Ledger(settings.ledger) as ledger:
+            statements: Dict[str, Table] = pdf_reader.read_tables(settings.files)
+            with metrics.stage("ledger"):
+                for path, table in statements.items():
+                    added: int = ledger.append(table)
+                    print_colored(
+                        f"{path}: {added} of {len(table.dataframe)} transactions "
+                        f"added to the ledger",
+                        "light_grey",
+                    )
+                # One report per currency over the range
+                tables: List[Table] = ledger.tables(
+                    settings.date_from, settings.date_to
+                )
+        if not tables:
+            print_colored("The ledger holds no transactions of that period", "light_red")
+        with metrics.stage(Stage.AGGREGATE.value):
+            reports: List[Report] = Aggregator(settings).generate_reports(tables)
+        with metrics.stage(Stage.WRITE.value):
+            for writer in writers:
+                writer.generate(reports)
+    elif not (
+        settings.merge
+        or settings.single_file
+        or settings.jobs > 1
+        or settings.profile_stage
+    ):
+        from pipeline import Pipeline
+
+        Pipeline(settings, metrics, pdf_reader, writers).run()
+    else:
+        from aggregator import Aggregator, Report
+        from reader import Table
+
+        tables: List[Table] = pdf_reader.extract_data_from_pdfs()
+        with metrics.stage(Stage.AGGREGATE.value):
+            reports: List[Report] = Aggregator(settings).generate_reports(tables)
+        with metrics.stage(Stage.WRITE.value):
+            for writer in writers:
+                writer.generate(reports)
+    metrics.write()
     print_colored("Done!", "green")
 
 if __name__ == "__main__":
@@ -0,0 +1,11 @@
+from importlib import import_module
+from typing import Any, Dict
+
+# Names are imported from their modules on first use (PEP 562)
+exports: Dict[str, str] = {"Pipeline": ".pipeline", "Watcher": ".watcher"}
+
+
+def __getattr__(name: str) -> Any:
+    if name in exports:
+        return getattr(import_module(exports[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,101 @@
+import time
+from queue import Queue
+from threading import Thread
+from typing import List, Iterable, Callable, Any
+
+from tqdm import tqdm
+
+from aggregator import Aggregator, Report
+from cli import Settings, Stage
+from reader import PDFReader, Table
+from util import Metrics, measure, peak_rss_mb, print_colored
+from writer import ReportWriter
+
+# Marks the end of a stage's output
+done: object = object()
+
+
+class Pipeline:
+    # Reads, aggregates and writes statements one by one without merging.
+    # Stages run on their own threads and hand their results over bounded
+    # queues, so every report is written as soon as its statement is read
+    # and released right after, and a slow stage holds back the ones
+    # before it instead of piling up their results.
+    queue_size: int = 2
+
+    def __init__(
+        self,
+        settings: Settings,
+        metrics: Metrics,
+        pdf_reader: PDFReader,
+        writers: List[ReportWriter],
+    ):
+        self.settings = settings
+        self.metrics = metrics
+        self.pdf_reader = pdf_reader
+        self.aggregator: Aggregator = Aggregator(settings)
+        self.writers = writers
+        self.errors: List[BaseException] = []
+
+    def run(self) -> None:
+        start: float = time.perf_counter()
+        tables: Queue = Queue(maxsize=self.queue_size)
+        reports: Queue = Queue(maxsize=self.queue_size)
+        threads: List[Thread] = [
+            Thread(
+                target=self.stage,
+                args=(self.pdf_reader.iter_tables(), lambda table: table, tables),
+                daemon=True,
+            ),
+            Thread(
+                target=self.stage,
+                args=(iter(tables.get, done), self.aggregate, reports),
+                daemon=True,
+            ),
+        ]
+        for thread in threads:
+            thread.start()
+
+        progress = tqdm(colour="green", desc="Writing reports: ", unit="report")
+        first_output: float | None = None
+        for report in iter(reports.get, done):
+            with measure(memory=False) as usage:
+                for writer in self.writers:
+                    writer.write_file(report)
+            self.metrics.add_stage(Stage.WRITE.value, usage)
+            if first_output is None:
+                first_output = time.perf_counter() - start
+                self.metrics.first_output = first_output
+            progress.update(1)
+        progress.set_description("Writing reports complete!")
+        progress.close()
+
+        # A failed stage leaves the ones before it blocked on a full queue
+        if self.errors:
+            raise self.errors[0]
+        for thread in threads:
+            thread.join()
+
+        if first_output is not None:
+            print_colored(
+                f"First report written after {first_output:.2f}s, "
+                f"peak RSS {peak_rss_mb():.0f}MB",
+                "light_grey",
+            )
+
+    def aggregate(self, table: Table) -> Report:
+        with measure(memory=False, cpu_clock=time.thread_time) as usage:
+            report: Report = self.aggregator.generate_report(table)
+        self.metrics.add_stage(Stage.AGGREGATE.value, usage)
+        return report
+
+    def stage(
+        self, items: Iterable[Any], function: Callable[[Any], Any], output: Queue
+    ) -> None:
+        try:
+            for item in items:
+                output.put(function(item))
+        except BaseException as e:
+            self.errors.append(e)
+        finally:
+            output.put(done)
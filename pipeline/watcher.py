@@ -0,0 +1,226 @@
+import os
+import signal
+import time
+from dataclasses import dataclass
+from threading import Event, current_thread, main_thread
+from typing import List, Dict, Set, Tuple
+
+from aggregator import Aggregator, Report
+from cli import Settings, Stage
+from reader import PDFReader, Table
+from util import Currency, Metrics, print_colored
+from writer import ReportWriter
+
+
+@dataclass
+class WatchedFile:
+    # Size and modification time of the file
+    signature: Tuple[int, int]
+    # When the watcher first saw this version of the file
+    seen: float
+    read: bool = False
+
+
+class Watcher:
+    # Looks into the watched folder every poll_interval seconds and writes
+    # the reports of new or changed statements. The reader with its engine
+    # (and tabula's JVM) and the tables of all statements stay in memory,
+    # so only the changed statements are read and only the reports they
+    # end up in are written again. A statement is read once its size and
+    # modification time are the same on two looks, half copied files
+    # are left alone. Reports of removed statements are written again
+    # without them, or removed with the last one of their output.
+    def __init__(
+        self,
+        settings: Settings,
+        metrics: Metrics,
+        pdf_reader: PDFReader,
+        writers: List[ReportWriter],
+    ):
+        self.settings = settings
+        self.metrics = metrics
+        self.pdf_reader = pdf_reader
+        self.aggregator: Aggregator = Aggregator(settings)
+        self.writers = writers
+        self.files: Dict[str, WatchedFile] = {}
+        self.tables: Dict[str, Table] = {}
+        # Separate reports, kept while they share workbooks (-s)
+        self.reports: Dict[str, Report] = {}
+        # Files written for every output, see report_groups
+        self.outputs: Dict[str, List[str]] = {}
+        # Seconds from a statement showing up to its reports being written
+        self.latencies: Dict[str, float] = {}
+        self.stopped: Event = Event()
+
+    def run(self) -> None:
+        print_colored(
+            f"Watching {self.settings.watch} for statements, press Ctrl+C to stop",
+            "light_grey",
+        )
+        # Stopped by a service manager like by Ctrl+C
+        if current_thread() is main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self.stop())
+        try:
+            while not self.stopped.is_set():
+                try:
+                    self.poll()
+                except Exception as e:
+                    # The statements of a failed round are read again next time
+                    print_colored(f"Failed to write the reports\n{e}", "light_red")
+                self.stopped.wait(self.settings.poll_interval)
+        except KeyboardInterrupt:
+            pass
+
+    def stop(self) -> None:
+        self.stopped.set()
+
+    def poll(self) -> List[str]:
+        # Writes the reports of the statements that are ready since the last
+        # look and returns the paths of the ones that could be read. What the
+        # watcher knows of the statements only changes once the reports are
+        # written, a failed round is done again on the next look.
+        ready, removed = self.scan()
+        if not ready and not removed:
+            return []
+        gone: List[str] = ready + removed
+        currencies: Set[Currency] = {
+            self.tables[path].currency for path in gone if path in self.tables
+        }
+        tables: Dict[str, Table] = self.pdf_reader.read_tables(ready) if ready else {}
+        currencies.update(table.currency for table in tables.values())
+
+        statements: Dict[str, Table] = {
+            path: table for path, table in self.tables.items() if path not in gone
+        }
+        statements.update(tables)
+        with self.metrics.stage(Stage.AGGREGATE.value):
+            reports: Dict[str, Report] = {}
+            if not self.settings.merge:
+                reports = {
+                    path: self.aggregator.generate_report(table)
+                    for path, table in tables.items()
+                }
+            groups: Dict[str, List[Report]] = self.report_groups(
+                statements, reports, gone, currencies
+            )
+        if any(groups.values()):
+            with self.metrics.stage(Stage.WRITE.value):
+                for writer in self.writers:
+                    writer.generate(sum(groups.values(), []))
+        self.remove_stale_outputs(groups)
+
+        self.tables = statements
+        if self.settings.single_file:
+            for path in gone:
+                self.reports.pop(path, None)
+            self.reports.update(reports)
+        for path in removed:
+            del self.files[path]
+        written: float = time.perf_counter()
+        for path in ready:
+            self.files[path].read = True
+        for path in tables:
+            latency: float = written - self.files[path].seen
+            self.latencies[path] = latency
+            self.metrics.add_file(path, "latency", latency)
+            print_colored(
+                f"Reports of {path} written {latency:.2f}s after it showed up",
+                "light_grey",
+            )
+        return list(tables)
+
+    def scan(self) -> Tuple[List[str], List[str]]:
+        # Paths of the statements to read and of the removed ones
+        now: float = time.perf_counter()
+        found: Dict[str, Tuple[int, int]] = {}
+        with os.scandir(self.settings.watch) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith(".pdf"):
+                    stat: os.stat_result = entry.stat()
+                    found[entry.path] = (stat.st_size, stat.st_mtime_ns)
+
+        removed: List[str] = [path for path in self.files if path not in found]
+
+        ready: List[str] = []
+        for path, signature in sorted(found.items()):
+            file: WatchedFile | None = self.files.get(path)
+            if file is None or file.signature != signature:
+                self.files[path] = WatchedFile(signature, now)
+            elif not file.read:
+                # Marked as read once its reports are written
+                ready.append(path)
+        return ready, removed
+
+    def report_groups(
+        self,
+        statements: Dict[str, Table],
+        reports: Dict[str, Report],
+        gone: List[str],
+        currencies: Set[Currency],
+    ) -> Dict[str, List[Report]]:
+        # Reports to write by the output they go into: the merged report or
+        # the workbook (-s) of a currency, or the report of a statement.
+        # Outputs whose statements are all gone get no reports.
+        if self.settings.merge:
+            # Statements of the other currencies keep their merged reports
+            groups: Dict[str, List[Report]] = {}
+            for currency in currencies:
+                paths: List[str] = [
+                    path
+                    for path in sorted(statements)
+                    if statements[path].currency is currency
+                ]
+                merged: List[Table] = self.pdf_reader.merge_tables(
+                    [statements[path] for path in paths], paths
+                )
+                groups[currency.value] = [
+                    self.aggregator.generate_report(table) for table in merged
+                ]
+            return groups
+
+        if self.settings.single_file:
+            # A workbook holds all reports of its currency
+            kept: Dict[str, Report] = {
+                path: report
+                for path, report in self.reports.items()
+                if path not in gone
+            }
+            kept.update(reports)
+            return {
+                currency.value: [
+                    kept[path]
+                    for path in sorted(kept)
+                    if kept[path].currency is currency
+                ]
+                for currency in currencies
+            }
+
+        groups: Dict[str, List[Report]] = {path: [] for path in gone}
+        groups.update((path, [report]) for path, report in reports.items())
+        return groups
+
+    def remove_stale_outputs(self, groups: Dict[str, List[Report]]) -> None:
+        # Files that the outputs wrote before and don't write any more, e.g.
+        # a merged report whose period changed or the report of a removed
+        # statement. Files written before the watcher started are left alone.
+        stale: Set[str] = set()
+        for key, reports in groups.items():
+            stale.update(self.outputs.pop(key, []))
+            file_names: List[str] = [
+                file_name
+                for writer in self.writers
+                for file_name in writer.file_names(reports)
+            ]
+            if file_names:
+                self.outputs[key] = file_names
+        written: Set[str] = {
+            file_name
+            for file_names in self.outputs.values()
+            for file_name in file_names
+        }
+        for file_name in sorted(stale - written):
+            try:
+                os.remove(file_name)
+            except FileNotFoundError:
+                continue
+            print_colored(f"Removed {file_name}", "light_grey")
@@ -1 +1,15 @@
-from .pdfreader import PDFReader, Table
+from importlib import import_module
+from typing import Any, Dict
+
+# Names are imported from their modules on first use (PEP 562),
+# so importing the package doesn't load pandas or the PDF libraries
+exports: Dict[str, str] = {
+    "PDFReader": ".pdfreader",
+    "Table": ".pdfreader",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in exports:
+        return getattr(import_module(exports[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import threading
+from typing import List, Dict, Any, Tuple
+
+import pyarrow as pa
+from pyarrow import feather
+from pandas import DataFrame
+
+from util import Currency
+from .schema import apply_schema
+
+# Bump whenever extraction or preprocessing changes what ends up in a Table
+EXTRACTOR_VERSION: str = "5"
+
+# Entries of the cache directory: tables and the aggregator's partial
+# aggregates. Together they stay within one max_size.
+entry_suffixes: List[str] = [".feather", ".partial"]
+
+
+class TableCache:
+    # Content-addressed store of preprocessed tables.
+    # Entries are evicted least recently used first once the cache
+    # grows over max_size bytes, every hit refreshes the entry's mtime.
+    suffix: str = ".feather"
+
+    def __init__(self, directory: str, max_size: int, extractor: Dict[str, Any]):
+        self.directory = directory
+        self.max_size = max_size
+        self.extractor: str = json.dumps(
+            {"version": EXTRACTOR_VERSION, **extractor}, sort_keys=True
+        )
+        os.makedirs(self.directory, exist_ok=True)
+
+    def key(self, path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+        digest.update(self.extractor.encode())
+        return digest.hexdigest()
+
+    def load(self, key: str) -> Tuple[DataFrame, Currency] | None:
+        entry_path: str = self.entry_path(key)
+        try:
+            entry: pa.Table = feather.read_table(entry_path)
+        except (OSError, pa.ArrowException):
+            return None
+        touch(entry_path)
+        currency: Currency = Currency(entry.schema.metadata[b"currency"].decode())
+        return apply_schema(entry.to_pandas()), currency
+
+    def store(self, key: str, dataframe: DataFrame, currency: Currency) -> None:
+        entry_path: str = self.entry_path(key)
+        tmp_path: str = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        entry: pa.Table = pa.Table.from_pandas(dataframe, preserve_index=False)
+        entry = entry.replace_schema_metadata(
+            {**entry.schema.metadata, b"currency": currency.value.encode()}
+        )
+        feather.write_feather(entry, tmp_path)
+        os.replace(tmp_path, entry_path)
+        self.evict()
+
+    def evict(self) -> None:
+        evict(self.directory, self.max_size)
+
+    def clear(self) -> None:
+        for entry in entries(self.directory, [self.suffix]):
+            remove(entry.path)
+
+    def entry_path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+
+def evict(directory: str, max_size: int) -> None:
+    # Least recently used entries of all caches go first. Other threads and
+    # processes evict from the same directory, entries they removed first
+    # are skipped.
+    cached: List[Tuple[str, os.stat_result]] = []
+    for entry in entries(directory, entry_suffixes):
+        try:
+            cached.append((entry.path, entry.stat()))
+        except FileNotFoundError:
+            continue
+    total_size: int = sum(stat.st_size for _, stat in cached)
+    for path, stat in sorted(cached, key=lambda c: c[1].st_mtime):
+        if total_size <= max_size:
+            break
+        total_size -= stat.st_size
+        remove(path)
+
+
+def remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def touch(path: str) -> None:
+    # Marks a hit, the entry may have been evicted since it was read
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass
+
+
+def entries(directory: str, suffixes: List[str]) -> List[os.DirEntry]:
+    return [
+        entry
+        for entry in os.scandir(directory)
+        if entry.is_file() and entry.name.endswith(tuple(suffixes))
+    ]
@@ -0,0 +1,85 @@
+from typing import List, Dict, Callable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from pandas import DataFrame, Series
+
+from .schema import foreign_text_column
+
+# Columns that tell transactions apart. The completion date and the card
+# are left out, a pending transaction of one statement is the same
+# transaction once a later statement shows it completed.
+fingerprint_columns: List[str] = [
+    "Transaction date",
+    "Transaction description",
+    "Amount in foreign currency",
+    foreign_text_column,
+    "Amount in original currency",
+    "Expense",
+    "Income",
+    "Balance",
+]
+
+
+def normalized(table: DataFrame) -> DataFrame:
+    # Dates as integers, texts as hashes of their normalized value and
+    # amounts in whole cents, missing values as their own value
+    columns: Dict[str, np.ndarray] = {
+        "Transaction date": table["Transaction date"]
+        .dt.normalize()
+        .to_numpy(dtype="int64"),
+        "Transaction description": text_hashes(
+            table["Transaction description"], lambda text: " ".join(text.split())
+        ),
+        foreign_text_column: text_hashes(table[foreign_text_column], str.strip),
+        "Amount in original currency": text_hashes(
+            table["Amount in original currency"], str.strip
+        ),
+    }
+    for column in ["Amount in foreign currency", "Expense", "Income", "Balance"]:
+        cents: Series = (table[column] * 100).round()
+        columns[column] = cents.fillna(np.iinfo(np.int64).min).to_numpy(dtype="int64")
+    return DataFrame(columns)
+
+
+def text_hashes(texts: Series, normalize: Callable[[str], str]) -> np.ndarray:
+    # Texts repeat a lot, so only the distinct ones are normalized and
+    # hashed and their hashes are spread back over the rows.
+    # Arrow encodes the strings of the table without copying them to Python.
+    encoded = pa.array(texts, type=pa.string())
+    if isinstance(encoded, pa.ChunkedArray):
+        encoded = encoded.combine_chunks()
+    encoded = encoded.dictionary_encode()
+    distinct: List[str] = encoded.dictionary.to_pylist()
+    # Missing texts hash like empty ones
+    codes: np.ndarray = encoded.indices.fill_null(len(distinct)).to_numpy()
+    return pd.util.hash_array(
+        np.array([normalize(text).upper() for text in distinct] + [""], dtype=object)
+    )[codes]
+
+
+def row_fingerprints(table: DataFrame) -> np.ndarray:
+    # 64 bit hash of every row of a preprocessed table. Rows that are equal
+    # once normalized are told apart by their occurrence, so the second of
+    # two identical transactions in one statement keeps its own fingerprint
+    # and only the same occurrence in another statement matches it.
+    if table.empty:
+        return np.empty(0, dtype=np.uint64)
+    hashes: Series = pd.util.hash_pandas_object(normalized(table), index=False)
+    occurrences: Series = hashes.groupby(hashes, sort=False).cumcount()
+    return pd.util.hash_pandas_object(
+        DataFrame({"row": hashes.to_numpy(), "occurrence": occurrences.to_numpy()}),
+        index=False,
+    ).to_numpy()
+
+
+def duplicate_rows(dataframes: List[DataFrame]) -> List[np.ndarray]:
+    # Masks of the rows that an earlier table already holds. All fingerprints
+    # go through one hash table, so it takes linear time, and the first
+    # occurrence of a row is the one that's kept.
+    fingerprints: List[np.ndarray] = [row_fingerprints(df) for df in dataframes]
+    if not fingerprints:
+        return []
+    duplicated: np.ndarray = pd.Index(np.concatenate(fingerprints)).duplicated()
+    return np.split(duplicated, np.cumsum([len(f) for f in fingerprints])[:-1])
@@ -1,25 +1,36 @@
-from asyncio import Future
-from dataclasses import dataclass
-from concurrent.futures import ThreadPoolExecutor, wait
-from multiprocessing import cpu_count
+import hashlib
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from queue import Queue
+from threading import Thread
 import tqdm
 
-from tabula import read_pdf
+import numpy as np
 import pandas as pd
-from typing import List, Dict, Tuple, BinaryIO, Any
+from typing import List, Dict, Tuple, Callable, Iterator, TYPE_CHECKING
 from pandas import DataFrame
-import PyPDF2
 from termcolor import colored
-import re
 
-from cli import Settings
-from util import Currency, to_datetime
+from cli import Settings, Engine, Stage
+from util import Currency, Metrics, Usage, measure, print_colored
+from .preprocessing import preprocess
+from .schema import concat_tables
+from .scheduler import PageScheduler, ExtractionJob, MemoryBudget
+
+if TYPE_CHECKING:
+    from .cache import TableCache
 
 
 @dataclass
 class Table:
     dataframe: DataFrame
     currency: Currency
+    # Cache key of the statement, merged tables keep their statements in parts
+    key: str | None = None
+    parts: List["Table"] = field(default_factory=list)
 
 
 column_names_list: List[str] = [
@@ -47,162 +58,357 @@ areas_rsd: Dict[str, List[float]] = {
 }
 
 
-class PDFReader:
-    progress = None
+area_names: List[str] = ["first_page", "second_and_other", "last_page"]
 
-    def __init__(self, settings: Settings):
-        self.settings = settings
 
-    def extract_data_from_pdfs(self) -> List[Table]:
-        paths: List[str] = self.settings.files
-        merge: bool = self.settings.merge
+def area_name_for_page(page: int, num_of_pages: int) -> str:
+    if page == 1:
+        return "first_page"
+    if page == num_of_pages:
+        return "last_page"
+    return "second_and_other"
 
-        all_datasets: List[
-            Tuple[Currency, List[DataFrame]]
-        ] = self.get_tables_from_pdfs(paths)
-        all_tables: List[Table] = self.preprocess_tables(all_datasets, merge)
 
-        return all_tables
+def dataframe_from_rows(rows: List[List[str]]) -> DataFrame:
+    # Mirrors what tabula-py does with the JSON output of tabula-java
+    dataframe = pd.DataFrame(
+        data=[[np.nan if not cell else cell for cell in row] for row in rows],
+        columns=column_names_list,
+    )
+    for column in dataframe.columns:
+        dataframe[column] = pd.to_numeric(dataframe[column], errors="ignore")
+    return dataframe
 
-    def get_tables_from_pdfs(
-        self, paths: List[str]
-    ) -> List[Tuple[Currency, List[DataFrame]]]:
-        dataframes: List[Tuple[Currency, List[DataFrame]]] = []
-        self.progress = tqdm.tqdm(paths, colour="green")
-        for path in paths:
-            try:
-                file: BinaryIO = open(path, "rb")
-                pdf = PyPDF2.PdfReader(file)
-                num_of_pages = len(pdf.pages)
 
-                currency = self.get_currency_from_file(pdf)
+@dataclass
+class PageTask:
+    file_name: str
+    pages: List[int]
+    num_of_pages: int
+    areas: Dict[str, List[float]]
 
-                areas = areas_rsd if currency == Currency.RSD else areas_eur_usd
-                dataframes_per_file: List[DataFrame] = self.read_pdf_on_threaded_pool(
-                    path, num_of_pages, areas
-                )
 
-                dataframes.append((currency, dataframes_per_file))
-            except Exception as e:
-                print(
-                    colored(
-                        f"Failed to extract data from file {path}\n{e}",
-                        "light_red",
-                        force_color=True,
-                    )
-                )
-        self.progress.set_description("Reading PDFs complete!")
-        self.progress.close()
-        return dataframes
+@dataclass
+class PageResult:
+    dataframe: DataFrame
+    usage: Usage
 
-    def read_pdf_on_threaded_pool(
-        self, file_name: str, num_of_pages: int, areas: dict[str, list[float]]
-    ) -> List[DataFrame]:
-        self.progress.update(1)
-        self.progress.set_description(f"Reading ${file_name}: ", refresh=True)
-        executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=cpu_count())
-        read_pdf_tasks: List[Tuple[Dict[str, Any], int]] = [
-            (
-                {
-                    "input_path": file_name,
-                    "pages": 1,
-                    "area": areas["first_page"],
-                    "stream": True,
-                    "pandas_options": {"columns": column_names_list},
-                },
-                1,
-            )
+
+class ReaderEngine(ABC):
+    # Turns the pages of a statement into DataFrames
+    # with the columns of column_names_list.
+    # Work is split into tasks that PageScheduler runs on a shared pool.
+    executor_type: type[Executor] = ThreadPoolExecutor
+    worker_memory: int = 64 * 1024 * 1024
+
+    def tasks(
+        self, file_name: str, num_of_pages: int, areas: Dict[str, List[float]]
+    ) -> List[PageTask]:
+        return [
+            PageTask(file_name, list(range(1, num_of_pages + 1)), num_of_pages, areas)
         ]
 
-        if num_of_pages >= 3:
-            for page in range(2, num_of_pages):
-                read_pdf_tasks.append(
-                    (
-                        {
-                            "input_path": file_name,
-                            "pages": page,
-                            "area": areas["second_and_other"],
-                            "stream": True,
-                            "pandas_options": {"columns": column_names_list},
-                        },
-                        page,
-                    )
-                )
+    @abstractmethod
+    def run(self, task: PageTask) -> List[PageResult]:
+        pass
 
-        read_pdf_tasks.append(
-            (
-                {
-                    "input_path": file_name,
-                    "pages": num_of_pages,
-                    "stream": True,
-                    "pandas_options": {"columns": column_names_list},
-                },
-                num_of_pages,
-            )
-        )
+    def read_pages(
+        self, file_name: str, num_of_pages: int, areas: Dict[str, List[float]]
+    ) -> List[DataFrame]:
+        dataframes_per_file: List[DataFrame] = []
+        for task in self.tasks(file_name, num_of_pages, areas):
+            dataframes_per_file.extend(result.dataframe for result in self.run(task))
+        return dataframes_per_file
 
-        futures: list[Future] = [
-            executor.submit(self.read_page_async, args[1], args[0])
-            for args in read_pdf_tasks
-        ]
-        wait(futures)
-        results = [f.result() for f in futures]
+    def task_memory(self, task: PageTask, file_size: int) -> int:
+        return self.worker_memory + file_size
 
-        results.sort(key=lambda elem: elem[1])
-        dataframes_per_file = [result[0][0] for result in results]
+    # Loads what the first statement would otherwise wait for
+    def warm_up(self) -> None:
+        pass
 
-        for idx, dataframe in enumerate(dataframes_per_file):
-            if dataframe["Expense"][0] == "Isplata":
-                dataframes_per_file[idx] = dataframe.tail(-2).reset_index(drop=True)
+    def report(self) -> None:
+        pass
 
-        return dataframes_per_file
+    def record_metrics(self, metrics: Metrics) -> None:
+        pass
 
-    def read_page_async(self, page_num, kwargs) -> Tuple[List[DataFrame], int]:
-        return read_pdf(**kwargs), page_num
 
-    def get_currency_from_file(self, pdf):
-        text_of_first_page: str = pdf.pages[0].extract_text()
-        currency_str: str = re.findall("Strana:.*$", text_of_first_page, re.MULTILINE)[
-            0
-        ].split(" ")[1]
-        currency: Currency = Currency(currency_str)
-        return currency
+# Engines and the cache are imported only once they are used, a run that
+# finds everything in the cache never loads PyPDF2 or tabula
+def create_engine(settings: Settings) -> ReaderEngine:
+    if settings.engine == Engine.PYTHON:
+        from .pythonengine import PythonEngine
 
-    def preprocess_tables(
-        self, dataframes_per_file: List[Tuple[Currency, List[DataFrame]]], merge: bool
-    ) -> List[Table]:
-        all_tables: List[Table] = []
-        for dataframes_with_currency in dataframes_per_file:
-            currency: Currency = dataframes_with_currency[0]
-            dataframes: List[DataFrame] = dataframes_with_currency[1]
+        return PythonEngine()
+    from .tabulaengine import TabulaEngine
 
-            # Concat all the tables into one
-            table = pd.concat(dataframes, axis=0, ignore_index=True)
+    return TabulaEngine(settings.extraction_mode)
 
-            # Extract exchange rate into separate column
-            self.extract_exchange_rate_to_sep_column(table)
 
-            # Drop Nan rows
-            table.dropna(subset=["Balance"], inplace=True)
-            table.reset_index(drop=True, inplace=True)
+def create_cache(settings: Settings) -> "TableCache | None":
+    if not settings.use_cache:
+        return None
+    from .cache import TableCache
 
-            # Sometimes "Trsansaction date" may be empty,
-            # use "Completion date" as a fallback to not mess with nan rows further
-            self.fill_empty_transaction_date(table)
+    cache: TableCache = TableCache(
+        settings.cache_dir,
+        settings.cache_size,
+        {
+            "engine": settings.engine.value,
+            "extraction_mode": settings.extraction_mode.value,
+            "areas_rsd": areas_rsd,
+            "areas_eur_usd": areas_eur_usd,
+        },
+    )
+    if settings.clear_cache:
+        cache.clear()
+    return cache
 
-            # Settings data types
-            self.set_data_types(table)
 
-            table.fillna("No information", inplace=True)
+class PDFReader:
+    progress = None
+    # Extracted statements iter_tables keeps waiting for preprocessing
+    queue_size: int = 2
+
+    def __init__(
+        self,
+        settings: Settings,
+        metrics: Metrics | None = None,
+        executor: Executor | None = None,
+        verbose: bool = True,
+        budget: MemoryBudget | None = None,
+        engine: ReaderEngine | None = None,
+    ):
+        self.settings = settings
+        self.metrics: Metrics = metrics or Metrics()
+        self.engine: ReaderEngine = engine or create_engine(settings)
+        self.cache: "TableCache | None" = create_cache(settings)
+        # Progress bars and the engine's summary on the console
+        self.verbose = verbose
+        # Cache keys of the statements, every file is hashed once
+        self.keys: Dict[str, str] = {}
+        self.scheduler: PageScheduler = PageScheduler(
+            self.engine, settings.memory_budget, executor=executor, budget=budget
+        )
 
-            all_tables.append(Table(table, currency))
+    def extract_data_from_pdfs(self) -> List[Table]:
+        paths: List[str] = self.settings.files
+        tables: Dict[str, Table] = self.read_tables(paths)
+        all_tables: List[Table] = [tables[path] for path in paths if path in tables]
+        if self.settings.merge:
+            with self.metrics.stage(Stage.PREPROCESS.value):
+                return self.merge_tables(
+                    all_tables, [path for path in paths if path in tables]
+                )
+        else:
+            return all_tables
+
+    def read_tables(self, paths: List[str]) -> Dict[str, Table]:
+        # Tables of the statements that could be read, by path
+        tables: Dict[str, Table] = {}
+        datasets: Dict[str, Tuple[Currency, List[DataFrame]]] = {}
+        with self.metrics.stage(Stage.EXTRACT.value):
+            paths_to_read: List[str] = self.load_cached(paths, tables)
+            self.read_pdfs(paths_to_read, datasets.__setitem__)
+
+        with self.metrics.stage(Stage.PREPROCESS.value):
+            for path, dataset in datasets.items():
+                table: Table | None = self.preprocess_file(path, dataset)
+                if table is not None:
+                    tables[path] = table
+        return tables
+
+    def forget(self, path: str) -> None:
+        # Drops what the reader keeps of a statement, readers that live long
+        # (the HTTP service) read every upload from a new temporary path
+        self.keys.pop(path, None)
+        self.metrics.forget_file(path)
+
+    def iter_tables(self) -> Iterator[Table]:
+        # Yields the table of every statement as soon as it is read, cached
+        # ones first. Extraction runs on its own thread and stops while
+        # queue_size statements wait for the caller to take their tables.
+        tables: Dict[str, Table] = {}
+        with measure(memory=False) as usage:
+            paths_to_read: List[str] = self.load_cached(self.settings.files, tables)
+        self.metrics.add_stage(Stage.EXTRACT.value, usage)
+        yield from tables.values()
+
+        datasets: Queue = Queue(maxsize=self.queue_size)
+        # Raised again on the caller's thread once the queue is drained
+        errors: List[Exception] = []
+
+        def read() -> None:
+            try:
+                with measure(memory=False, cpu_clock=time.thread_time) as usage:
+                    self.read_pdfs(
+                        paths_to_read, lambda *dataset: datasets.put(dataset)
+                    )
+                self.metrics.add_stage(Stage.EXTRACT.value, usage)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                datasets.put(None)
+
+        reader: Thread = Thread(target=read, daemon=True)
+        reader.start()
+        for path, dataset in iter(datasets.get, None):
+            with measure(memory=False) as usage:
+                table: Table | None = self.preprocess_file(path, dataset)
+            self.metrics.add_stage(Stage.PREPROCESS.value, usage)
+            if table is not None:
+                yield table
+        reader.join()
+        if errors:
+            raise errors[0]
+
+    def load_cached(self, paths: List[str], tables: Dict[str, Table]) -> List[str]:
+        # Puts the cached tables into tables and returns the paths to read
+        paths_to_read: List[str] = []
+        for path in paths:
+            try:
+                if self.cache:
+                    with measure(memory=False) as usage:
+                        self.keys[path] = self.cache.key(path)
+                        cached: Tuple[DataFrame, Currency] | None = self.cache.load(
+                            self.keys[path]
+                        )
+                    self.metrics.add_file(path, "cache", usage)
+                    if cached:
+                        tables[path] = Table(*cached, self.keys[path])
+                        continue
+                paths_to_read.append(path)
+            except Exception as e:
+                self.print_failure(path, e)
+        return paths_to_read
+
+    def preprocess_file(
+        self, path: str, dataset: Tuple[Currency, List[DataFrame]]
+    ) -> Table | None:
+        try:
+            with measure(memory=False) as usage:
+                table: Table = self.preprocess_table(*dataset)
+                if self.cache:
+                    table.key = self.keys[path]
+                    self.cache.store(table.key, table.dataframe, table.currency)
+            self.metrics.add_file(path, Stage.PREPROCESS.value, usage)
+            return table
+        except Exception as e:
+            self.print_failure(path, e)
+            return None
+
+    def get_tables_from_pdfs(
+        self, paths: List[str]
+    ) -> List[Tuple[Currency, List[DataFrame]]]:
+        datasets: Dict[str, Tuple[Currency, List[DataFrame]]] = {}
+        self.read_pdfs(paths, datasets.__setitem__)
+        return [datasets[path] for path in paths if path in datasets]
+
+    def read_pdfs(
+        self,
+        paths: List[str],
+        on_dataset: Callable[[str, Tuple[Currency, List[DataFrame]]], None],
+    ) -> None:
+        # Hands the pages of every statement to on_dataset as soon as
+        # all of them are read
+        if not paths:
+            return
+        from .probe import probe_pdf
+
+        currencies: Dict[str, Currency] = {}
+        jobs: List[ExtractionJob] = []
+        for path in paths:
+            try:
+                with measure(memory=False) as usage:
+                    probe = probe_pdf(path)
+                self.metrics.add_file(path, "probe", usage)
+                self.metrics.add_file(path, "fingerprint", probe.fingerprint)
+
+                areas = areas_rsd if probe.currency == Currency.RSD else areas_eur_usd
+                currencies[path] = probe.currency
+                jobs.append(ExtractionJob(path, probe.num_of_pages, areas, probe.size))
+            except Exception as e:
+                self.print_failure(path, e)
+
+        # Local to the call, the HTTP service reads uploads concurrently
+        progress: tqdm.tqdm = tqdm.tqdm(
+            total=sum(job.num_of_pages for job in jobs),
+            unit="page",
+            colour="green",
+            disable=not self.verbose,
+        )
+        self.scheduler.run(
+            jobs, partial(self.task_done, progress, currencies, on_dataset)
+        )
+        progress.set_description("Reading PDFs complete!")
+        progress.close()
+        if self.verbose:
+            self.engine.report()
+        self.engine.record_metrics(self.metrics)
+
+    def task_done(
+        self,
+        progress: tqdm.tqdm,
+        currencies: Dict[str, Currency],
+        on_dataset: Callable[[str, Tuple[Currency, List[DataFrame]]], None],
+        task: PageTask,
+        result: List[PageResult] | Exception | None,
+    ) -> None:
+        progress.update(len(task.pages))
+        if result is None:
+            return
+        path: str = task.file_name
+        progress.set_description(f"Reading {path}", refresh=True)
+        if isinstance(result, Exception):
+            self.print_failure(path, result)
+            return
+
+        usages: List[Usage] = [page.usage for page in result]
+        self.metrics.add_pages(path, list(range(1, len(result) + 1)), usages)
+        self.metrics.add_file(path, Stage.EXTRACT.value, self.metrics.combine(usages))
+        dataframes: List[DataFrame] = [page.dataframe for page in result]
+        on_dataset(path, (currencies[path], self.drop_header_rows(dataframes)))
+
+    def print_failure(self, path: str, e: Exception) -> None:
+        print(
+            colored(
+                f"Failed to extract data from file {path}\n{e}",
+                "light_red",
+                force_color=True,
+            )
+        )
+
+    def drop_header_rows(self, dataframes_per_file: List[DataFrame]) -> List[DataFrame]:
+        for idx, dataframe in enumerate(dataframes_per_file):
+            if not dataframe.empty and dataframe["Expense"][0] == "Isplata":
+                dataframes_per_file[idx] = dataframe.tail(-2).reset_index(drop=True)
+        return dataframes_per_file
+
+    def preprocess_tables(
+        self, dataframes_per_file: List[Tuple[Currency, List[DataFrame]]], merge: bool
+    ) -> List[Table]:
+        all_tables: List[Table] = [
+            self.preprocess_table(currency, dataframes)
+            for currency, dataframes in dataframes_per_file
+        ]
 
         if merge:
             return self.merge_tables(all_tables)
         else:
             return all_tables
 
-    def merge_tables(self, all_tables):
+    def preprocess_table(
+        self, currency: Currency, dataframes: List[DataFrame]
+    ) -> Table:
+        return Table(preprocess(dataframes), currency)
+
+    def merge_tables(self, all_tables, names: List[str] | None = None):
+        if self.settings.dedup:
+            all_tables = self.drop_duplicates(
+                all_tables,
+                names or [f"Table {idx + 1}" for idx in range(len(all_tables))],
+            )
         rsd_reports: List[DataFrame] = list(
             filter(
                 lambda table: table.currency is Currency.RSD,
@@ -221,62 +427,69 @@ class PDFReader:
                 all_tables,
             )
         )
+        # Statements are in the schema once they are read, merged tables are
+        # reported from the cached partial aggregates of their parts
         merged_tables: List[Table] = []
         if rsd_reports:
             merged_tables.append(
                 Table(
-                    pd.concat(map(lambda t: t.dataframe, rsd_reports), axis=0),
+                    concat_tables([table.dataframe for table in rsd_reports]),
                     Currency.RSD,
+                    parts=rsd_reports,
                 )
             )
         if eur_reports:
             merged_tables.append(
                 Table(
-                    pd.concat(map(lambda t: t.dataframe, eur_reports), axis=0),
+                    concat_tables([table.dataframe for table in eur_reports]),
                     Currency.EUR,
+                    parts=eur_reports,
                 )
             )
         if usd_reports:
             merged_tables.append(
                 Table(
-                    pd.concat(map(lambda t: t.dataframe, usd_reports), axis=0),
+                    concat_tables([table.dataframe for table in usd_reports]),
                     Currency.USD,
+                    parts=usd_reports,
                 )
             )
-        for table in merged_tables:
-            table.dataframe.reset_index(drop=True, inplace=True)
         return merged_tables
 
-    def fill_empty_transaction_date(self, table):
-        for idx, row in table.iterrows():
-            if pd.isna(row["Transaction date"]):
-                table.at[idx, "Transaction date"] = row["Completion date"]
-            try:
-                table.at[idx, "Amount in foreign currency"] = float(
-                    row["Amount in foreign currency"]
+    def drop_duplicates(self, tables: List[Table], names: List[str]) -> List[Table]:
+        # Overlapping statements, e.g. a quarterly one and its months, hold the
+        # same transactions. Every statement loses the rows that an earlier
+        # statement of its currency already holds, the order stays the same.
+        from .fingerprint import duplicate_rows
+
+        tables = list(tables)
+        for currency in Currency:
+            indices: List[int] = [
+                idx for idx, table in enumerate(tables) if table.currency is currency
+            ]
+            masks: List[np.ndarray] = duplicate_rows(
+                [tables[idx].dataframe for idx in indices]
+            )
+            for idx, duplicated in zip(indices, masks):
+                dropped: int = int(duplicated.sum())
+                self.metrics.add_file(names[idx], "duplicates", dropped)
+                print_colored(
+                    f"{names[idx]}: {dropped} of {len(duplicated)} transactions "
+                    f"dropped as duplicates",
+                    "light_grey",
                 )
-            except ValueError:
-                pass
-
-    def set_data_types(self, table):
-        table["Expense"] = table["Expense"].replace(",", "", regex=True).astype(float)
-        table["Income"] = table["Income"].replace(",", "", regex=True).astype(float)
-        table["Balance"] = table["Balance"].replace(",", "", regex=True).astype(float)
-        table["Amount in original currency"] = table[
-            "Amount in original currency"
-        ].replace(",", "", regex=True)
-        table["Completion date"] = table["Completion date"].apply(
-            lambda date: to_datetime(date)
-        )
-        table["Transaction date"] = table["Transaction date"].apply(
-            lambda date: to_datetime(date)
-        )
-
-    def extract_exchange_rate_to_sep_column(self, table):
-        table.insert(6, "Exchange rate", "")
-        for idx, row in table.loc[
-            table["Amount in original currency"].str.contains("(?<=Kurs: ).*", na=False)
-        ].iterrows():
-            table.loc[idx - 1, "Exchange rate"] = row[
-                "Amount in original currency"
-            ].split(" ")[1]
+                if dropped:
+                    # Keyed by the statement and its dropped rows, so the
+                    # partial aggregate of what is left is cached as well
+                    key: str | None = (
+                        tables[idx].key
+                        and hashlib.sha256(
+                            tables[idx].key.encode() + np.packbits(duplicated).tobytes()
+                        ).hexdigest()
+                    )
+                    tables[idx] = Table(
+                        tables[idx].dataframe[~duplicated].reset_index(drop=True),
+                        currency,
+                        key,
+                    )
+        return tables
@@ -0,0 +1,106 @@
+from typing import List, Dict, Any
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+
+from .schema import apply_schema, foreign_text_column
+
+date_format: str = "%d.%m.%Y"
+
+
+# Cleans up the raw page tables of one statement,
+# every step works on whole columns instead of row by row
+def preprocess(dataframes: List[DataFrame]) -> DataFrame:
+    # Concat all the tables into one
+    table = pd.concat(dataframes, axis=0, ignore_index=True)
+
+    # Extract exchange rate into separate column
+    extract_exchange_rate_to_sep_column(table)
+
+    # Drop Nan rows
+    table.dropna(subset=["Balance"], inplace=True)
+    table.reset_index(drop=True, inplace=True)
+
+    # Sometimes "Trsansaction date" may be empty,
+    # use "Completion date" as a fallback to not mess with nan rows further
+    fill_empty_transaction_date(table)
+
+    # Settings data types
+    set_data_types(table)
+
+    return apply_schema(table)
+
+
+def extract_exchange_rate_to_sep_column(table: DataFrame) -> None:
+    table.insert(6, "Exchange rate", np.nan)
+    original_amounts: Series = table["Amount in original currency"]
+    if original_amounts.dtype != object:
+        return
+
+    rates: Series = (
+        original_amounts[original_amounts.str.contains("(?<=Kurs: ).*", na=False)]
+        .str.split(" ")
+        .str[1]
+    )
+    # The rate belongs to the operation on the row above
+    rates = rates[rates.index > 0]
+    table.loc[rates.index - 1, "Exchange rate"] = pd.to_numeric(
+        rates, errors="coerce"
+    ).to_numpy()
+
+
+def fill_empty_transaction_date(table: DataFrame) -> None:
+    table["Transaction date"] = table["Transaction date"].fillna(
+        table["Completion date"]
+    )
+
+    # Foreign amounts that are numbers become floats, the text of the others
+    # is kept next to them. float() runs once per distinct value instead of
+    # once per row.
+    foreign_amounts: Series = table["Amount in foreign currency"]
+    as_floats: Dict[Any, float] = {
+        value: to_float(value) for value in foreign_amounts.dropna().unique()
+    }
+    amounts: Series = foreign_amounts.map(as_floats).astype(float)
+    table["Amount in foreign currency"] = amounts
+    table.insert(
+        table.columns.get_loc("Amount in foreign currency") + 1,
+        foreign_text_column,
+        foreign_amounts.where(amounts.isna()).astype(object),
+    )
+
+
+def to_float(value: Any) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def set_data_types(table: DataFrame) -> None:
+    table["Expense"] = remove_thousands_separator(table["Expense"]).astype(float)
+    table["Income"] = remove_thousands_separator(table["Income"]).astype(float)
+    table["Balance"] = remove_thousands_separator(table["Balance"]).astype(float)
+    table["Amount in original currency"] = remove_thousands_separator(
+        table["Amount in original currency"]
+    )
+    table["Completion date"] = to_datetime_column(table["Completion date"])
+    table["Transaction date"] = to_datetime_column(table["Transaction date"])
+
+
+def remove_thousands_separator(column: Series) -> Series:
+    if column.dtype != object:
+        return column
+    # .str gives NaN for values that are not strings, those are kept as is
+    replaced: Series = column.str.replace(",", "", regex=False)
+    return replaced.where(replaced.notna(), column)
+
+
+def to_datetime_column(dates: Series) -> Series:
+    # Statements repeat the same few dates, parse each of them once
+    codes, uniques = pd.factorize(dates)
+    return Series(
+        pd.to_datetime(uniques, format=date_format).take(codes, fill_value=pd.NaT),
+        index=dates.index,
+    )
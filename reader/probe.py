@@ -0,0 +1,83 @@
+import hashlib
+import os
+import re
+from dataclasses import dataclass
+from typing import List
+
+import PyPDF2
+
+from util import Currency
+
+currency_pattern: re.Pattern = re.compile(r"Strana:\s*([A-Z]{3})\b")
+
+
+@dataclass
+class PdfProbe:
+    path: str
+    size: int
+    num_of_pages: int
+    currency: Currency
+    # Hash of what decides where the tables are on the pages:
+    # page size, fonts of the first page and the producing software
+    fingerprint: str
+
+
+class CurrencyFound(Exception):
+    pass
+
+
+def probe_pdf(path: str) -> PdfProbe:
+    # Reads the page tree and the text of the first page up to its "Strana:"
+    # line, the pages are only read by the engine. The file is closed before
+    # returning, also when it's broken.
+    with open(path, "rb") as file:
+        pdf: PyPDF2.PdfReader = PyPDF2.PdfReader(file)
+        if not pdf.pages:
+            raise ValueError("PDF has no pages")
+        page: PyPDF2.PageObject = pdf.pages[0]
+        currency: Currency = currency_of_page(page)
+        fingerprint: str = layout_fingerprint(pdf, page)
+        return PdfProbe(
+            path, os.path.getsize(path), len(pdf.pages), currency, fingerprint
+        )
+
+
+def currency_of_page(page: PyPDF2.PageObject) -> Currency:
+    # Stops reading the page as soon as the currency after "Strana:" shows up
+    text: List[str] = []
+
+    def visitor(run: str, cm, tm, font, size) -> None:
+        text.append(run)
+        match: re.Match | None = currency_pattern.search("".join(text[-8:]))
+        if match and match.group(1) in Currency.__members__:
+            raise CurrencyFound(match.group(1))
+
+    try:
+        full_text: str = page.extract_text(visitor_text=visitor)
+    except CurrencyFound as found:
+        return Currency(str(found))
+
+    # Same lookup as on the whole extracted text of the page
+    return Currency(re.findall("Strana:.*$", full_text, re.MULTILINE)[0].split(" ")[1])
+
+
+def layout_fingerprint(pdf: PyPDF2.PdfReader, page: PyPDF2.PageObject) -> str:
+    fonts: List[str] = []
+    resources = page.get("/Resources")
+    if resources is not None and "/Font" in resources.get_object():
+        for font in resources.get_object()["/Font"].get_object().values():
+            fonts.append(str(font.get_object().get("/BaseFont", "")))
+    info = pdf.trailer.get("/Info")
+    producer: str = str(info.get_object().get("/Producer", "")) if info else ""
+
+    digest = hashlib.sha256()
+    digest.update(
+        repr(
+            (
+                [round(float(value), 1) for value in page.mediabox],
+                sorted(fonts),
+                producer,
+            )
+        ).encode()
+    )
+    return digest.hexdigest()[:16]
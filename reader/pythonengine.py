@@ -0,0 +1,157 @@
+from bisect import bisect
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, TYPE_CHECKING
+
+from pandas import DataFrame
+
+from util import Usage, measure
+from .pdfreader import (
+    ReaderEngine,
+    PageTask,
+    PageResult,
+    column_names_list,
+    area_name_for_page,
+    dataframe_from_rows,
+)
+
+if TYPE_CHECKING:
+    import PyPDF2
+
+
+@dataclass
+class TextRun:
+    text: str
+    left: float
+    right: float
+    top: float
+
+
+class PythonEngine(ReaderEngine):
+    # Rebuilds the table from positioned text reported by PyPDF2's text
+    # visitor, roughly the way tabula's stream mode does it: text runs are
+    # grouped into lines by their baseline and into columns by the horizontal
+    # gaps left between the runs of the whole page
+    # Pure Python work holds the GIL, so tasks run in separate processes
+    executor_type: type[Executor] = ProcessPoolExecutor
+    worker_memory: int = 96 * 1024 * 1024
+    char_width: float = 0.5
+    line_tolerance: float = 2.0
+
+    def warm_up(self) -> None:
+        # Workers forked after this start with PyPDF2 loaded
+        import PyPDF2
+
+    def run(self, task: PageTask) -> List[PageResult]:
+        # Every worker process reads one task at a time,
+        # so the peak memory of a page is the worker's peak while reading it.
+        # PyPDF2 is imported here, runs served from the cache don't need it
+        from PyPDF2 import PdfReader
+
+        runs: List[List[TextRun]] = []
+        boundaries: List[List[float] | None] = []
+        usages: List[Usage] = []
+        with open(task.file_name, "rb") as file:
+            pdf = PdfReader(file)
+            for page in task.pages:
+                area_name: str = area_name_for_page(page, task.num_of_pages)
+                with measure() as usage:
+                    runs.append(
+                        self.page_runs(pdf.pages[page - 1], task.areas[area_name])
+                    )
+                    boundaries.append(self.column_boundaries(runs[-1]))
+                usages.append(usage)
+
+        return [
+            PageResult(
+                self.table(
+                    runs[idx],
+                    boundaries[idx] or self.fallback(idx, runs, boundaries, task),
+                ),
+                usages[idx],
+            )
+            for idx in range(len(task.pages))
+        ]
+
+    def fallback(
+        self,
+        idx: int,
+        runs: List[List[TextRun]],
+        boundaries: List[List[float] | None],
+        task: PageTask,
+    ) -> List[float]:
+        # A column without any text on a page leaves no gap to split at.
+        # Pages of a statement share their columns, so the page is split like
+        # the nearest page before or after it that shows every column, or by
+        # the gaps of all pages together.
+        if not runs[idx]:
+            return []
+        for other in sorted(range(len(runs)), key=lambda o: (abs(o - idx), o > idx)):
+            if boundaries[other] is not None:
+                return boundaries[other]
+        table_wide: List[float] | None = self.column_boundaries(
+            [run for page_runs in runs for run in page_runs]
+        )
+        if table_wide is None:
+            raise ValueError(
+                f"The columns of page {task.pages[idx]} of {task.file_name} "
+                f"can't be told apart"
+            )
+        return table_wide
+
+    def page_runs(self, page: "PyPDF2.PageObject", area: List[float]) -> List[TextRun]:
+        top, left, bottom, right = area
+        page_top: float = float(page.mediabox.top)
+        runs: List[TextRun] = []
+
+        def visitor(text: str, cm: List[float], tm: List[float], font, size):
+            text = " ".join(text.split())
+            if not text:
+                return
+            x: float = tm[4] * cm[0] + tm[5] * cm[2] + cm[4]
+            y: float = tm[4] * cm[1] + tm[5] * cm[3] + cm[5]
+            font_size: float = size * abs(tm[0] * cm[0]) or size
+            run_top: float = page_top - y
+            if top <= run_top <= bottom and left <= x <= right:
+                width: float = len(text) * font_size * self.char_width
+                runs.append(TextRun(text, x, x + width, run_top))
+
+        page.extract_text(visitor_text=visitor)
+        return runs
+
+    def table(self, runs: List[TextRun], boundaries: List[float]) -> DataFrame:
+        rows: List[List[str]] = []
+        line_top: float | None = None
+        for run in sorted(runs, key=lambda r: (r.top, r.left)):
+            if line_top is None or run.top - line_top > self.line_tolerance:
+                rows.append([""] * len(column_names_list))
+                line_top = run.top
+            column: int = bisect(boundaries, (run.left + run.right) / 2)
+            cell: str = rows[-1][column]
+            rows[-1][column] = f"{cell} {run.text}" if cell else run.text
+
+        return dataframe_from_rows(rows)
+
+    def column_boundaries(self, runs: List[TextRun]) -> List[float] | None:
+        spans: List[List[float]] = []
+        for run in sorted(runs, key=lambda r: r.left):
+            if spans and run.left <= spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], run.right)
+            else:
+                spans.append([run.left, run.right])
+
+        # Words of one cell can leave gaps too, close the narrowest ones
+        while len(spans) > len(column_names_list):
+            gaps: List[float] = [
+                spans[idx + 1][0] - spans[idx][1] for idx in range(len(spans) - 1)
+            ]
+            idx: int = gaps.index(min(gaps))
+            spans[idx][1] = spans[idx + 1][1]
+            del spans[idx + 1]
+
+        if len(spans) < len(column_names_list):
+            return None
+
+        return [
+            (spans[idx][1] + spans[idx + 1][0]) / 2 for idx in range(len(spans) - 1)
+        ]
@@ -0,0 +1,171 @@
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from functools import partial
+from multiprocessing import cpu_count
+from threading import Condition, Lock, Semaphore
+from typing import List, Dict, Callable, Any
+
+
+@dataclass
+class ExtractionJob:
+    path: str
+    num_of_pages: int
+    areas: Dict[str, List[float]]
+    size: int
+
+
+class MemoryBudget:
+    # Admits work while its estimated memory fits into the budget.
+    # A single task bigger than the whole budget is still admitted
+    # once nothing else is running.
+    def __init__(self, budget: int):
+        self.budget = budget
+        self.used: int = 0
+        self.condition: Condition = Condition()
+
+    def acquire(self, amount: int) -> None:
+        with self.condition:
+            while self.used and self.used + amount > self.budget:
+                self.condition.wait()
+            self.used += amount
+
+    def release(self, amount: int) -> None:
+        with self.condition:
+            self.used -= amount
+            self.condition.notify_all()
+
+
+class PageScheduler:
+    # Runs the extraction tasks of all files on one shared pool.
+    # Biggest files go first so the long tail of a batch is made of
+    # small files, and results are put back together in page order.
+    # on_task_done is called after every task, with the pages of the file
+    # (or its first error) once its last task is done. The scheduler lets go
+    # of them right after, so a slow on_task_done holds back the pool.
+    def __init__(
+        self,
+        engine,
+        memory_budget: int,
+        max_workers: int = cpu_count(),
+        executor: Executor | None = None,
+        budget: MemoryBudget | None = None,
+    ):
+        self.engine = engine
+        self.memory_budget = memory_budget
+        self.max_workers = max_workers
+        self.lock: Lock = Lock()
+        # Pool that outlives the run and is shared with other runs, e.g. by
+        # the requests of the HTTP service, otherwise every run starts its own
+        self.executor = executor
+        # Runs on a shared pool share its budget too, so together they stay
+        # within memory_budget
+        self.budget = budget
+
+    def run(
+        self,
+        jobs: List[ExtractionJob],
+        on_task_done: Callable[[Any, List[Any] | Exception | None], None],
+    ) -> None:
+        pages: Dict[str, List[Any]] = {}
+        errors: Dict[str, Exception] = {}
+        remaining: Dict[str, int] = {}
+
+        if not jobs:
+            return
+
+        if self.executor is None:
+            with self.engine.executor_type(max_workers=self.max_workers) as executor:
+                self.submit(executor, jobs, pages, errors, remaining, on_task_done)
+            return
+
+        # Callbacks of futures of the shared pool may still run after the
+        # futures are done, so every task reports back once it's handled
+        finished: Semaphore = Semaphore(0)
+        tasks: int = self.submit(
+            self.executor, jobs, pages, errors, remaining, on_task_done, finished
+        )
+        for _ in range(tasks):
+            finished.acquire()
+
+    def submit(
+        self,
+        executor: Executor,
+        jobs: List[ExtractionJob],
+        pages: Dict[str, List[Any]],
+        errors: Dict[str, Exception],
+        remaining: Dict[str, int],
+        on_task_done: Callable[[Any, List[Any] | Exception | None], None],
+        finished: Semaphore | None = None,
+    ) -> int:
+        budget: MemoryBudget = self.budget or MemoryBudget(self.memory_budget)
+        submitted: int = 0
+        for job in sorted(jobs, key=lambda j: j.size, reverse=True):
+            tasks = self.engine.tasks(job.path, job.num_of_pages, job.areas)
+            # The same file may come more than once in a batch
+            with self.lock:
+                pages.setdefault(job.path, [None] * job.num_of_pages)
+                remaining[job.path] = remaining.get(job.path, 0) + len(tasks)
+            for task in tasks:
+                memory: int = self.engine.task_memory(task, job.size)
+                budget.acquire(memory)
+                future: Future = executor.submit(self.engine.run, task)
+                future.add_done_callback(
+                    partial(
+                        self.task_done,
+                        task,
+                        memory,
+                        budget,
+                        pages,
+                        errors,
+                        remaining,
+                        on_task_done,
+                        finished,
+                    )
+                )
+                submitted += 1
+        return submitted
+
+    def task_done(
+        self,
+        task,
+        memory: int,
+        budget: MemoryBudget,
+        pages: Dict[str, List[Any]],
+        errors: Dict[str, Exception],
+        remaining: Dict[str, int],
+        on_task_done: Callable[[Any, List[Any] | Exception | None], None],
+        finished: Semaphore | None,
+        future: Future,
+    ) -> None:
+        try:
+            self.handle_result(
+                task, memory, budget, pages, errors, remaining, on_task_done, future
+            )
+        finally:
+            if finished is not None:
+                finished.release()
+
+    def handle_result(
+        self,
+        task,
+        memory: int,
+        budget: MemoryBudget,
+        pages: Dict[str, List[Any]],
+        errors: Dict[str, Exception],
+        remaining: Dict[str, int],
+        on_task_done: Callable[[Any, List[Any] | Exception | None], None],
+        future: Future,
+    ) -> None:
+        budget.release(memory)
+        with self.lock:
+            if future.exception() is not None:
+                errors.setdefault(task.file_name, future.exception())
+            else:
+                for page, result in zip(task.pages, future.result()):
+                    pages[task.file_name][page - 1] = result
+            remaining[task.file_name] -= 1
+            result: List[Any] | Exception | None = None
+            if remaining[task.file_name] == 0:
+                result = errors.pop(task.file_name, None) or pages[task.file_name]
+                del pages[task.file_name]
+        on_task_done(task, result)
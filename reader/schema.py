@@ -0,0 +1,41 @@
+from typing import Dict, List
+
+import pandas as pd
+from pandas import DataFrame
+from pandas.api.types import union_categoricals
+
+# Foreign amounts that aren't numbers keep their text in this column,
+# next to the NaN of the amount
+foreign_text_column: str = "Amount in foreign currency (text)"
+
+# Column types of a preprocessed Table.
+# Missing values are NaT/NaN/<NA> instead of placeholder strings.
+table_schema: Dict[str, str] = {
+    "Transaction date": "datetime64[ns]",
+    "Completion date": "datetime64[ns]",
+    "Card number": "category",
+    "Transaction description": "string[pyarrow]",
+    "Amount in foreign currency": "float64",
+    foreign_text_column: "string[pyarrow]",
+    "Amount in original currency": "string[pyarrow]",
+    "Exchange rate": "float64",
+    "Expense": "float64",
+    "Income": "float64",
+    "Balance": "float64",
+}
+
+
+def apply_schema(table: DataFrame) -> DataFrame:
+    return table.astype(table_schema)
+
+
+def concat_tables(tables: List[DataFrame]) -> DataFrame:
+    # Tables that already hold the schema, only their categories are united.
+    # pandas turns categoricals with different categories into objects.
+    merged: DataFrame = pd.concat(tables, axis=0, ignore_index=True)
+    for name, dtype in table_schema.items():
+        if dtype == "category":
+            merged[name] = union_categoricals(
+                [table[name].astype(dtype) for table in tables]
+            )
+    return merged
@@ -0,0 +1,123 @@
+import time
+from typing import List, Dict, Any, TYPE_CHECKING
+
+from pandas import DataFrame
+
+from cli import ExtractionMode
+from util import Metrics, Usage, measure
+from .pdfreader import (
+    ReaderEngine,
+    PageTask,
+    PageResult,
+    area_names,
+    area_name_for_page,
+    dataframe_from_rows,
+)
+
+if TYPE_CHECKING:
+    from .tabulasession import TabulaSession
+
+
+class TabulaEngine(ReaderEngine):
+    def __init__(self, extraction_mode: ExtractionMode):
+        self.extraction_mode = extraction_mode
+
+    @property
+    def session(self) -> "TabulaSession":
+        # tabula is only loaded once a statement actually has to be read
+        from .tabulasession import TabulaSession
+
+        return TabulaSession.instance()
+
+    def tasks(
+        self, file_name: str, num_of_pages: int, areas: Dict[str, List[float]]
+    ) -> List[PageTask]:
+        if self.extraction_mode == ExtractionMode.BATCHED:
+            return super().tasks(file_name, num_of_pages, areas)
+        return [
+            PageTask(file_name, [page], num_of_pages, areas)
+            for page in range(1, num_of_pages + 1)
+        ]
+
+    def run(self, task: PageTask) -> List[PageResult]:
+        # Pages are read on threads, so their memory can't be told apart
+        if self.extraction_mode == ExtractionMode.BATCHED:
+            with measure(memory=False, cpu_clock=time.thread_time) as usage:
+                dataframes_per_file: List[DataFrame] = self.read_pdf_in_single_session(
+                    task.file_name, task.num_of_pages, task.areas
+                )
+            page_usage: Usage = Usage(
+                usage.wall / task.num_of_pages, usage.cpu / task.num_of_pages
+            )
+            return [
+                PageResult(dataframe, page_usage) for dataframe in dataframes_per_file
+            ]
+
+        results: List[PageResult] = []
+        for page in task.pages:
+            with measure(memory=False, cpu_clock=time.thread_time) as usage:
+                dataframe: DataFrame = self.read_page(
+                    task.file_name, page, task.num_of_pages, task.areas
+                )
+            results.append(PageResult(dataframe, usage))
+        return results
+
+    def task_memory(self, task: PageTask, file_size: int) -> int:
+        # Without the in-process JVM every task starts its own Java process
+        self.session.start()
+        jvm_memory: int = 0 if self.session.in_process else 256 * 1024 * 1024
+        return super().task_memory(task, file_size) + jvm_memory
+
+    def warm_up(self) -> None:
+        self.session.start()
+
+    def report(self) -> None:
+        self.session.report()
+
+    def record_metrics(self, metrics: Metrics) -> None:
+        if self.session.started:
+            metrics.add_stage("jvm_startup", Usage(self.session.startup_time))
+
+    def read_pdf_in_single_session(
+        self, file_name: str, num_of_pages: int, areas: dict[str, list[float]]
+    ) -> List[DataFrame]:
+        # tabula-java applies every area to every page, so one call returns
+        # len(page_areas) tables per page in page-major order
+        page_areas: List[List[float]] = [areas[name] for name in area_names]
+        raw_tables: List[Dict[str, Any]] = self.session.extract(
+            file_name, "all", page_areas, num_of_pages
+        )
+
+        if len(raw_tables) != num_of_pages * len(page_areas):
+            raise ValueError(
+                f"Expected {num_of_pages * len(page_areas)} tables from tabula, "
+                f"got {len(raw_tables)}"
+            )
+
+        dataframes_per_file: List[DataFrame] = []
+        for page in range(1, num_of_pages + 1):
+            area_idx: int = area_names.index(area_name_for_page(page, num_of_pages))
+            raw_table = raw_tables[(page - 1) * len(page_areas) + area_idx]
+            dataframes_per_file.append(self.dataframe_from_tabula_json(raw_table))
+
+        return dataframes_per_file
+
+    def dataframe_from_tabula_json(self, raw_table: Dict[str, Any]) -> DataFrame:
+        return dataframe_from_rows(
+            [[cell["text"] for cell in row] for row in raw_table["data"]]
+        )
+
+    def read_page(
+        self,
+        file_name: str,
+        page: int,
+        num_of_pages: int,
+        areas: Dict[str, List[float]],
+    ) -> DataFrame:
+        # Every page is read with the area batched mode uses for it
+        area: List[float] = areas[area_name_for_page(page, num_of_pages)]
+        raw_tables: List[Dict[str, Any]] = self.session.extract(file_name, page, area)
+        # Like tabula-py, take the first table that has any rows
+        non_empty: List[Dict[str, Any]] = [t for t in raw_tables if t["data"]]
+        raw_table: Dict[str, Any] = non_empty[0] if non_empty else {"data": []}
+        return self.dataframe_from_tabula_json(raw_table)
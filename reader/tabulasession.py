@@ -0,0 +1,145 @@
+import glob
+import json
+import os
+import shutil
+import time
+from statistics import median
+from threading import Lock
+from typing import List, Dict, Any
+
+import tabula
+from tabula import read_pdf
+from tabula.util import TabulaOption
+
+from util import print_colored
+
+
+# Long-lived tabula-java backend shared by every file of a run.
+# With JPype and a Java runtime available tabula-java runs inside one
+# in-process JVM that is started once and stays warm, otherwise every call
+# falls back to tabula-py's subprocess mode.
+class TabulaSession:
+    _instance: "TabulaSession | None" = None
+    _instance_lock: Lock = Lock()
+
+    def __init__(self):
+        self.lock: Lock = Lock()
+        self.started: bool = False
+        self.in_process: bool = False
+        self.startup_time: float = 0.0
+        self.page_latencies: List[float] = []
+        self._command_line_app = None
+        self._parser = None
+        self._options = None
+        self._string_builder = None
+
+    @classmethod
+    def instance(cls) -> "TabulaSession":
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = TabulaSession()
+            return cls._instance
+
+    def extract(
+        self,
+        path: str,
+        pages: int | str,
+        area: List[Any] | None,
+        num_of_pages: int = 1,
+    ) -> List[Dict[str, Any]]:
+        self.start()
+        start: float = time.perf_counter()
+
+        if self.in_process:
+            raw_tables = self._extract_in_process(path, pages, area)
+        else:
+            raw_tables = read_pdf(
+                path, pages=pages, area=area, stream=True, output_format="json"
+            )
+
+        elapsed: float = time.perf_counter() - start
+        with self.lock:
+            self.page_latencies.extend([elapsed / num_of_pages] * num_of_pages)
+        return raw_tables
+
+    def start(self) -> None:
+        with self.lock:
+            if self.started:
+                return
+            start: float = time.perf_counter()
+            try:
+                self.in_process = self._start_jvm()
+            except Exception as e:
+                # e.g. a stale JAVA_HOME, tabula-py's subprocess mode uses
+                # the java on PATH
+                print_colored(f"Failed to start in-process JVM: {e}", "light_red")
+                self.in_process = False
+            self.startup_time = time.perf_counter() - start
+            self.started = True
+
+    def report(self) -> None:
+        if not self.page_latencies:
+            return
+        backend: str = "in-process JVM" if self.in_process else "subprocess"
+        print_colored(
+            f"Tabula backend: {backend}, "
+            f"startup {self.startup_time * 1000:.0f}ms, "
+            f"{len(self.page_latencies)} pages, "
+            f"per-page latency median "
+            f"{median(self.page_latencies) * 1000:.0f}ms, "
+            f"max {max(self.page_latencies) * 1000:.0f}ms",
+            "light_grey",
+        )
+
+    def _start_jvm(self) -> bool:
+        try:
+            import jpype
+            import jpype.imports
+        except ImportError:
+            return False
+
+        if shutil.which("java") is None and "JAVA_HOME" not in os.environ:
+            return False
+
+        if not jpype.isJVMStarted():
+            jpype.addClassPath(self._jar_path())
+            jpype.startJVM(
+                "-Dfile.encoding=UTF8",
+                "-Djava.awt.headless=true",
+                "-Dorg.slf4j.simpleLogger.defaultLogLevel=off",
+                "-Dorg.apache.commons.logging.Log"
+                "=org.apache.commons.logging.impl.NoOpLog",
+                convertStrings=False,
+            )
+
+        from java.lang import StringBuilder
+        from org.apache.commons.cli import DefaultParser
+        from technology.tabula import CommandLineApp
+
+        self._command_line_app = CommandLineApp
+        self._parser = DefaultParser()
+        self._options = CommandLineApp.buildOptions()
+        self._string_builder = StringBuilder
+        return True
+
+    def _extract_in_process(
+        self, path: str, pages: int | str, area: List[Any] | None
+    ) -> List[Dict[str, Any]]:
+        options: TabulaOption = TabulaOption(
+            pages=pages, area=area, stream=True, format="JSON", silent=True
+        )
+        args = self._parser.parse(self._options, options.build_option_list() + [path])
+        output = self._string_builder()
+        self._command_line_app(output, args).extractTables(args)
+        return json.loads(str(output.toString()))
+
+    def _jar_path(self) -> str:
+        if "TABULA_JAR" in os.environ:
+            return os.environ["TABULA_JAR"]
+        package_dir: str = os.path.dirname(tabula.__file__)
+        jars: List[str] = glob.glob(
+            os.path.join(package_dir, "tabula-*-jar-with-dependencies.jar")
+        )
+        if not jars:
+            raise FileNotFoundError(f"No tabula-java jar in {package_dir}")
+        return jars[0]
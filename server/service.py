@@ -0,0 +1,351 @@
+import asyncio
+import json
+import os
+import signal
+import tempfile
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from email import policy
+from email.parser import BytesParser
+from http import HTTPStatus
+from multiprocessing import cpu_count
+from typing import List, Dict, Any
+from urllib.parse import urlsplit, parse_qs
+
+from aggregator import Aggregator, Report
+from cli import Settings, Stage
+from reader import PDFReader, Table
+from reader.pdfreader import ReaderEngine, create_engine, create_cache
+from reader.scheduler import MemoryBudget
+from util import Metrics, Usage, measure, print_colored
+from writer import XslxWriter, report_statistics
+
+xlsx_type: str = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+output_formats: List[str] = ["xlsx", "json"]
+
+
+class HttpError(Exception):
+    def __init__(
+        self,
+        status: HTTPStatus,
+        message: str,
+        headers: Dict[str, str] | None = None,
+    ):
+        super().__init__(message)
+        self.status = status
+        self.headers: Dict[str, str] = headers or {}
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: Dict[str, List[str]]
+    headers: Dict[str, str]
+
+
+@dataclass
+class Response:
+    status: HTTPStatus
+    content_type: str
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+def json_response(status: HTTPStatus, value: Any) -> Response:
+    return Response(
+        status,
+        "application/json",
+        json.dumps(value, ensure_ascii=False).encode("utf-8"),
+    )
+
+
+class ConversionService:
+    # Local HTTP service that converts uploaded statements:
+    #   POST /convert               PDF as the body or a multipart/form-data
+    #                               file, answered with the .xlsx report
+    #   POST /convert?format=json   answered with the report statistics
+    #   GET  /health                load of the service
+    # Uploads are converted on a pool of `workers` threads that share one
+    # reader and its warm extraction backend: tabula's JVM or the python
+    # engine's processes. At most max_pending uploads wait for a worker,
+    # further ones are turned away with 503 before their body is read.
+    # Clients that take longer than header_timeout or body_timeout to send
+    # their request are answered with 408.
+    max_upload: int = 64 * 1024 * 1024
+    header_timeout: float = 30
+    body_timeout: float = 60
+
+    def __init__(self, settings: Settings, metrics: Metrics):
+        # Caches are cleared once at startup, not by every upload
+        create_cache(settings)
+        self.settings: Settings = replace(settings, clear_cache=False)
+        self.metrics = metrics
+        self.aggregator: Aggregator = Aggregator(settings)
+        engine: ReaderEngine = create_engine(settings)
+        engine.warm_up()
+        self.pages: Executor = engine.executor_type(max_workers=cpu_count())
+        # One reader for all uploads, they share its engine, the pool of
+        # page workers and the memory budget of the pool
+        self.pdf_reader: PDFReader = PDFReader(
+            self.settings,
+            metrics,
+            self.pages,
+            verbose=False,
+            budget=MemoryBudget(settings.memory_budget),
+            engine=engine,
+        )
+        self.workers: ThreadPoolExecutor = ThreadPoolExecutor(
+            max_workers=settings.workers, thread_name_prefix="convert"
+        )
+        self.slots: asyncio.Semaphore = asyncio.Semaphore(settings.workers)
+        # Uploads that are being received, wait for a worker or are converted
+        self.admitted: int = 0
+        self.converting: int = 0
+        self.served: int = 0
+        self.rejected: int = 0
+
+    def run(self) -> None:
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.workers.shutdown()
+            self.pages.shutdown()
+
+    async def serve(self) -> None:
+        stopped: asyncio.Event = asyncio.Event()
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        for stop_signal in [signal.SIGINT, signal.SIGTERM]:
+            try:
+                loop.add_signal_handler(stop_signal, stopped.set)
+            except NotImplementedError:
+                pass
+
+        server: asyncio.Server = await asyncio.start_server(
+            self.handle, self.settings.host, self.settings.serve
+        )
+        print_colored(
+            f"Converting statements on "
+            f"http://{self.settings.host}:{self.settings.serve}/convert, "
+            f"press Ctrl+C to stop",
+            "light_grey",
+        )
+        async with server:
+            await stopped.wait()
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            response: Response = await self.respond(reader, writer)
+        except HttpError as e:
+            response = json_response(e.status, {"error": str(e)})
+            response.headers.update(e.headers)
+        except Exception as e:
+            print_colored(f"Failed to handle a request\n{e}", "light_red")
+            response = json_response(
+                HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+            )
+        try:
+            writer.write(self.encode(response))
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def respond(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> Response:
+        try:
+            request: Request = await asyncio.wait_for(
+                self.read_head(reader), self.header_timeout
+            )
+        except asyncio.TimeoutError:
+            raise HttpError(
+                HTTPStatus.REQUEST_TIMEOUT, "The request head took too long"
+            )
+        if request.path == "/health":
+            self.check_method(request, "GET")
+            return json_response(HTTPStatus.OK, self.health())
+        if request.path != "/convert":
+            raise HttpError(HTTPStatus.NOT_FOUND, f"No endpoint {request.path}")
+        self.check_method(request, "POST")
+
+        output_format: str = request.query.get("format", ["xlsx"])[0]
+        if output_format not in output_formats:
+            raise HttpError(
+                HTTPStatus.BAD_REQUEST,
+                f"Unknown format {output_format}, use one of {output_formats}",
+            )
+        if "content-length" not in request.headers:
+            raise HttpError(HTTPStatus.LENGTH_REQUIRED, "Content-Length is missing")
+        try:
+            length: int = int(request.headers["content-length"])
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Content-Length is malformed")
+        if length > self.max_upload:
+            raise HttpError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                f"Uploads are limited to {self.max_upload // 2**20}MB",
+            )
+
+        # Clients that wait for 100 Continue never send the body of a
+        # rejected upload, the body of other clients is read and dropped
+        expects_continue: bool = request.headers.get("expect") == "100-continue"
+        if self.admitted >= self.settings.workers + self.settings.max_pending:
+            self.rejected += 1
+            if not expects_continue:
+                await self.discard(reader, length)
+            raise HttpError(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                "Too many uploads are being converted, try again later",
+                {"Retry-After": "1"},
+            )
+
+        self.admitted += 1
+        try:
+            if expects_continue:
+                writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            # A client that stalls gives up its place after body_timeout
+            try:
+                body: bytes = await asyncio.wait_for(
+                    reader.readexactly(length), self.body_timeout
+                )
+            except asyncio.TimeoutError:
+                raise HttpError(HTTPStatus.REQUEST_TIMEOUT, "The upload took too long")
+            except asyncio.IncompleteReadError:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "The upload ended early")
+            content_type: str = request.headers.get("content-type", "application/pdf")
+            loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+            async with self.slots:
+                self.converting += 1
+                try:
+                    response: Response = await loop.run_in_executor(
+                        self.workers, self.convert, content_type, body, output_format
+                    )
+                finally:
+                    self.converting -= 1
+            self.served += 1
+            return response
+        finally:
+            self.admitted -= 1
+
+    async def read_head(self, reader: asyncio.StreamReader) -> Request:
+        try:
+            method, target, _ = (await reader.readline()).decode("latin-1").split()
+        except ValueError:
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        headers: Dict[str, str] = {}
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        url = urlsplit(target)
+        return Request(method, url.path, parse_qs(url.query), headers)
+
+    async def discard(self, reader: asyncio.StreamReader, length: int) -> None:
+        while length > 0:
+            chunk: bytes = await reader.read(min(length, 1 << 16))
+            if not chunk:
+                break
+            length -= len(chunk)
+
+    def check_method(self, request: Request, method: str) -> None:
+        if request.method != method:
+            raise HttpError(
+                HTTPStatus.METHOD_NOT_ALLOWED,
+                f"{request.path} only accepts {method}",
+                {"Allow": method},
+            )
+
+    def health(self) -> Dict[str, int]:
+        return {
+            "workers": self.settings.workers,
+            "converting": self.converting,
+            "waiting": self.admitted - self.converting,
+            "served": self.served,
+            "rejected": self.rejected,
+        }
+
+    def encode(self, response: Response) -> bytes:
+        head: List[str] = [
+            f"HTTP/1.1 {response.status.value} {response.status.phrase}",
+            f"Content-Type: {response.content_type}",
+            f"Content-Length: {len(response.body)}",
+            "Connection: close",
+        ] + [f"{name}: {value}" for name, value in response.headers.items()]
+        return ("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response.body
+
+    # Runs on the worker threads
+    def convert(self, content_type: str, body: bytes, output_format: str) -> Response:
+        pdf: bytes = self.upload(content_type, body)
+        metrics: Metrics = Metrics()
+        with tempfile.TemporaryDirectory() as directory:
+            path: str = os.path.join(directory, "statement.pdf")
+            with open(path, "wb") as file:
+                file.write(pdf)
+            settings: Settings = replace(self.settings, files=[path], output=directory)
+
+            # Stages of the reader go straight to the metrics of the service
+            with measure(memory=False) as usage:
+                try:
+                    tables: Dict[str, Table] = self.pdf_reader.read_tables([path])
+                finally:
+                    self.pdf_reader.forget(path)
+            timings: Dict[str, Usage] = {"read": usage}
+            if path not in tables:
+                raise HttpError(
+                    HTTPStatus.UNPROCESSABLE_ENTITY,
+                    "No statement could be read from the upload",
+                )
+            with metrics.stage(Stage.AGGREGATE.value):
+                report: Report = self.aggregator.generate_report(tables[path])
+
+            if output_format == "json":
+                response: Response = json_response(
+                    HTTPStatus.OK, report_statistics(report)
+                )
+            else:
+                with metrics.stage(Stage.WRITE.value):
+                    file_name: str = XslxWriter(settings).write_file(report)
+                with open(file_name, "rb") as file:
+                    response: Response = Response(
+                        HTTPStatus.OK,
+                        xlsx_type,
+                        file.read(),
+                        {
+                            "Content-Disposition": f'attachment; filename="'
+                            f'{os.path.basename(file_name)}"'
+                        },
+                    )
+
+        for name, usage in metrics.stages.items():
+            self.metrics.add_stage(name, usage)
+        timings.update(metrics.stages)
+        response.headers["Server-Timing"] = ", ".join(
+            f"{name};dur={usage.wall * 1000:.1f}" for name, usage in timings.items()
+        )
+        return response
+
+    def upload(self, content_type: str, body: bytes) -> bytes:
+        if content_type.startswith("multipart/form-data"):
+            form = BytesParser(policy=policy.HTTP).parsebytes(
+                f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+            )
+            files: List[bytes] = [
+                part.get_payload(decode=True)
+                for part in form.iter_parts()
+                if part.get_filename()
+            ]
+            if not files:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "The form holds no file")
+            body = files[0]
+        if not body.startswith(b"%PDF"):
+            raise HttpError(
+                HTTPStatus.UNSUPPORTED_MEDIA_TYPE, "The upload is not a PDF file"
+            )
+        return body
@@ -0,0 +1,24 @@
+import os
+from typing import Dict
+
+import pytest
+
+from benchmarks.statements import statement
+from util import Currency
+
+
+@pytest.fixture(scope="session")
+def statements(tmp_path_factory) -> Dict[Currency, str]:
+    # One small synthetic statement of every currency
+    directory = tmp_path_factory.mktemp("statements")
+    paths: Dict[Currency, str] = {}
+    for seed, currency in enumerate(Currency):
+        paths[currency] = os.path.join(directory, f"statement-{currency.value}.pdf")
+        statement(paths[currency], currency, 3, 20, seed)
+    return paths
+
+
+@pytest.fixture(autouse=True)
+def cache_home(tmp_path, monkeypatch):
+    # Runs never share or keep a table cache
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
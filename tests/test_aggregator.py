@@ -0,0 +1,54 @@
+from dataclasses import replace
+from typing import List
+
+import pytest
+
+from aggregator import Aggregator, Report
+from benchmarks.bench_aggregation import same, transactions
+from cli import Settings
+from reader import Table
+from reader.schema import concat_tables
+from util import Currency
+
+
+def same_statistics(expected: Report, actual: Report) -> bool:
+    return same(replace(expected, table=actual.table), actual)
+
+
+def merged(months: List[Table]) -> Table:
+    return Table(
+        concat_tables([month.dataframe for month in months]),
+        Currency.RSD,
+        parts=months,
+    )
+
+
+def test_merged_report_is_the_report_of_all_transactions(tmp_path, monkeypatch):
+    months: List[Table] = [
+        Table(transactions(500, seed=seed), Currency.RSD, f"month-{seed}")
+        for seed in range(3)
+    ]
+    aggregator: Aggregator = Aggregator(
+        Settings(True, [], "", False, cache_dir=str(tmp_path))
+    )
+    # Aggregated from scratch, without parts or a cache
+    expected: Report = Aggregator().generate_report(
+        Table(merged(months).dataframe, Currency.RSD)
+    )
+
+    history: Table = merged(months[:2])
+    assert same_statistics(
+        Aggregator().generate_report(Table(history.dataframe, Currency.RSD)),
+        aggregator.generate_report(history),
+    )
+    report: Report = aggregator.generate_report(merged(months))
+    assert same_statistics(expected, report)
+
+    # Every month is served from its cached partial from now on
+    def classify(df):
+        raise AssertionError("Aggregated again")
+
+    monkeypatch.setattr(aggregator, "classify", classify)
+    assert same_statistics(expected, aggregator.generate_report(merged(months)))
+    with pytest.raises(AssertionError):
+        aggregator.generate_report(Table(transactions(10, seed=9), Currency.RSD, "new"))
@@ -0,0 +1,95 @@
+import os
+from typing import Dict, List
+
+from cli import Settings, Engine, ExtractionMode
+from reader import PDFReader, Table, cache
+from reader.cache import TableCache
+from reader.pythonengine import PythonEngine
+from util import Currency
+
+
+def entry(directory, name: str, size: int, mtime: int) -> str:
+    path: str = os.path.join(directory, name)
+    with open(path, "wb") as file:
+        file.write(b"x" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def test_least_recently_used_entries_of_both_caches_go_first(tmp_path):
+    oldest = entry(tmp_path, "a.feather", 100, 1000)
+    older = entry(tmp_path, "b.partial", 100, 2000)
+    newer = entry(tmp_path, "c.feather", 100, 3000)
+    newest = entry(tmp_path, "d.partial", 100, 4000)
+    other = entry(tmp_path, "e.tmp", 1000, 0)
+
+    cache.evict(str(tmp_path), 250)
+
+    assert not os.path.exists(oldest) and not os.path.exists(older)
+    assert os.path.exists(newer) and os.path.exists(newest)
+    assert os.path.exists(other)
+
+
+def test_entries_evicted_by_someone_else_are_skipped(tmp_path, monkeypatch):
+    paths: List[str] = [
+        entry(tmp_path, f"{idx}.feather", 100, 1000 * (idx + 1)) for idx in range(4)
+    ]
+    listed = cache.entries
+
+    # Another process removes the two oldest entries right after the listing
+    def racing_entries(directory, suffixes):
+        found = listed(directory, suffixes)
+        os.remove(paths[0])
+        os.remove(paths[1])
+        return found
+
+    monkeypatch.setattr(cache, "entries", racing_entries)
+    cache.evict(str(tmp_path), 150)
+
+    assert [os.path.exists(path) for path in paths] == [False, False, False, True]
+
+
+def settings(paths: List[str], **options) -> Settings:
+    return Settings(False, paths, "", False, engine=Engine.PYTHON, **options)
+
+
+def test_statements_are_read_once_and_then_loaded(statements, monkeypatch):
+    paths: List[str] = list(statements.values())
+    read: Dict[str, Table] = PDFReader(settings(paths), verbose=False).read_tables(
+        paths
+    )
+
+    def run(self, task):
+        raise AssertionError(f"{task.file_name} read again")
+
+    monkeypatch.setattr(PythonEngine, "run", run)
+    cached: Dict[str, Table] = PDFReader(settings(paths), verbose=False).read_tables(
+        paths
+    )
+    for path in paths:
+        assert cached[path].dataframe.equals(read[path].dataframe)
+        assert cached[path].currency is read[path].currency
+        assert cached[path].key == read[path].key
+
+    # Bypassing or clearing the cache reads the statements again, and fails
+    for options in [{"use_cache": False}, {"clear_cache": True}]:
+        reader: PDFReader = PDFReader(settings(paths, **options), verbose=False)
+        assert reader.read_tables(paths) == {}
+
+
+def test_key_covers_contents_and_extractor(statements, tmp_path):
+    path: str = statements[Currency.RSD]
+    copy: str = str(tmp_path / "copy.pdf")
+    with open(path, "rb") as source, open(copy, "wb") as target:
+        target.write(source.read())
+
+    table_cache: TableCache = TableCache(str(tmp_path), 1 << 30, {"engine": "python"})
+    other: TableCache = TableCache(str(tmp_path), 1 << 30, {"engine": "tabula"})
+    assert table_cache.key(path) == table_cache.key(copy)
+    assert table_cache.key(path) != other.key(path)
+    assert table_cache.key(path) != table_cache.key(statements[Currency.EUR])
+
+    batched = settings([path], extraction_mode=ExtractionMode.BATCHED)
+    assert PDFReader(batched).cache.key(path) != PDFReader(settings([path])).cache.key(
+        path
+    )
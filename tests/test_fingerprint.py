@@ -0,0 +1,43 @@
+from typing import List
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+
+from benchmarks.bench_aggregation import transactions
+from reader.fingerprint import duplicate_rows, row_fingerprints
+
+
+def test_overlapping_statements_lose_the_rows_an_earlier_one_holds():
+    quarter: DataFrame = transactions(300)
+    months: List[DataFrame] = [
+        quarter.iloc[start : start + 100].reset_index(drop=True)
+        for start in range(0, 300, 100)
+    ]
+    other: DataFrame = transactions(50, seed=1)
+
+    masks: List[np.ndarray] = duplicate_rows([quarter] + months + [other])
+    assert [int(mask.sum()) for mask in masks] == [0, 100, 100, 100, 0]
+
+
+def test_rows_are_compared_once_normalized():
+    table: DataFrame = transactions(20)
+    copy: DataFrame = table.copy()
+    copy["Transaction description"] = "  " + copy["Transaction description"].str.lower()
+    copy["Expense"] = copy["Expense"] + 0.001
+    # Neither the card nor the completion date tell transactions apart
+    copy["Card number"] = pd.NA
+    copy["Completion date"] = copy["Completion date"] + pd.Timedelta(days=2)
+
+    assert (row_fingerprints(table) == row_fingerprints(copy)).all()
+    assert duplicate_rows([table, copy])[1].all()
+
+
+def test_repeated_transactions_only_match_as_often_as_they_repeat():
+    table: DataFrame = transactions(10)
+    twice: DataFrame = pd.concat([table.iloc[[0]]] * 2, ignore_index=True)
+    thrice: DataFrame = pd.concat([table.iloc[[0]]] * 3, ignore_index=True)
+
+    masks: List[np.ndarray] = duplicate_rows([twice, thrice])
+    assert not masks[0].any()
+    assert masks[1].tolist() == [True, True, False]
@@ -0,0 +1,28 @@
+import os
+from typing import Dict, List
+
+from benchmarks.check_import_time import heavy, import_times, loaded
+from benchmarks.statements import statement
+from util import Currency
+
+
+def test_help_loads_no_heavy_library():
+    assert loaded(import_times(["main.py", "-h"]), heavy) == []
+
+
+def test_importing_the_packages_loads_no_heavy_library():
+    times: Dict[str, int] = import_times(
+        ["-c", "import cli, reader, aggregator, writer, pipeline, server, ledger, util"]
+    )
+    assert loaded(times, heavy) == []
+
+
+def test_run_from_the_cache_loads_no_pdf_library(tmp_path):
+    path: str = str(tmp_path / "statement.pdf")
+    statement(path, Currency.RSD, 3, 40)
+    run: List[str] = ["main.py", "-f", path, "--engine", "python", "-o", str(tmp_path)]
+    env: Dict[str, str] = {"XDG_CACHE_HOME": str(tmp_path / "cache")}
+    import_times(run, env)
+
+    times: Dict[str, int] = import_times(run, env)
+    assert loaded(times, ["PyPDF2", "tabula", "jpype", "pyarrow.parquet"]) == []
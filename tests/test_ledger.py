@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import pandas as pd
+
+from benchmarks.bench_aggregation import transactions
+from ledger import Ledger
+from reader import Table
+from util import Currency
+
+
+def test_range_reads_dated_transactions_and_no_range_all(tmp_path):
+    df = transactions(100)
+    df.loc[5, "Transaction date"] = pd.NaT
+    first, last = df["Transaction date"].min(), df["Transaction date"].max()
+    middle = first + (last - first) / 2
+
+    with Ledger(str(tmp_path / "ledger.db")) as ledger:
+        assert ledger.append(Table(df, Currency.RSD)) == 100
+        # Rows that are already in the ledger aren't added again
+        assert ledger.append(Table(df, Currency.RSD)) == 0
+
+        everything = ledger.table(Currency.RSD).dataframe
+        assert len(everything) == 100
+        assert everything["Transaction date"].isna().sum() == 1
+
+        dates = df["Transaction date"]
+        since = ledger.table(Currency.RSD, date_from=middle).dataframe
+        assert len(since) == (dates >= middle.normalize()).sum()
+        until = ledger.table(Currency.RSD, date_to=middle).dataframe
+        assert len(until) == (dates <= middle.normalize()).sum()
+        assert len(since) + len(until) == 99 + (dates == middle.normalize()).sum()
+
+        assert ledger.table(Currency.EUR).dataframe.empty
+        assert ledger.tables(datetime(1990, 1, 1), datetime(1990, 12, 31)) == []
@@ -0,0 +1,25 @@
+from typing import List
+
+from util import metrics
+from util.metrics import Metrics, measure
+
+
+def test_only_the_outermost_measurement_resets_the_peak(monkeypatch):
+    resets: List[int] = []
+    monkeypatch.setattr(metrics, "reset_peak_rss", lambda: resets.append(1))
+
+    with measure() as outer:
+        with measure() as inner:
+            pass
+        with measure(memory=False):
+            pass
+    assert len(resets) == 1
+    assert inner.peak_rss_mb <= outer.peak_rss_mb
+
+    run: Metrics = Metrics()
+    with run.stage("read"):
+        with run.stage("preprocess"):
+            pass
+    with run.stage("write"):
+        pass
+    assert len(resets) == 3
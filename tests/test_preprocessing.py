@@ -0,0 +1,57 @@
+from typing import List
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame
+from pandas.api.types import pandas_dtype
+
+from benchmarks.bench_preprocessing import (
+    raw_pages,
+    legacy_preprocess,
+    legacy_to_schema,
+)
+from reader.pdfreader import column_names_list
+from reader.preprocessing import preprocess
+from reader.schema import foreign_text_column, table_schema
+
+
+def test_same_table_as_the_row_by_row_implementation():
+    pages: List[DataFrame] = raw_pages(2000)
+    expected: DataFrame = legacy_to_schema(
+        legacy_preprocess([page.copy() for page in pages])
+    )
+    assert preprocess(pages).equals(expected)
+
+
+def test_raw_rows_become_typed_transactions():
+    nan = np.nan
+    page: DataFrame = pd.DataFrame(
+        [
+            ["01.02.2023", "02.02.2023", "4242****1234", "MAXI", nan, nan]
+            + ["1,234.50", "0.00", "10,000.00"],
+            [nan, "03.02.2023", nan, "KUPOVINA DEVIZA", "12.50 EUR", "100.00 EUR"]
+            + ["11,720.00", "0.00", "8,765.50"],
+            [nan, nan, nan, nan, nan, "Kurs: 117.2000", nan, nan, nan],
+            ["04.02.2023", "04.02.2023", nan, "PLATA", "7.5", nan]
+            + ["0.00", "50,000.00", "58,765.50"],
+        ],
+        columns=column_names_list,
+    )
+    table: DataFrame = preprocess([page])
+
+    assert list(table.columns) == list(table_schema)
+    assert [dtype.name for dtype in table.dtypes] == [
+        pandas_dtype(dtype).name for dtype in table_schema.values()
+    ]
+    # The "Kurs:" row is dropped, its rate goes to the operation above it
+    assert len(table) == 3
+    assert table["Exchange rate"].tolist()[1] == 117.2
+    assert table["Exchange rate"].isna().tolist() == [True, False, True]
+    # Missing transaction dates are the completion date
+    assert table["Transaction date"][1] == pd.Timestamp(2023, 2, 3)
+    assert table["Expense"].tolist() == [1234.5, 11720.0, 0.0]
+    assert table["Balance"].tolist() == [10000.0, 8765.5, 58765.5]
+    # Foreign amounts that aren't numbers keep their text
+    assert table["Amount in foreign currency"].tolist()[2] == 7.5
+    assert table[foreign_text_column].tolist()[1] == "12.50 EUR"
+    assert table[foreign_text_column].isna().tolist() == [True, False, True]
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+from reader.probe import PdfProbe, probe_pdf
+from util import Currency
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="Linux only")
+@pytest.mark.parametrize("currency", list(Currency))
+def test_probe_finds_pages_and_currency_and_closes_the_file(statements, currency):
+    descriptors: int = len(os.listdir("/proc/self/fd"))
+    probe: PdfProbe = probe_pdf(statements[currency])
+
+    assert probe.num_of_pages == 3
+    assert probe.currency is currency
+    assert probe.size == os.path.getsize(statements[currency])
+    assert len(os.listdir("/proc/self/fd")) == descriptors
+
+
+def test_statements_of_one_layout_share_their_fingerprint(statements):
+    fingerprints = {probe_pdf(path).fingerprint for path in statements.values()}
+    assert len(fingerprints) == 1
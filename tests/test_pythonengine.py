@@ -0,0 +1,40 @@
+from typing import List
+
+import pytest
+
+from reader.pdfreader import PageTask, areas_rsd
+from reader.pythonengine import PythonEngine
+from util import Currency
+
+
+def task(path: str, areas=areas_rsd) -> PageTask:
+    return PageTask(path, [1, 2, 3], 3, areas)
+
+
+def test_page_without_every_column_is_split_like_its_neighbour(statements):
+    engine: PythonEngine = PythonEngine()
+    expected = [
+        result.dataframe for result in engine.run(task(statements[Currency.RSD]))
+    ]
+
+    # The second page shows no gap for one of its columns
+    column_boundaries = engine.column_boundaries
+    calls: List[int] = []
+
+    def short_second_page(runs):
+        calls.append(1)
+        return None if len(calls) == 2 else column_boundaries(runs)
+
+    engine.column_boundaries = short_second_page
+    results = engine.run(task(statements[Currency.RSD]))
+
+    assert len(results) == 3
+    for result, dataframe in zip(results, expected):
+        assert result.dataframe.equals(dataframe)
+
+
+def test_statement_whose_columns_cant_be_found_fails(statements):
+    # Only the first columns lie within the area on every page
+    narrow = {name: area[:3] + [150] for name, area in areas_rsd.items()}
+    with pytest.raises(ValueError, match="can't be told apart"):
+        PythonEngine().run(task(statements[Currency.RSD], narrow))
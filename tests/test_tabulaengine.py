@@ -0,0 +1,66 @@
+from typing import Any, Dict, List
+
+import pytest
+from PyPDF2 import PdfReader
+
+from cli import ExtractionMode
+from reader.pdfreader import areas_eur_usd, areas_rsd
+from reader.pythonengine import PythonEngine
+from reader.tabulaengine import TabulaEngine
+from util import Currency
+
+
+class TextSession:
+    # Stands in for tabula-java: answers with the text of the requested
+    # pages in the requested areas, split into columns by the python engine
+    def __init__(self, path: str):
+        self.pages = PdfReader(path).pages
+        self.engine: PythonEngine = PythonEngine()
+        self.areas: Dict[int, List[float]] = {}
+
+    def extract(
+        self, path: str, pages: int | str, area: List[Any] | None, num_of_pages: int = 1
+    ) -> List[Dict[str, Any]]:
+        if pages == "all":
+            return [
+                self.raw_table(page, page_area)
+                for page in range(1, len(self.pages) + 1)
+                for page_area in area
+            ]
+        self.areas[pages] = area
+        return [self.raw_table(pages, area)]
+
+    def raw_table(self, page: int, area: List[float] | None) -> Dict[str, Any]:
+        runs = self.engine.page_runs(self.pages[page - 1], area or [0, 0, 1e4, 1e4])
+        boundaries = self.engine.column_boundaries(runs)
+        if boundaries is None:
+            return {"data": []}
+        dataframe = self.engine.table(runs, boundaries).astype(str)
+        return {
+            "data": [
+                [{"text": "" if text == "nan" else text} for text in row]
+                for row in dataframe.itertuples(index=False)
+            ]
+        }
+
+
+@pytest.mark.parametrize("currency", list(Currency))
+def test_per_page_and_batched_modes_read_the_same_table(
+    statements, monkeypatch, currency
+):
+    path: str = statements[currency]
+    areas = areas_rsd if currency is Currency.RSD else areas_eur_usd
+    session: TextSession = TextSession(path)
+    monkeypatch.setattr(TabulaEngine, "session", property(lambda _: session))
+
+    per_page = TabulaEngine(ExtractionMode.PER_PAGE).read_pages(path, 3, areas)
+    batched = TabulaEngine(ExtractionMode.BATCHED).read_pages(path, 3, areas)
+
+    assert session.areas == {
+        1: areas["first_page"],
+        2: areas["second_and_other"],
+        3: areas["last_page"],
+    }
+    assert len(per_page) == len(batched) == 3
+    for page, dataframe in zip(per_page, batched):
+        assert not dataframe.empty and page.equals(dataframe)
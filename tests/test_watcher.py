@@ -0,0 +1,84 @@
+import os
+import shutil
+from typing import List
+
+import pytest
+
+from benchmarks.statements import statement
+from cli import Settings, Engine
+from pipeline import Watcher
+from reader import PDFReader
+from util import Currency, Metrics
+from writer import XslxWriter
+
+
+@pytest.fixture
+def folders(tmp_path) -> List[str]:
+    folders: List[str] = [str(tmp_path / "statements"), str(tmp_path / "reports")]
+    for folder in folders:
+        os.makedirs(folder)
+    # Statements of one currency, the later ones reach further
+    for idx, pages in enumerate([2, 3]):
+        path: str = os.path.join(folders[0], f"statement-{idx + 1}.pdf")
+        statement(path, Currency.RSD, pages, 30, idx)
+    return folders
+
+
+def watcher(folders: List[str], merge: bool) -> Watcher:
+    settings: Settings = Settings(
+        merge, [], folders[1], False, engine=Engine.PYTHON, watch=folders[0]
+    )
+    return Watcher(
+        settings, Metrics(), PDFReader(settings, verbose=False), [XslxWriter(settings)]
+    )
+
+
+def look_twice(watched: Watcher) -> List[str]:
+    # Statements are read once they stay the same for two looks
+    watched.poll()
+    return watched.poll()
+
+
+def reports(folders: List[str]) -> List[str]:
+    return sorted(os.listdir(folders[1]))
+
+
+@pytest.mark.parametrize("merge", [False, True])
+def test_reports_of_removed_statements_go_away(folders, merge):
+    watched: Watcher = watcher(folders, merge)
+    assert len(look_twice(watched)) == 2
+    os.remove(os.path.join(folders[0], "statement-2.pdf"))
+    watched.poll()
+
+    # Like watching the statement that is left from the start
+    kept: List[str] = reports(folders)
+    shutil.rmtree(folders[1])
+    os.makedirs(folders[1])
+    look_twice(watcher(folders, merge))
+    assert kept == reports(folders)
+
+    os.remove(os.path.join(folders[0], "statement-1.pdf"))
+    watched.poll()
+    assert reports(folders) == []
+
+
+def test_failed_round_is_done_again(folders, monkeypatch):
+    watched: Watcher = watcher(folders, True)
+    look_twice(watched)
+    merged: List[str] = reports(folders)
+    removed: str = os.path.join(folders[0], "statement-2.pdf")
+    os.remove(removed)
+
+    def fail(reports):
+        raise OSError("Disk full")
+
+    monkeypatch.setattr(watched.writers[0], "generate", fail)
+    with pytest.raises(OSError):
+        watched.poll()
+    assert removed in watched.files and removed in watched.tables
+    assert reports(folders) == merged
+
+    monkeypatch.undo()
+    watched.poll()
+    assert removed not in watched.files and removed not in watched.tables
+    assert reports(folders) != merged
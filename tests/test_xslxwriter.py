@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from aggregator import Aggregator
+from cli import Settings, Engine
+from reader import PDFReader, Table
+from reader.schema import foreign_text_column
+from util import Currency
+from writer import XslxWriter
+from benchmarks.bench_aggregation import transactions
+from .workbook import cells
+
+
+@pytest.fixture
+def table(statements, tmp_path) -> Table:
+    path: str = statements[Currency.RSD]
+    settings: Settings = Settings(
+        False, [path], str(tmp_path), False, engine=Engine.PYTHON, use_cache=False
+    )
+    return PDFReader(settings, verbose=False).read_tables([path])[path]
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_missing_values(table, tmp_path, streaming):
+    df = table.dataframe
+    df.loc[0, ["Completion date", "Exchange rate", "Card number"]] = [
+        pd.NaT,
+        np.nan,
+        np.nan,
+    ]
+    df.loc[1, ["Amount in foreign currency", foreign_text_column]] = [
+        np.nan,
+        "12.50 EUR",
+    ]
+    df.loc[2, ["Amount in foreign currency", foreign_text_column]] = [7.5, pd.NA]
+    df.loc[3, ["Amount in foreign currency", foreign_text_column]] = [np.nan, pd.NA]
+
+    settings: Settings = Settings(
+        False, [], str(tmp_path), False, use_cache=False, streaming=streaming
+    )
+    report = Aggregator().generate_report(table)
+    values = cells(XslxWriter(settings).write_file(report))
+
+    # The header is on row 2, the first transaction on row 3
+    assert values["B2"] == "Transaction date"
+    assert [values[f"{column}2"] for column in "FGH"] == [
+        "Amount in foreign currency",
+        "Amount in original currency",
+        "Exchange rate",
+    ]
+    # Dates and exchange rates are left empty, other columns say so
+    assert "C3" not in values
+    assert "H3" not in values
+    assert values["D3"] == "No information"
+    # Foreign amounts are numbers, or the text that isn't one
+    assert values["F4"] == "12.50 EUR"
+    assert values["F5"] == 7.5
+    assert values["F6"] == "No information"
+
+
+@pytest.mark.parametrize("streaming", [False, True])
+def test_cells_share_their_formats(tmp_path, streaming):
+    formats = []
+    for rows in [200, 2000]:
+        settings: Settings = Settings(
+            False, [], str(tmp_path / str(rows)), False, streaming=streaming
+        )
+        os.makedirs(settings.output)
+        report = Aggregator().generate_report(Table(transactions(rows), Currency.RSD))
+        xslx_writer: XslxWriter = XslxWriter(settings)
+        xslx_writer.write_file(report)
+        formats.append(len(xslx_writer.workbook.formats))
+
+    # One Format per look of a cell, however many cells there are
+    assert formats[0] == formats[1] <= 32
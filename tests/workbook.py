@@ -0,0 +1,32 @@
+import zipfile
+from typing import Dict, Any
+from xml.etree import ElementTree
+
+namespace: str = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+
+
+def cells(path: str, sheet: int = 1) -> Dict[str, Any]:
+    # Values of the written cells of a sheet by their reference, e.g. "B3".
+    # Cells without a value, like blank ones, are left out.
+    with zipfile.ZipFile(path) as workbook:
+        shared: list = []
+        if "xl/sharedStrings.xml" in workbook.namelist():
+            root = ElementTree.fromstring(workbook.read("xl/sharedStrings.xml"))
+            shared = [
+                "".join(text.text or "" for text in item.iter(f"{namespace}t"))
+                for item in root.findall(f"{namespace}si")
+            ]
+        root = ElementTree.fromstring(workbook.read(f"xl/worksheets/sheet{sheet}.xml"))
+
+    values: Dict[str, Any] = {}
+    for cell in root.iter(f"{namespace}c"):
+        value = cell.find(f"{namespace}v")
+        if cell.get("t") == "s":
+            values[cell.get("r")] = shared[int(value.text)]
+        elif cell.get("t") == "inlineStr":
+            values[cell.get("r")] = "".join(
+                text.text or "" for text in cell.iter(f"{namespace}t")
+            )
+        elif value is not None:
+            values[cell.get("r")] = float(value.text)
+    return values
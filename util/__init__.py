@@ -1,2 +1,3 @@
 from .util import print_colored, Currency, to_datetime, try_format_float
 from .colors import Colors
+from .metrics import Metrics, Usage, measure, peak_rss_mb
@@ -0,0 +1,224 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from threading import Lock
+from typing import List, Dict, Any, Callable, Iterator
+
+from .util import print_colored
+
+
+@dataclass
+class Usage:
+    wall: float = 0.0
+    cpu: float = 0.0
+    # None where memory can't be told apart, e.g. pages read on threads
+    peak_rss_mb: float | None = None
+
+
+def reset_peak_rss() -> None:
+    # Resets VmHWM of this process (Linux only), elsewhere the peak
+    # stays the peak since the process started
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_mb() -> float:
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# Measurements of memory running in this process. Only the outermost one
+# resets the peak, nested and concurrent ones (stages on the service's
+# worker threads) read the peak since then instead of clearing it.
+measuring_lock: Lock = Lock()
+measuring: int = 0
+
+
+def forget_measurements() -> None:
+    # Processes forked during a stage (the python engine's workers) measure
+    # their pages from scratch
+    global measuring, measuring_lock
+    measuring_lock = Lock()
+    measuring = 0
+
+
+os.register_at_fork(after_in_child=forget_measurements)
+
+
+@contextmanager
+def measure(
+    memory: bool = True, cpu_clock: Callable[[], float] = time.process_time
+) -> Iterator[Usage]:
+    global measuring
+    usage: Usage = Usage()
+    if memory:
+        with measuring_lock:
+            if measuring == 0:
+                reset_peak_rss()
+            measuring += 1
+    start: float = time.perf_counter()
+    start_cpu: float = cpu_clock()
+    try:
+        yield usage
+    finally:
+        usage.wall = time.perf_counter() - start
+        usage.cpu = cpu_clock() - start_cpu
+        if memory:
+            usage.peak_rss_mb = peak_rss_mb()
+            with measuring_lock:
+                measuring -= 1
+
+
+class Metrics:
+    # Wall time, CPU time and peak memory of every stage, input file and page
+    # of a run. CPU time of pages is measured where they are read, on the
+    # reader's worker threads or processes.
+    # One named stage can be run under cProfile or tracemalloc.
+    def __init__(
+        self,
+        output: str | None = None,
+        profile_stage: str | None = None,
+        profiler: str = "cprofile",
+    ):
+        self.output = output
+        self.profile_stage = profile_stage
+        self.profiler = profiler
+        self.lock: Lock = Lock()
+        self.stages: Dict[str, Usage] = {}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.profile: Dict[str, Any] = {}
+        # Seconds until the first report was written
+        self.first_output: float | None = None
+        self.start: float = time.perf_counter()
+        self.start_cpu: float = time.process_time()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Usage]:
+        with measure() as usage:
+            if name == self.profile_stage:
+                with self.profiled(name):
+                    yield usage
+            else:
+                yield usage
+        self.add_stage(name, usage)
+
+    def add_stage(self, name: str, usage: Usage) -> None:
+        with self.lock:
+            if name in self.stages:
+                usage = self.combine([self.stages[name], usage])
+            self.stages[name] = usage
+
+    def add_file(self, path: str, stage: str, usage: Usage | str | float) -> None:
+        with self.lock:
+            self.files.setdefault(path, {"pages": []})[stage] = usage
+
+    def forget_file(self, path: str) -> None:
+        with self.lock:
+            self.files.pop(path, None)
+
+    def add_pages(self, path: str, pages: List[int], usages: List[Usage]) -> None:
+        with self.lock:
+            file: Dict[str, Any] = self.files.setdefault(path, {"pages": []})
+            for page, usage in zip(pages, usages):
+                file["pages"].append({"page": page, **asdict(usage)})
+            file["pages"].sort(key=lambda p: p["page"])
+
+    def combine(self, usages: List[Usage]) -> Usage:
+        peaks: List[float] = [u.peak_rss_mb for u in usages if u.peak_rss_mb]
+        return Usage(
+            sum(usage.wall for usage in usages),
+            sum(usage.cpu for usage in usages),
+            max(peaks) if peaks else None,
+        )
+
+    @contextmanager
+    def profiled(self, name: str) -> Iterator[None]:
+        if self.profiler == "tracemalloc":
+            tracemalloc.start()
+            try:
+                yield
+            finally:
+                snapshot = tracemalloc.take_snapshot()
+                peak: int = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.profile = {
+                    "stage": name,
+                    "profiler": "tracemalloc",
+                    "peak_traced_mb": peak / 2**20,
+                    "top": [
+                        {
+                            "line": str(stat.traceback),
+                            "size_kb": stat.size / 1024,
+                            "count": stat.count,
+                        }
+                        for stat in snapshot.statistics("lineno")[:20]
+                    ],
+                }
+        else:
+            profile: cProfile.Profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                stream: io.StringIO = io.StringIO()
+                stats: pstats.Stats = pstats.Stats(profile, stream=stream)
+                stats.sort_stats("cumulative").print_stats(20)
+                self.profile = {
+                    "stage": name,
+                    "profiler": "cprofile",
+                    "top": stream.getvalue().strip().splitlines(),
+                }
+                if self.output:
+                    self.profile["stats_file"] = f"{self.output}.{name}.prof"
+                    stats.dump_stats(self.profile["stats_file"])
+
+    def report(self) -> Dict[str, Any]:
+        files: Dict[str, Dict[str, Any]] = {}
+        for path, file in self.files.items():
+            files[path] = {
+                stage: asdict(usage) if isinstance(usage, Usage) else usage
+                for stage, usage in file.items()
+            }
+        return {
+            "total": asdict(
+                Usage(
+                    time.perf_counter() - self.start,
+                    time.process_time() - self.start_cpu,
+                    max(
+                        [peak_rss_mb()]
+                        + [u.peak_rss_mb for u in self.stages.values() if u.peak_rss_mb]
+                    ),
+                )
+            ),
+            "first_output": self.first_output,
+            "stages": {name: asdict(usage) for name, usage in self.stages.items()},
+            "files": files,
+            "profile": self.profile,
+        }
+
+    def write(self) -> None:
+        if not self.output:
+            # Without a report file the profile goes to the console
+            for line in self.profile.get("top", []):
+                print(line if isinstance(line, str) else json.dumps(line))
+            return
+        with open(self.output, "w") as file:
+            json.dump(self.report(), file, indent=2)
+        print_colored(f"Metrics written to {self.output}", "light_grey")
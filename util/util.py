@@ -1,7 +1,6 @@
 from datetime import datetime
 from enum import Enum
 
-import pandas as pd
 from termcolor import colored
 
 
@@ -12,6 +11,8 @@ class Currency(Enum):
 
 
 def to_datetime(date: str) -> datetime | str:
+    import pandas as pd
+
     date_format = "%d.%m.%Y"
     return datetime.strptime(date, date_format) if not pd.isna(date) else ""
 
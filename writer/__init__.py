@@ -1 +1,17 @@
-from .xslxwriter import XslxWriter
+from importlib import import_module
+from typing import Any, Dict
+
+# Names are imported from their modules on first use (PEP 562),
+# so only the writers of the selected formats load their libraries
+exports: Dict[str, str] = {
+    "XslxWriter": ".xslxwriter",
+    "ColumnarWriter": ".columnarwriter",
+    "ReportWriter": ".reportwriter",
+    "report_statistics": ".columnarwriter",
+}
+
+
+def __getattr__(name: str) -> Any:
+    if name in exports:
+        return getattr(import_module(exports[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,123 @@
+import json
+import math
+import os
+from dataclasses import asdict
+from datetime import datetime
+from enum import Enum
+from typing import List, Dict, Any
+
+import pyarrow as pa
+from tqdm import tqdm
+
+from aggregator import Report
+from cli import Settings, OutputFormat
+from .reportwriter import ReportWriter
+
+
+class ColumnarWriter(ReportWriter):
+    # Writes the typed transactions of every report as Parquet, Feather
+    # and/or CSV, and the statistics of the report to a JSON file next to them.
+    # The arrow table of a report is built once and shared by all formats.
+    def __init__(self, settings: Settings):
+        self.settings = settings
+        self.formats: List[OutputFormat] = [
+            output_format
+            for output_format in settings.formats
+            if output_format is not OutputFormat.XLSX
+        ]
+
+    def generate(self, reports: List[Report]) -> None:
+        progress = tqdm(
+            total=len(reports),
+            colour="green",
+            desc=f"Generating {', '.join(f.value for f in self.formats)}: ",
+        )
+        for report in reports:
+            self.write_file(report)
+            progress.update(1)
+
+        progress.set_description("Generating columnar files complete!")
+        progress.close()
+
+    def write_file(self, report: Report) -> None:
+        file_name: str = self.base_name(report)
+        table: pa.Table = pa.Table.from_pandas(
+            report.table.dataframe, preserve_index=False
+        )
+        for output_format in self.formats:
+            self.write_table(table, f"{file_name}.{output_format.value}", output_format)
+        self.write_statistics(report, f"{file_name}.json")
+
+    def file_names(self, reports: List[Report]) -> List[str]:
+        return [
+            f"{self.base_name(report)}.{extension}"
+            for report in reports
+            for extension in [f.value for f in self.formats] + ["json"]
+        ]
+
+    def base_name(self, report: Report) -> str:
+        return os.path.join(
+            self.settings.output,
+            f"Report-{report.currency.name}-"
+            f"{report.from_date.strftime('%d.%b.%Y')}-"
+            f"{report.to_date.strftime('%d.%b.%Y')}",
+        )
+
+    def write_table(
+        self, table: pa.Table, file_name: str, output_format: OutputFormat
+    ) -> None:
+        if output_format is OutputFormat.PARQUET:
+            from pyarrow import parquet
+
+            parquet.write_table(table, file_name)
+        elif output_format is OutputFormat.FEATHER:
+            from pyarrow import feather
+
+            feather.write_feather(table, file_name)
+        elif output_format is OutputFormat.CSV:
+            from pyarrow import csv
+
+            # Transactions only have dates, CSV would spell out the time
+            schema: pa.Schema = pa.schema(
+                [
+                    pa.field(f.name, pa.date32())
+                    if pa.types.is_timestamp(f.type)
+                    else f
+                    for f in table.schema
+                ]
+            )
+            csv.write_csv(table.cast(schema), file_name)
+
+    def write_statistics(self, report: Report, file_name: str) -> None:
+        with open(file_name, "w", encoding="utf-8") as file:
+            json.dump(report_statistics(report), file, ensure_ascii=False, indent=2)
+
+
+def report_statistics(report: Report) -> Dict[str, Any]:
+    # Everything of the report but its transactions, as plain JSON values
+    return to_json(
+        {
+            "currency": report.currency,
+            "from_date": report.from_date,
+            "to_date": report.to_date,
+            "income": asdict(report.income),
+            "expenses": asdict(report.expenses),
+        }
+    )
+
+
+def to_json(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(item) for item in value]
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, "item"):
+        # numpy scalars
+        return to_json(value.item())
+    return value
@@ -0,0 +1,71 @@
+from typing import List, Dict, Any
+
+import numpy as np
+import pandas as pd
+from pandas import DataFrame, Series
+from xlsxwriter.format import Format
+from xlsxwriter.worksheet import Worksheet
+
+
+class ColumnWidths:
+    # Column widths in characters, estimated from the dataframe with
+    # vectorized string lengths and from every other cell written to
+    # the sheet, instead of letting xlsxwriter walk all stored cells
+    max_width: float = 80.0
+    date_width: int = len("dd.mm.yyyy")
+
+    def __init__(self):
+        self.widths: Dict[int, float] = {}
+
+    def add(self, col: int, width: float) -> None:
+        if width > self.widths.get(col, 0):
+            self.widths[col] = width
+
+    def add_value(self, col: int, value: Any) -> None:
+        if isinstance(value, str):
+            self.add(col, len(value))
+        elif value is not None:
+            self.add(col, len(f"{value}"))
+
+    def add_dataframe(
+        self,
+        df: DataFrame,
+        first_col: int,
+        na_rep: str,
+        sample: int = 0,
+        blank_columns: List[str] | None = None,
+    ) -> None:
+        # Missing values show na_rep, except in blank_columns
+        self.add(first_col, len(f"{len(df)}"))
+        # Widths of very big tables are estimated from a sample of rows
+        if sample and len(df) > sample:
+            df = df.sample(sample, random_state=0)
+
+        for col, name in enumerate(df.columns, first_col + 1):
+            column: Series = df[name]
+            # Header cells use a 12pt font
+            self.add(col, len(name) * 12 / 11)
+            values: Series = column.dropna()
+            if len(values) < len(column) and name not in (blank_columns or []):
+                self.add(col, len(na_rep))
+            if values.empty:
+                continue
+            if pd.api.types.is_datetime64_any_dtype(values):
+                self.add(col, self.date_width)
+            elif pd.api.types.is_numeric_dtype(values):
+                self.add(col, self.number_width(values.to_numpy(dtype=float)))
+            else:
+                self.add(col, values.astype("string").str.len().max())
+
+    def number_width(self, values: np.ndarray) -> int:
+        # Integer digits, sign and up to two decimals as Excel shows them
+        digits: np.ndarray = np.floor(np.log10(np.maximum(np.abs(values), 1))) + 1
+        decimals: np.ndarray = np.where(values != np.round(values), 3, 0)
+        return int((digits + decimals + (values < 0)).max())
+
+    def apply(self, sheet: Worksheet, formats: Dict[int, Format]) -> None:
+        for col in sorted(set(self.widths) | set(formats)):
+            width: float | None = self.widths.get(col)
+            if width is not None:
+                width = min(width + 1, self.max_width)
+            sheet.set_column(col, col, width, formats.get(col))
@@ -0,0 +1,20 @@
+from typing import Dict, Any, Tuple
+
+from xlsxwriter import Workbook
+from xlsxwriter.format import Format
+
+
+class FormatRegistry:
+    # One Format per distinct set of properties in a workbook,
+    # every cell written with the same properties shares it
+    def __init__(self, workbook: Workbook):
+        self.workbook = workbook
+        self.formats: Dict[Tuple[Tuple[str, Any], ...], Format] = {}
+
+    def get(self, properties: Dict[str, Any]) -> Format:
+        key: Tuple[Tuple[str, Any], ...] = tuple(sorted(properties.items()))
+        format: Format | None = self.formats.get(key)
+        if format is None:
+            format = self.workbook.add_format(properties)
+            self.formats[key] = format
+        return format
@@ -0,0 +1,20 @@
+from abc import ABC, abstractmethod
+from typing import List
+
+from aggregator import Report
+
+
+class ReportWriter(ABC):
+    @abstractmethod
+    def generate(self, reports: List[Report]) -> None:
+        ...
+
+    # Writes the files of one report on their own
+    @abstractmethod
+    def write_file(self, report: Report) -> None:
+        ...
+
+    # Paths of the files generate() writes for the reports
+    @abstractmethod
+    def file_names(self, reports: List[Report]) -> List[str]:
+        ...
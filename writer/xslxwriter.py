@@ -1,13 +1,20 @@
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import replace
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Tuple, Callable, Any, Dict
 
+import numpy as np
 import pandas as pd
+from pandas import DataFrame, Series
 from tqdm import tqdm
 from xlsxwriter import Workbook
 from xlsxwriter.format import Format
 from xlsxwriter.worksheet import Worksheet
 
 from util.colors import Colors
+from .columnwidths import ColumnWidths
+from .formatregistry import FormatRegistry
+from .reportwriter import ReportWriter
 from aggregator import (
     Report,
     Income,
@@ -16,22 +23,52 @@ from aggregator import (
     Top5Payment,
     CurrencyOperation,
 )
-from cli import Settings
+from cli import Settings, ShardPeriod
+from reader import Table
+from reader.schema import foreign_text_column
 from util import Currency, try_format_float
 
+# Day zero of Excel serial dates (1900 date system, valid from March 1900)
+excel_epoch: pd.Timestamp = pd.Timestamp(1899, 12, 30)
 
-class XslxWriter:
+# Rows of one Excel worksheet
+excel_max_rows: int = 1_048_576
+
+# Columns whose missing values are empty cells, the others show na_rep
+blank_columns: List[str] = ["Transaction date", "Completion date", "Exchange rate"]
+
+shard_frequencies: Dict[ShardPeriod, str] = {
+    ShardPeriod.MONTH: "M",
+    ShardPeriod.QUARTER: "Q",
+    ShardPeriod.YEAR: "Y",
+}
+
+
+class XslxWriter(ReportWriter):
+    na_rep: str = "No information"
+    chunk_size: int = 10_000
+    writer: pd.ExcelWriter | None
     sheet: Worksheet | None
     workbook: Workbook | None
+    formats: FormatRegistry | None
+    column_widths: ColumnWidths
+    column_formats: Dict[int, Format]
     row_count: int
     settings: Settings
 
     def __init__(self, settings: Settings):
         self.settings = settings
         self.row_count = 0
+        self.writer: pd.ExcelWriter | None = None
         self.workbook: Workbook | None = None
+        self.formats: FormatRegistry | None = None
+        self.column_widths: ColumnWidths = ColumnWidths()
+        self.column_formats: Dict[int, Format] = {}
         self.sheet: Worksheet | None = None
 
+    def generate(self, reports: List[Report]) -> None:
+        self.generate_xlsx(reports)
+
     def generate_xlsx(self, reports: List[Report]):
         progress = tqdm(
             total=len(reports), colour="green", desc="Generating XSLXs: ", initial=1
@@ -45,112 +82,397 @@ class XslxWriter:
         usd_reports: List[Report] = list(
             filter(lambda r: r.currency == Currency.USD, reports)
         )
-        for curr_report in [rsd_reports, usd_reports, eur_reports]:
-            if len(curr_report) == 0:
-                continue
-
-            if self.settings.single_file:
-                file_name: str = (
-                    f"{self.settings.output}/Report-{curr_report[0].currency.name}.xlsx"
+        currency_reports: List[List[Report]] = [rsd_reports, usd_reports, eur_reports]
+
+        if self.settings.single_file:
+            for curr_report in currency_reports:
+                if len(curr_report) == 0:
+                    continue
+                file_name: str = self.workbook_name(curr_report[0].currency)
+                self.open_workbook(
+                    file_name, max(report.to_date for report in curr_report)
                 )
-
-                writer = pd.ExcelWriter(
-                    file_name,
-                    engine="xlsxwriter",
-                    datetime_format="dd.mm.yyyy",
-                )
-
-            for report in curr_report:
+                for report in curr_report:
+                    progress.update(1)
+                    self.write_sheet(report)
+                self.close_workbook()
+        elif self.settings.jobs > 1:
+            self.write_files_in_parallel(sum(currency_reports, []), progress)
+        else:
+            for report in sum(currency_reports, []):
                 progress.update(1)
-                from_date_printable: str = report.from_date.strftime("%d.%b.%Y")
-                to_date_printable: str = report.to_date.strftime("%d.%b.%Y")
-
-                if not self.settings.single_file:
-                    file_name: str = (
-                        f"{self.settings.output}/"
-                        f"Report-{report.currency.name}-"
-                        f"{from_date_printable}-"
-                        f"{to_date_printable}.xlsx"
-                    )
-
-                    writer = pd.ExcelWriter(
-                        file_name,
-                        engine="xlsxwriter",
-                        datetime_format="dd.mm.yyyy",
-                    )
-
-                sheet_name: str = f"{from_date_printable}-{to_date_printable}"
-
-                self.workbook = writer.book
-                self.workbook.add_worksheet(sheet_name)
-                self.sheet: Worksheet = writer.sheets[sheet_name]
-                self.row_count = 0
-
-                self.add_section_header(
-                    self.row_count, 1, 15, height=30, title="General report"
+                self.write_file(report)
+
+        progress.set_description("Generating xslx complete!")
+        progress.close()
+
+    def write_files_in_parallel(self, reports: List[Report], progress: tqdm) -> None:
+        # Every worker gets only the table of its own report,
+        # merged tables are sent without the statements they came from
+        with ProcessPoolExecutor(max_workers=self.settings.jobs) as executor:
+            futures: List[Future] = [
+                executor.submit(
+                    write_report_file,
+                    self.settings,
+                    replace(
+                        report,
+                        table=Table(report.table.dataframe, report.table.currency),
+                    ),
                 )
+                for report in reports
+            ]
+            for future in as_completed(futures):
+                future.result()
+                progress.update(1)
 
-                printable_df = report.table.dataframe
+    def write_file(self, report: Report) -> str:
+        file_name: str = self.file_name(report)
+        self.open_workbook(file_name, report.to_date)
+        self.write_sheet(report)
+        self.close_workbook()
+        return file_name
+
+    def file_names(self, reports: List[Report]) -> List[str]:
+        if self.settings.single_file:
+            return [
+                self.workbook_name(currency)
+                for currency in Currency
+                if any(report.currency is currency for report in reports)
+            ]
+        return [self.file_name(report) for report in reports]
+
+    def file_name(self, report: Report) -> str:
+        from_date_printable, to_date_printable = self.printable_period(report)
+        return (
+            f"{self.settings.output}/"
+            f"Report-{report.currency.name}-"
+            f"{from_date_printable}-"
+            f"{to_date_printable}.xlsx"
+        )
 
-                (max_row, max_col) = printable_df.shape
+    def workbook_name(self, currency: Currency) -> str:
+        return f"{self.settings.output}/Report-{currency.name}.xlsx"
 
-                self.sheet.add_table(
-                    1,
-                    0,
-                    max_row + 1,
-                    max_col,
-                    {"autofilter": True, "style": f"Table Style Medium 9"},
-                )
+    def write_sheet(self, report: Report) -> None:
+        from_date_printable, to_date_printable = self.printable_period(report)
+        sheet_name: str = f"{from_date_printable}-{to_date_printable}"
+        shards: List[Tuple[str, DataFrame]] = self.shards(report.table.dataframe)
 
-                my_format = self.workbook.add_format()
-                my_format.set_align("vcenter")
-                self.workbook.add_format({"num_format": "$#,##0.00"})
+        if shards:
+            self.write_sharded_report(report, sheet_name, shards)
+        elif self.settings.streaming:
+            self.write_report_streaming(report, sheet_name)
+        else:
+            self.write_report(report, sheet_name)
 
-                self.sheet.autofilter(1, 0, max_row + 1, max_col)
+    def printable_period(self, report: Report) -> Tuple[str, str]:
+        return report.from_date.strftime("%d.%b.%Y"), report.to_date.strftime(
+            "%d.%b.%Y"
+        )
 
-                # Convert the dataframe to an XlsxWriter Excel object.
-                printable_df.to_excel(
-                    writer, sheet_name=sheet_name, startrow=1, startcol=0
-                )
+    def open_workbook(self, file_name: str, created: datetime) -> None:
+        if self.settings.streaming:
+            # Rows are flushed to disk as soon as the next row is started
+            self.writer = None
+            self.workbook = Workbook(file_name, {"constant_memory": True})
+        else:
+            self.writer = pd.ExcelWriter(
+                file_name,
+                engine="xlsxwriter",
+                datetime_format="dd.mm.yyyy",
+            )
+            self.workbook = self.writer.book
+        # The creation time is the only thing that would make two runs
+        # over the same statements write different bytes
+        self.workbook.set_properties({"created": created})
+        self.formats = FormatRegistry(self.workbook)
+
+    def close_workbook(self) -> None:
+        # Close the Pandas Excel writer and output the Excel file.
+        if self.writer is not None:
+            self.writer.close()
+        else:
+            self.workbook.close()
+
+    def write_report(self, report: Report, sheet_name: str) -> None:
+        self.workbook.add_worksheet(sheet_name)
+        self.sheet: Worksheet = self.writer.sheets[sheet_name]
+        self.start_sheet()
+
+        self.add_section_header(
+            self.row_count, 1, 15, height=30, title="General report"
+        )
 
-                for col_num, value in enumerate(printable_df.columns.values):
-                    self.sheet.write(
-                        1,
-                        col_num + 1,
-                        value,
-                        self.workbook.add_format({"font_size": 12}),
-                    )
+        printable_df = report.table.dataframe
 
-                for row_num, row in printable_df.iterrows():
-                    if not pd.isna(row["Card number"]):
-                        self.sheet.write(
-                            row_num + 2,
-                            3,
-                            row["Card number"],
-                            self.workbook.add_format({"align": "right"}),
-                        )
+        self.write_transactions(printable_df)
 
-                self.sheet.write(1, 0, "№")
+        self.advance_row_pointer(len(printable_df) + 2)
 
-                self.advance_row_pointer(len(printable_df) + 2)
+        self.add_report_income_expense_stats(report)
 
-                self.add_report_income_expense_stats(report)
+        self.add_income_report(report.income)
 
-                self.add_income_report(report.income)
+        self.add_expenses_report(report.expenses)
 
-                self.add_expenses_report(report.expenses)
+        self.column_widths.apply(self.sheet, self.column_formats)
 
-                self.sheet.autofit()
+    def write_report_streaming(self, report: Report, sheet_name: str) -> None:
+        # Same content as write_report, written strictly top to bottom.
+        self.sheet = self.workbook.add_worksheet(sheet_name)
+        self.start_sheet()
+        self.add_section_header(
+            self.row_count, 1, 15, height=30, title="General report"
+        )
 
-                # Close the Pandas Excel writer and output the Excel file.
-                if not self.settings.single_file:
-                    writer.close()
+        printable_df: DataFrame = report.table.dataframe
+        self.write_transactions(printable_df)
+        self.advance_row_pointer(len(printable_df) + 2)
 
-            if self.settings.single_file:
-                writer.close()
+        self.add_report_income_expense_stats(report)
+        self.add_income_report(report.income)
+        self.add_expenses_streaming_report(report.expenses)
+        self.column_widths.apply(self.sheet, self.column_formats)
 
-            progress.set_description("Generating xslx complete!")
-            progress.close()
+    def write_sharded_report(
+        self, report: Report, sheet_name: str, shards: List[Tuple[str, DataFrame]]
+    ) -> None:
+        # Statistics of the whole table go to a summary sheet that links
+        # to the sheets holding the parts of the transactions
+        shard_names: List[str] = [
+            self.unique_sheet_name(f"{sheet_name} #{number}")
+            for number in range(1, len(shards) + 1)
+        ]
+        self.sheet = self.workbook.add_worksheet(sheet_name)
+        self.start_sheet()
+        self.add_section_header(
+            self.row_count, 1, 15, height=30, title="General report"
+        )
+        self.add_section_header(self.row_count, 1, 3, "Transactions")
+        for shard_name, (label, shard) in zip(shard_names, shards):
+            self.sheet.write_url(
+                self.row_count, 1, f"internal:'{shard_name}'!A1", string=label
+            )
+            self.write(self.row_count, 2, f"{len(shard)} transactions")
+            self.advance_row_pointer()
+        self.advance_row_pointer()
+
+        self.add_report_income_expense_stats(report)
+        self.add_income_report(report.income)
+        if self.settings.streaming:
+            self.add_expenses_streaming_report(report.expenses)
+        else:
+            self.add_expenses_report(report.expenses)
+        self.column_widths.apply(self.sheet, self.column_formats)
+
+        for shard_name, (label, shard) in zip(shard_names, shards):
+            self.sheet = self.workbook.add_worksheet(shard_name)
+            self.start_sheet()
+            self.add_section_header(
+                self.row_count, 1, 15, height=30, title=f"Transactions {label}"
+            )
+            self.write_transactions(shard)
+            self.column_widths.apply(self.sheet, self.column_formats)
+
+    def shards(self, df: DataFrame) -> List[Tuple[str, DataFrame]]:
+        # Tables longer than the row budget (and never longer than an Excel
+        # sheet) are split into parts, by calendar period if one is chosen
+        max_rows: int = min(
+            self.settings.shard_rows or excel_max_rows, excel_max_rows - 2
+        )
+        if self.settings.shard_period is None:
+            if len(df) <= max_rows:
+                return []
+            periods: List[Tuple[str, DataFrame]] = [("Rows", df)]
+        else:
+            periods: List[Tuple[str, DataFrame]] = [
+                ("No date" if pd.isna(period) else f"{period}", part)
+                for period, part in df.groupby(
+                    df["Transaction date"].dt.to_period(
+                        shard_frequencies[self.settings.shard_period]
+                    ),
+                    dropna=False,
+                    sort=True,
+                )
+            ]
+
+        shards: List[Tuple[str, DataFrame]] = []
+        for label, part in periods:
+            if self.settings.shard_period is not None and len(part) <= max_rows:
+                shards.append((label, part))
+                continue
+            for start in range(0, len(part), max_rows):
+                rows: DataFrame = part.iloc[start : start + max_rows]
+                shards.append(
+                    (f"{label} {rows.index[0] + 1}-{rows.index[-1] + 1}", rows)
+                )
+        return shards
+
+    def unique_sheet_name(self, name: str) -> str:
+        # Excel sheet names are at most 31 characters
+        unique_name: str = name[:31]
+        taken: List[str] = [sheet.lower() for sheet in self.workbook.sheetnames]
+        copy: int = 2
+        while unique_name.lower() in taken:
+            suffix: str = f" ({copy})"
+            unique_name = name[: 31 - len(suffix)] + suffix
+            copy += 1
+        return unique_name
+
+    def write_transactions(self, df: DataFrame) -> None:
+        # Foreign amounts that aren't numbers show their text in the cell of
+        # the amount instead of a column of their own
+        texts: Series | None = df.get(foreign_text_column)
+        if texts is not None:
+            df = df.drop(columns=foreign_text_column)
+        (max_row, max_col) = df.shape
+
+        # Tables need every cell in memory, so streaming sheets
+        # only get an autofilter
+        if not self.settings.streaming:
+            self.sheet.add_table(
+                1,
+                0,
+                max_row + 1,
+                max_col,
+                {
+                    "autofilter": True,
+                    "style": f"Table Style Medium 9",
+                    "columns": [{"header": name} for name in ["№", *df.columns]],
+                },
+            )
+
+        self.sheet.autofilter(1, 0, max_row + 1, max_col)
+
+        self.column_widths.add_dataframe(
+            df, 0, self.na_rep, self.settings.width_sample, blank_columns
+        )
+        if texts is not None and texts.notna().any():
+            self.column_widths.add(
+                df.columns.get_loc("Amount in foreign currency") + 1,
+                texts.str.len().max(),
+            )
+        if self.settings.streaming:
+            self.write_rows(df, 1, texts)
+        else:
+            self.write_columns(df, 1, texts)
+
+    def start_sheet(self) -> None:
+        self.row_count = 0
+        self.column_widths = ColumnWidths()
+        self.column_formats = {}
+
+    def write(self, row: int, col: int, value: Any, format: Format = None) -> None:
+        self.column_widths.add_value(col, value)
+        self.sheet.write(row, col, value, format)
+
+    def write_columns(
+        self, df: DataFrame, header_row: int, texts: Series | None = None
+    ) -> None:
+        # Every column is converted once and written with the cell type of
+        # its dtype, number formats and alignment are kept for whole columns
+        first_row: int = header_row + 1
+        rows: np.ndarray = np.arange(first_row, first_row + len(df))
+
+        self.write(header_row, 0, "№")
+        self.sheet.write_row(
+            header_row, 1, df.columns.tolist(), self.formats.get({"font_size": 12})
+        )
+        index_format: Format = self.formats.get(
+            {"bold": True, "border": 1, "align": "center", "valign": "top"}
+        )
+        for row, index in zip(rows.tolist(), df.index.tolist()):
+            self.sheet.write_number(row, 0, index, index_format)
+
+        for col, name in enumerate(df.columns, 1):
+            column: Series = df[name]
+            missing: np.ndarray = column.isna().to_numpy()
+            if pd.api.types.is_datetime64_any_dtype(column):
+                self.column_formats[col] = self.formats.get(
+                    {"num_format": "dd.mm.yyyy"}
+                )
+                values: np.ndarray = (
+                    (column - excel_epoch) / pd.Timedelta(days=1)
+                ).to_numpy()
+                write: Callable = self.sheet.write_number
+            elif pd.api.types.is_numeric_dtype(column):
+                values: np.ndarray = column.to_numpy(dtype=float)
+                write: Callable = self.sheet.write_number
+            else:
+                if name == "Card number":
+                    self.column_formats[col] = self.formats.get({"align": "right"})
+                values: np.ndarray = column.to_numpy(dtype=object)
+                write: Callable = self.sheet.write_string
+
+            for row, value in zip(rows[~missing].tolist(), values[~missing].tolist()):
+                write(row, col, value)
+            fill: np.ndarray | None = self.missing_cells(name, len(df), texts)
+            if fill is not None:
+                for row, text in zip(rows[missing].tolist(), fill[missing].tolist()):
+                    self.sheet.write_string(row, col, text)
+
+    def write_rows(
+        self, df: DataFrame, header_row: int, texts: Series | None = None
+    ) -> None:
+        self.write(header_row, 0, "№")
+        for col_num, value in enumerate(df.columns.values):
+            self.write(
+                header_row, col_num + 1, value, self.formats.get({"font_size": 12})
+            )
+
+        index_format: Format = self.formats.get(
+            {"bold": True, "border": 1, "align": "center", "valign": "top"}
+        )
+        for start in range(0, len(df), self.chunk_size):
+            # Only one chunk of the table is turned into python objects at a time
+            chunk: DataFrame = df.iloc[start : start + self.chunk_size]
+            columns: List[Tuple[List[Any], List[bool], Callable, Format | None]] = [
+                self.column_writer(chunk[name]) for name in df.columns
+            ]
+            fills: List[np.ndarray | None] = [
+                self.missing_cells(
+                    name,
+                    len(chunk),
+                    None if texts is None else texts.iloc[start : start + len(chunk)],
+                )
+                for name in df.columns
+            ]
+            for offset, index in enumerate(chunk.index.tolist()):
+                row: int = header_row + 1 + start + offset
+                self.sheet.write_number(row, 0, index, index_format)
+                for col, (values, missing, write, format) in enumerate(columns, 1):
+                    if not missing[offset]:
+                        write(row, col, values[offset], format)
+                    elif fills[col - 1] is not None:
+                        self.sheet.write_string(row, col, fills[col - 1][offset])
+
+    def missing_cells(
+        self, name: str, rows: int, texts: Series | None
+    ) -> np.ndarray | None:
+        # Text of the missing cells of a column, None leaves them empty
+        if name in blank_columns:
+            return None
+        if name == "Amount in foreign currency" and texts is not None:
+            return texts.astype(object).fillna(self.na_rep).to_numpy(dtype=object)
+        return np.full(rows, self.na_rep, dtype=object)
+
+    def column_writer(
+        self, column: Series
+    ) -> Tuple[List[Any], List[bool], Callable, Format | None]:
+        missing: List[bool] = column.isna().tolist()
+        if pd.api.types.is_datetime64_any_dtype(column):
+            return (
+                list(column.dt.to_pydatetime()),
+                missing,
+                self.sheet.write_datetime,
+                self.formats.get({"num_format": "dd.mm.yyyy"}),
+            )
+        if pd.api.types.is_numeric_dtype(column):
+            return column.tolist(), missing, self.sheet.write_number, None
+        format: Format | None = None
+        if column.name == "Card number":
+            format = self.formats.get({"align": "right"})
+        return column.astype(object).tolist(), missing, self.sheet.write_string, format
 
     def add_section_header(
         self,
@@ -170,31 +492,29 @@ class XslxWriter:
         income: float = report.income.total
         expenses: float = report.expenses.total
 
-        left: Format = self.workbook.add_format({"align": "right", "border": True})
-        income_style: Format = self.workbook.add_format(
+        left: Format = self.formats.get({"align": "right", "border": True})
+        income_style: Format = self.formats.get(
             {"align": "right", "bg_color": Colors.BG_INCOME, "border": True}
         )
-        expense_style: Format = self.workbook.add_format(
+        expense_style: Format = self.formats.get(
             {"align": "right", "bg_color": Colors.BG_EXPENSE, "border": True}
         )
 
-        self.sheet.write(self.row_count, 9, "Total income:", self.format("bold"))
-        self.sheet.write(self.row_count, 10, try_format_float(income), income_style)
+        self.write(self.row_count, 9, "Total income:", self.format("bold"))
+        self.write(self.row_count, 10, try_format_float(income), income_style)
         self.advance_row_pointer()
 
-        self.sheet.write(self.row_count, 9, "Total expenses:", self.format("bold"))
-        self.sheet.write(self.row_count, 10, try_format_float(expenses), expense_style)
+        self.write(self.row_count, 9, "Total expenses:", self.format("bold"))
+        self.write(self.row_count, 10, try_format_float(expenses), expense_style)
         self.advance_row_pointer()
 
-        self.sheet.write(self.row_count, 9, "Left: ", self.format("bold"))
-        self.sheet.write(self.row_count, 10, try_format_float(income - expenses), left)
+        self.write(self.row_count, 9, "Left: ", self.format("bold"))
+        self.write(self.row_count, 10, try_format_float(income - expenses), left)
         self.advance_row_pointer()
 
-        self.sheet.write(self.row_count, 8, "You spent", self.format("bold"))
-        self.sheet.write(
-            self.row_count, 9, str(int((expenses / income) * 100)) + "%", left
-        )
-        self.sheet.write(self.row_count, 10, "of your income", self.format("bold"))
+        self.write(self.row_count, 8, "You spent", self.format("bold"))
+        self.write(self.row_count, 9, str(int((expenses / income) * 100)) + "%", left)
+        self.write(self.row_count, 10, "of your income", self.format("bold"))
         self.advance_row_pointer()
 
     def add_income_report(self, income: Income):
@@ -213,19 +533,17 @@ class XslxWriter:
             self.add_fin_op(self.row_count, 1, allowance)
 
         other: float = income.other
-        self.sheet.write(self.row_count, 2, "Other:", self.format("bold"))
-        self.sheet.write(
-            self.row_count, 3, try_format_float(other), self.format("right")
-        )
+        self.write(self.row_count, 2, "Other:", self.format("bold"))
+        self.write(self.row_count, 3, try_format_float(other), self.format("right"))
         self.advance_row_pointer()
 
         total: float = income.total
-        self.sheet.write(self.row_count, 2, "Total:", self.format("bold"))
-        self.sheet.write(
+        self.write(self.row_count, 2, "Total:", self.format("bold"))
+        self.write(
             self.row_count,
             3,
             try_format_float(total),
-            self.workbook.add_format(
+            self.formats.get(
                 {"bg_color": Colors.BG_INCOME, "align": "right", "bold": True}
             ),
         )
@@ -260,6 +578,26 @@ class XslxWriter:
 
         self.advance_row_pointer(2)
 
+    def add_expenses_streaming_report(self, expenses: Expenses):
+        # The blocks of add_expenses_report one below the other,
+        # so that rows are written in order
+        start_cell: int = 1
+        self.add_section_header(
+            self.row_count, 1, 10, "Expenses statistics", Colors.BG_EXPENSE, height=25
+        )
+        self.add_section_header(
+            self.row_count, start_cell, 3, "Top-5 biggest purchases"
+        )
+        self.add_top_5_purchases(expenses, start_cell)
+        self.advance_row_pointer()
+
+        self.add_top_5_places(expenses, self.row_count, start_cell, start_cell)
+        self.add_cache_withdraws(expenses, start_cell)
+        self.advance_row_pointer()
+
+        self.add_currency_operations(expenses, start_cell)
+        self.advance_row_pointer(2)
+
     def add_top_5_places(
         self, expenses, headers_row, second_table_start_cell, start_cell
     ):
@@ -267,16 +605,16 @@ class XslxWriter:
             headers_row, second_table_start_cell, 4, "Top-5 expenses"
         )
         top_5: List[Top5Payment] = expenses.top_5_places
-        self.sheet.write(
+        self.write(
             self.row_count, second_table_start_cell, "Description", self.format("label")
         )
-        self.sheet.write(
+        self.write(
             self.row_count, second_table_start_cell + 1, "Amount", self.format("label")
         )
-        self.sheet.write(
+        self.write(
             self.row_count, second_table_start_cell + 2, "Times", self.format("label")
         )
-        self.sheet.write(
+        self.write(
             self.row_count,
             second_table_start_cell + 3,
             "Average bill",
@@ -289,15 +627,15 @@ class XslxWriter:
             avg: float = top_5_item.avg_bill
             num: int = top_5_item.num_of_occurrences
 
-            self.sheet.write(self.row_count, start_cell, title, self.format("right"))
-            self.sheet.write(
+            self.write(self.row_count, start_cell, title, self.format("right"))
+            self.write(
                 self.row_count,
                 start_cell + 1,
                 try_format_float(amount),
                 self.format("right"),
             )
-            self.sheet.write(self.row_count, start_cell + 2, num, self.format("right"))
-            self.sheet.write(
+            self.write(self.row_count, start_cell + 2, num, self.format("right"))
+            self.write(
                 self.row_count,
                 start_cell + 3,
                 try_format_float(avg),
@@ -317,31 +655,31 @@ class XslxWriter:
         self.add_section_header(
             self.row_count, second_table_start_cell, 6, "Currency operations"
         )
-        self.sheet.write(
+        self.write(
             self.row_count, second_table_start_cell, "Date", self.format("label")
         )
-        self.sheet.write(
+        self.write(
             self.row_count,
             second_table_start_cell + 1,
             "Description",
             self.format("label"),
         )
-        self.sheet.write(
+        self.write(
             self.row_count, second_table_start_cell + 2, "Amount", self.format("label")
         )
-        self.sheet.write(
+        self.write(
             self.row_count,
             second_table_start_cell + 3,
             "Purchased",
             self.format("label"),
         )
-        self.sheet.write(
+        self.write(
             self.row_count,
             second_table_start_cell + 4,
             "Currency",
             self.format("label"),
         )
-        self.sheet.write(
+        self.write(
             self.row_count,
             second_table_start_cell + 5,
             "Exchange rate",
@@ -370,26 +708,22 @@ class XslxWriter:
         amount: float = fin_op.amount
         title: str = fin_op.title
 
-        self.sheet.write(
-            row, start_cell, date.strftime("%d.%m.%Y"), self.format("right")
-        )
-        self.sheet.write(row, start_cell + 1, title, self.format("right"))
-        self.sheet.write(
+        self.write(row, start_cell, date.strftime("%d.%m.%Y"), self.format("right"))
+        self.write(row, start_cell + 1, title, self.format("right"))
+        self.write(
             row,
             start_cell + 2,
             try_format_float(amount),
-            self.workbook.add_format({"align": "right"}),
+            self.formats.get({"align": "right"}),
         )
         self.advance_row_pointer()
 
     def add_fin_op_header(
         self, row: int, start_cell: int, bg_color: str = Colors.BG_LABELS
     ):
-        self.sheet.write(row, start_cell, "Date", self.format("label", bg_color))
-        self.sheet.write(
-            row, start_cell + 1, "Description", self.format("label", bg_color)
-        )
-        self.sheet.write(row, start_cell + 2, "Amount", self.format("label", bg_color))
+        self.write(row, start_cell, "Date", self.format("label", bg_color))
+        self.write(row, start_cell + 1, "Description", self.format("label", bg_color))
+        self.write(row, start_cell + 2, "Amount", self.format("label", bg_color))
         self.advance_row_pointer()
 
     def add_currency_op(self, row: int, start_cell: int, curr_op: CurrencyOperation):
@@ -399,29 +733,30 @@ class XslxWriter:
         exchange_rate: float = curr_op.exchange_rate
         self.add_fin_op(row, start_cell, fin_op)
         start_cell += 3
-        self.sheet.write(row, start_cell, bought_amount, self.format("right"))
-        self.sheet.write(row, start_cell + 1, currency.value)
-        self.sheet.write(
+        self.write(row, start_cell, bought_amount, self.format("right"))
+        self.write(row, start_cell + 1, currency.value)
+        self.write(
             row,
             start_cell + 2,
             try_format_float(exchange_rate),
-            self.workbook.add_format({"align": "left"}),
+            self.formats.get({"align": "left"}),
         )
 
     def advance_row_pointer(self, rows: int = 1):
         self.row_count += rows
 
     def format(self, name: str, bg_color: str = None) -> Format:
-        formats: Dict[str, Format] = {
-            "label": self.workbook.add_format(
+        if name == "label":
+            return self.formats.get(
                 {
                     "bold": True,
                     "border": True,
                     "font_size": 12,
                     "bg_color": Colors.BG_LABELS if bg_color is None else bg_color,
                 }
-            ),
-            "merge": self.workbook.add_format(
+            )
+        if name == "merge":
+            return self.formats.get(
                 {
                     "bold": True,
                     "border": True,
@@ -430,8 +765,13 @@ class XslxWriter:
                     "font_size": 14,
                     "fg_color": Colors.BG_HEADER if bg_color is None else bg_color,
                 }
-            ),
-            "bold": self.workbook.add_format({"bold": True}),
-            "right": self.workbook.add_format({"align": "right"}),
-        }
-        return formats[name]
+            )
+        if name == "bold":
+            return self.formats.get({"bold": True})
+        if name == "right":
+            return self.formats.get({"align": "right"})
+        raise KeyError(name)
+
+
+def write_report_file(settings: Settings, report: Report) -> str:
+    return XslxWriter(settings).write_file(report)